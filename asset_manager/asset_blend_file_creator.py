@@ -1,16 +1,19 @@
 import bpy
 import sys
+import json
 import pathlib
 import time
-import io
-from zlib import decompress
+import traceback
 from mathutils import Matrix
 
 addon_name = 'gscatter'
 
 try:
-    success = bpy.ops.preferences.addon_enable(module=addon_name)
-    from gscatter.vendor.PIL import Image
+    # Children of the fork server start with the addon enabled
+    if addon_name not in bpy.context.preferences.addons:
+        success = bpy.ops.preferences.addon_enable(module=addon_name)
+    from gscatter.asset_manager import thumbnails
+    from gscatter.utils.getters import get_user_library
 except ImportError:
     print(addon_name, "is not found")
 
@@ -21,35 +24,23 @@ SYSTEM_PRESETS_CATALOG_ID = "fbc8debc-401d-47df-b9ea-18cd85dc9b74"
 SINGLE_SYSTEM_PRESETS_CATALOG_ID = "9b5207ab-ac59-4bea-b680-1825424eca00"
 FREE_ASSET_CATALOG_ID = "f686fee3-ac80-4754-b00a-fe2e8b059bc8"
 
-# read command line arguments
-args = []
-
-skip = True
-
-for arg in sys.argv:
-    if arg == "--":
-        skip = False
-        continue
-
-    if skip:
-        continue
+COPYRIGHT = '© Graswald GmbH 2024'
 
-    args.append(arg)
-
-blend_file_src = args[0]
-blend_file_path = args[1]
-product_name = args[2]
-product_id = args[3]
-catalog_id = args[4]
-variants = eval(args[5])
-asset_type = args[6]
-preview = args[7]
-create_object_entry = eval(args[8])
-create_lod_collection_entry = eval(args[9])
 
-
-def save():
-    bpy.ops.wm.save_as_mainfile(filepath=blend_file_path)
+def parse_args(args):
+    '''Read the arguments of one product, as written by prepare_asset_browser_entry.'''
+    return {
+        "blend_file_src": args[0],
+        "blend_file_path": args[1],
+        "product_name": args[2],
+        "product_id": args[3],
+        "catalog_id": args[4],
+        "variants": eval(args[5]),
+        "asset_type": args[6],
+        "preview": args[7],
+        "create_object_entry": eval(args[8]),
+        "create_lod_collection_entry": eval(args[9]),
+    }
 
 
 def create_collection(name, parent_collection=None):
@@ -59,204 +50,217 @@ def create_collection(name, parent_collection=None):
     return collection
 
 
-def _bip_to_image(src, dst):
-    '''Convert BIP to various image formats.'''
-    _BIP2_MAGIC = b'BIP2'
-    with open(src, 'rb') as bip:
-        if bip.read(4) != _BIP2_MAGIC:
-            raise ValueError('input is not a supported file format')
+def get_or_create_collection(collections, name, parent_collection=None):
+    '''Get a collection from a name lookup, creating and adding it if missing.'''
+    collection = collections.get(name)
+    if collection is None:
+        collection = collections[name] = create_collection(name, parent_collection)
+    return collection
 
-        count = int.from_bytes(bip.read(1), 'big')
-        assert count > 0, 'the file contains no images'
-        bip.seek(8 * (count - 1), io.SEEK_CUR)
 
-        size = [int.from_bytes(bip.read(2), 'big') for _ in range(2)]
-        length = int.from_bytes(bip.read(4), 'big')
+def mark_asset(id, catalog_id, product_id, tags=(), description=None, author=None):
+    '''Mark an ID as asset and fill its metadata, without operators.'''
+    id.asset_mark()
+    id.asset_data.catalog_id = catalog_id
+    if description is not None:
+        id.asset_data.description = description
+    if author is not None:
+        id.asset_data.author = author
+        id.asset_data.copyright = COPYRIGHT
+    id.asset_data.tags.new(name=product_id)
+    for tag in tags:
+        id.asset_data.tags.new(name=tag)
 
-        bip.seek(-length, io.SEEK_END)
-        content = decompress(bip.read(length))
-        image = Image.frombytes('RGBa', size, content)
-        image = image.convert('RGBA')
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)
 
-        try:
-            image.save(dst)
-        except OSError:
-            image.convert('RGB').save(dst)
+def group_objects(variant_ids):
+    '''Group the objects named <product>_<variant>_<type>_<lod>_... by variant, type and LOD in one pass.'''
+    groups = {variant_id: {} for variant_id in variant_ids}
+    for obj in bpy.data.objects:
+        name_parts = obj.name.split("_")
+        if len(name_parts) >= 4 and name_parts[1] in groups:
+            groups[name_parts[1]].setdefault(name_parts[2], {}).setdefault(name_parts[3], []).append(obj)
+    return groups
 
 
-if asset_type == "3D_PLANT":
-    # shutil.copyfile(blend_file_src, blend_file_path)
-    bpy.ops.wm.open_mainfile(filepath=blend_file_src)
+def apply_object_transform(obj):
+    '''Bake the shape keys, rotation and scale of an object into its mesh.'''
+    if obj.data.shape_keys:
+        for key in obj.data.shape_keys.key_blocks:
+            if 'height' in key.name.lower():
+                key.value = 0
+    key = obj.shape_key_add(from_mix=True)
+    key.value = 1.0
 
-    preview_icon_id = None
-    is_vol1 = False
-    for variant in variants:
-        print(variant["id"])
-        col = bpy.data.collections.get(variant['id'])
-        if col is None or is_vol1:
-            is_vol1 = True
-            col = create_collection(variant['id'])
-            bpy.context.scene.collection.children.link(col)
+    for key in obj.data.shape_keys.key_blocks:
+        obj.shape_key_remove(key)
+
+    mb = obj.matrix_basis
 
-            for obj in bpy.data.objects:
-                name_parts = obj.name.split("_")
-                if len(name_parts) >= 4 and name_parts[1] == variant['id']:
-                    if bpy.data.collections.get(f"{variant['id']}_{name_parts[2]}") is None:
-                        type_col = create_collection(f"{variant['id']}_{name_parts[2]}", col)
-                    if bpy.data.collections.get(f"{variant['id']}_{name_parts[2]}_{name_parts[3]}") is None:
-                        lod_col = create_collection(f"{variant['id']}_{name_parts[2]}_{name_parts[3]}", type_col)
+    loc, rot, scale = mb.decompose()
 
-                    for collection in obj.users_collection:
-                        collection.objects.unlink(obj)
-                    lod_col.objects.link(obj)
+    # rotation & scale
+    T = Matrix.Translation(loc)
+    R = rot.to_matrix().to_4x4()
+    S = Matrix.Diagonal(scale).to_4x4()
 
-                    if obj.data.shape_keys:
-                        for key in obj.data.shape_keys.key_blocks:
-                            if 'height' in key.name.lower():
-                                key.value = 0
-                    key = obj.shape_key_add(from_mix=True)
-                    key.value = 1.0
+    if hasattr(obj.data, "transform"):
+        obj.data.transform(R @ S)
 
-                    for key in obj.data.shape_keys.key_blocks:
-                        obj.shape_key_remove(key)
+    for c in obj.children:
+        c.matrix_local = (R @ S) @ c.matrix_local
 
-                    mw = obj.matrix_world
-                    mb = obj.matrix_basis
+    obj.matrix_basis = T
 
-                    loc, rot, scale = mb.decompose()
 
-                    # rotation & scale
-                    T = Matrix.Translation(loc)
-                    R = rot.to_matrix().to_4x4()
-                    S = Matrix.Diagonal(scale).to_4x4()
+def load_variant_preview(col, preview):
+    '''Load the gallery thumbnail of a preview as custom preview, shared with the library UI.'''
+    source = thumbnails.preview_source(preview)
 
-                    if hasattr(obj.data, "transform"):
-                        obj.data.transform(R @ S)
+    thumbnail = None
+    if pathlib.Path(source).exists() and not source.startswith("."):
+        cache_dir = get_user_library(bpy.context).joinpath(thumbnails.CACHE_DIR)
+        thumbnail = thumbnails.build([source], cache_dir, kinds=("gallery",)).get(source, {}).get("gallery")
 
-                    for c in obj.children:
-                        c.matrix_local = (R @ S) @ c.matrix_local
+    if thumbnail is None:
+        col.asset_generate_preview()
+        return
+    with bpy.context.temp_override(id=col):
+        bpy.ops.ed.lib_id_load_custom_preview(filepath=str(thumbnail))
+
+
+def build_plant(job):
+    variants = job["variants"]
+    product_id = job["product_id"]
+
+    bpy.ops.wm.open_mainfile(filepath=job["blend_file_src"])
+
+    collections = {collection.name: collection for collection in bpy.data.collections}
+    groups = None
+    is_vol1 = False
+
+    for variant in variants:
+        print(variant["id"])
+        col = collections.get(variant['id'])
+        if col is None or is_vol1:
+            is_vol1 = True
+            col = create_collection(variant['id'])
+            bpy.context.scene.collection.children.link(col)
 
-                    obj.matrix_basis = T
+            if groups is None:
+                groups = group_objects([v['id'] for v in variants])
+            for type_name, lods in groups.get(variant['id'], {}).items():
+                type_col = get_or_create_collection(collections, f"{variant['id']}_{type_name}", col)
+                for lod, objects in lods.items():
+                    lod_col = get_or_create_collection(collections, f"{variant['id']}_{type_name}_{lod}", type_col)
+                    for obj in objects:
+                        for collection in obj.users_collection:
+                            collection.objects.unlink(obj)
+                        lod_col.objects.link(obj)
+                        apply_object_transform(obj)
 
         child: bpy.types.Collection
         for child in col.children:
             ob: bpy.types.Object
-            for idx, ob in enumerate(child.objects):
+            for ob in child.objects:
                 mat = ob.active_material
                 albedo = mat.node_tree.nodes.get('albedo')
                 if albedo:
                     mat.node_tree.nodes.active = albedo
 
-            if create_object_entry:
+            if job["create_object_entry"]:
                 for ob in child.objects:
-                    # ob.asset_mark()
-                    bpy.context.view_layer.objects.active = ob
-                    bpy.ops.object.select_all(action="DESELECT")
-                    ob.select_set(True)
                     try:
-                        with bpy.context.temp_override(id=ob, object=ob):
-                            bpy.ops.asset.mark()
-                            # bpy.ops.ed.lib_id_generate_preview()
-                            # time.sleep(0.3)
-                        ob.asset_data.description = variant['description']
-                        ob.asset_data.catalog_id = variant['lod_catalog_ids'][ob.name.split("_")[-2]]
-                        ob.asset_data.author = variant['author']
-                        ob.asset_data.copyright = '© Graswald GmbH 2024'
-                        ob.asset_data.tags.new(name=product_id)
-                        ob.asset_data.tags.new(name=variant['name'])
-                    except:
-                        ...
-
-            if create_lod_collection_entry:
+                        mark_asset(ob, variant['lod_catalog_ids'][ob.name.split("_")[-2]], product_id,
+                                   (variant['name'],), variant['description'], variant['author'])
+                        ob.asset_generate_preview()
+                    except Exception as e:
+                        print(f"Gscatter: Failed to mark {ob.name}: {str(e)}")
+
+            if job["create_lod_collection_entry"]:
                 try:
-                    with bpy.context.temp_override(id=child):
-                        bpy.ops.asset.mark()
-                        # bpy.ops.ed.lib_id_generate_preview()
-                        # time.sleep(0.3)
                     lod = child.name.split("_")[-1]
+                    mark_asset(child, variant['lod_catalog_ids'][lod], product_id, (variant['name'],),
+                               variant['description'], variant['author'])
                     child.name = variant['name'] + " " + lod.upper()
-                    child.asset_data.description = variant['description']
-                    child.asset_data.catalog_id = variant['lod_catalog_ids'][lod]
-                    child.asset_data.author = variant['author']
-                    child.asset_data.copyright = '© Graswald GmbH 2024'
-                    child.asset_data.tags.new(name=product_id)
-                    child.asset_data.tags.new(name=variant['name'])
-                except:
-                    ...
-
-        with bpy.context.temp_override(id=col):
-            bpy.ops.asset.mark()
+                except Exception as e:
+                    print(f"Gscatter: Failed to mark {child.name}: {str(e)}")
+
         col.name = variant['name']
-        col.asset_data.catalog_id = variant['variant_catalog_id']
-        col.asset_data.description = variant['description']
-        col.asset_data.author = variant['author']
-        col.asset_data.copyright = '© Graswald GmbH 2024'
+        mark_asset(col, variant['variant_catalog_id'], product_id, (variant['name'], "asset_type:3D_PLANT"),
+                   variant['description'], variant['author'])
         col['gscatter_type'] = 'asset'
-        col.asset_data.tags.new(name=product_id)
-        col.asset_data.tags.new(name=variant['name'])
-        col.asset_data.tags.new(name="asset_type:3D_PLANT")
-
-        with bpy.context.temp_override(id=col):
-            if pathlib.Path(variant['preview'].replace(".bip", ".png")).exists():
-                bpy.ops.ed.lib_id_load_custom_preview(filepath=variant['preview'].replace(".bip", ".png"))
-            else:
-                try:
-                    if pathlib.Path(variant['preview']).exists() and not variant['preview'].startswith("."):
-                        _bip_to_image(src=pathlib.Path(variant['preview']),
-                                    dst=pathlib.Path(variant['preview'].replace(".bip", ".png")))
-                        bpy.ops.ed.lib_id_load_custom_preview(filepath=variant['preview'].replace(".bip", ".png"))
-                except ImportError:
-                    bpy.ops.ed.lib_id_generate_preview()
-        # time.sleep(1)
+
+        load_variant_preview(col, variant['preview'])
+
     if is_vol1:
-        bpy.ops.wm.save_as_mainfile(filepath=blend_file_src)
+        bpy.ops.wm.save_as_mainfile(filepath=job["blend_file_src"])
 
-else:
+
+def build_single(job):
+    product_name = job["product_name"]
+    asset_type = job["asset_type"]
+
+    bpy.ops.wm.read_homefile(use_empty=True)
     o = bpy.data.objects.new(name=product_name, object_data=bpy.data.meshes.new(name=product_name))
 
-    if asset_type == "ENVIRONMENT":
+    mark_asset(o, job["catalog_id"], job["product_id"], (f"asset_type:{asset_type.upper()}",))
+    o['gscatter_type'] = asset_type
+    if job["preview"]:
         with bpy.context.temp_override(id=o):
-            bpy.ops.asset.mark()
-            if preview:
-                bpy.ops.ed.lib_id_load_custom_preview(filepath=preview)
+            bpy.ops.ed.lib_id_load_custom_preview(filepath=job["preview"])
+
+
+def build_product(job):
+    '''Build and save the asset browser blend file of one product.'''
+    start = time.perf_counter()
+    if job["asset_type"] == "3D_PLANT":
+        build_plant(job)
     else:
-        o.asset_mark()
-        with bpy.context.temp_override(id=o):
-            if preview:
-                bpy.ops.ed.lib_id_load_custom_preview(filepath=preview)
+        build_single(job)
 
-    o.asset_data.catalog_id = catalog_id
-    o['gscatter_type'] = asset_type
-    o.asset_data.tags.new(name=product_id)
-    o.asset_data.tags.new(name=f"asset_type:{asset_type.upper()}")
+    print("Gscatter: Saving")
+    bpy.ops.wm.save_as_mainfile(filepath=job["blend_file_path"])
+    print(f"Gscatter: Built {job['product_name']} in {time.perf_counter() - start:.1f}s")
 
 
-def batch_generate_previews():
-    # Ensure you're in object mode
-    if bpy.context.mode != 'OBJECT':
-        bpy.ops.object.mode_set(mode='OBJECT')
+# read command line arguments
+args = []
 
-    # Iterate through all objects in the current blend file
-    for obj in bpy.context.view_layer.objects:
-        # Select the object
-        bpy.context.view_layer.objects.active = obj
-        obj.select_set(True)
+skip = True
 
-        # Generate preview
-        bpy.ops.wm.previews_batch_generate()
+for arg in sys.argv:
+    if arg == "--":
+        skip = False
+        continue
+
+    if skip:
+        continue
 
-        # Deselect the object
-        obj.select_set(False)
+    args.append(arg)
+
+# One product per launch, or with --batch a JSON file listing the arguments of many products
+if args[0] == "--batch":
+    with open(args[1], "r") as f:
+        jobs = [parse_args(product_args) for product_args in json.load(f)]
+else:
+    jobs = [parse_args(args)]
 
+failed = 0
+for job in jobs:
+    try:
+        build_product(job)
+    except Exception:
+        failed += 1
+        print(f"Gscatter: Failed to build {job['product_name']}")
+        traceback.print_exc()
 
-batch_generate_previews()
-print("Gscatter: Saving")
-save()
+if failed:
+    print(f"Gscatter: {failed} of {len(jobs)} products failed")
+    sys.exit(1)
 
 
 def quit():
-    if pathlib.Path(blend_file_path).exists():
+    if all(pathlib.Path(job["blend_file_path"]).exists() for job in jobs):
         bpy.ops.wm.quit_blender()
     return 0.5
 
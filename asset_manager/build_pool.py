@@ -0,0 +1,176 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import bpy
+
+from ..utils.logger import debug
+
+# Memory a background Blender building one asset browser entry may take.
+BUILD_JOB_MEMORY = 1536 * 2**20
+
+# Seconds between checks of the running jobs.
+POLL_INTERVAL = 0.05
+
+# Output of the build jobs, one log file per job.
+BUILD_LOGS_DIR = Path(tempfile.gettempdir(), "gscatter", "build_logs")
+
+
+def available_memory() -> int:
+    '''Memory available to new processes in bytes, 0 where unknown.'''
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return 0
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def pool_size(job_memory: int = BUILD_JOB_MEMORY) -> int:
+    '''Number of build jobs run at once, bounded by the CPU count and the available memory.'''
+    size = os.cpu_count() or 1
+    memory = available_memory()
+    if memory:
+        size = min(size, memory // job_memory)
+    return max(1, size)
+
+
+class BuildJob:
+    '''A background Blender run of a script, with its log file and exit code.'''
+
+    def __init__(self, name: str, args: list, log_path: Path = None, data=None):
+        self.name = name
+        self.args = [str(arg) for arg in args]
+        self.log_path = log_path
+        self.data = data
+        self.returncode = None
+        self.duration = 0.0
+        self._process = None
+        self._log = None
+        self._started = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0
+
+    def log(self, lines: int = 20) -> str:
+        '''Get the last lines written by the job.'''
+        if self.log_path is None or not self.log_path.exists():
+            return ""
+        with open(self.log_path, "r", errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+
+
+class BuildPool:
+    '''Runs background Blender jobs of a script, at most size of them at once.
+
+    Jobs run in forks of the shared fork server where possible, otherwise a
+    Blender is launched per job. The pool is driven from the calling thread,
+    so progress callbacks may update the UI.'''
+
+    def __init__(self, script: Path, size: int = None, use_fork_server=True, blender: Path = None):
+        self.script = str(script)
+        self.size = size or pool_size()
+        self.blender = str(blender or bpy.app.binary_path)
+        self.use_fork_server = use_fork_server
+
+    def _start(self, job: BuildJob, server):
+        if job.log_path is None:
+            job.log_path = BUILD_LOGS_DIR.joinpath(f"{bpy.path.clean_name(job.name)}.log")
+        job.log_path.parent.mkdir(parents=True, exist_ok=True)
+        job._started = time.perf_counter()
+
+        if server is not None:
+            try:
+                job._process = server.spawn(self.script, job.args, log=job.log_path)
+                return
+            except (OSError, RuntimeError) as e:
+                debug(f"Fork server failed to start {job.name}, launching Blender: {str(e)}")
+
+        job._log = open(job.log_path, "w")
+        job._process = subprocess.Popen([self.blender, "-b", "-P", self.script, "--", *job.args],
+                                        stdout=job._log,
+                                        stderr=subprocess.STDOUT)
+
+    def _finish(self, job: BuildJob, returncode: int):
+        job.returncode = returncode
+        job.duration = time.perf_counter() - job._started
+        job._process = None
+        if job._log is not None:
+            job._log.close()
+            job._log = None
+
+    def run(self, jobs: list, on_done=None) -> list:
+        '''Run all jobs and wait for them.
+
+        on_done(job, done) is called as every job completes, done counts the completed jobs.
+        Returns the jobs, their returncode is set and their output is in their log_path.'''
+        # Imported here, the scripts package imports the asset manager
+        from ..scripts import fork_server
+
+        server = fork_server.get_server(self.blender) if self.use_fork_server else None
+        pending = list(reversed(jobs))
+        running = []
+        done = 0
+        try:
+            while pending or running:
+                while pending and len(running) < self.size:
+                    job = pending.pop()
+                    try:
+                        self._start(job, server)
+                    except OSError as e:
+                        print(f"Gscatter: Failed to start {job.name}: {str(e)}")
+                        self._finish(job, -1)
+                        done += 1
+                        if on_done:
+                            on_done(job, done)
+                        continue
+                    running.append(job)
+
+                finished = [job for job in running if job._process.poll() is not None]
+                for job in finished:
+                    running.remove(job)
+                    self._finish(job, job._process.returncode)
+                    done += 1
+                    if on_done:
+                        on_done(job, done)
+
+                if not finished and running:
+                    time.sleep(POLL_INTERVAL)
+        finally:
+            # Interrupted, e.g. by an exception of on_done
+            for job in running:
+                job._process.terminate()
+                self._finish(job, job._process.wait())
+        return jobs
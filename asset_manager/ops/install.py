@@ -14,10 +14,11 @@ from .. import utils
 from .. import default
 from ... import icons
 from ..asset_browser import refresh_library, refresh_viewport, set_catalog_id
-from ..utils import create_asset_browser_entry
+from ..utils import create_asset_browser_entry, prepare_asset_browser_entry, build_asset_browser_entries
+from ..build_pool import BuildJob
 from ...effects.store import effectstore, effectpresetstore
 from ...scatter.store import scattersystempresetstore
-from ...utils.getters import (get_user_assets_dir, get_asset_browser_dir, get_user_library)
+from ...utils.getters import (get_user_assets_dir, get_asset_browser_dir, get_user_library, get_preferences)
 from ...tracking import track
 from ...utils.logger import debug, success
 from ...slow_task_manager.scopped_slow_task import StartSlowTask
@@ -214,6 +215,7 @@ class AssetBrowserInstallAssetsOperator(Operator, ImportHelper):
             return {"CANCELLED"}
 
         operator = self
+        entries = []
         with StartSlowTask("Installing Assets", total) as task:
             for i in range(total):
                 file_elem = files[i]
@@ -269,10 +271,11 @@ class AssetBrowserInstallAssetsOperator(Operator, ImportHelper):
                         product_data = json.load(f)
                         f.close()
                         name = name = product_data.get("name", "")
-                        result = create_asset_browser_entry(context, name, product_data, asset_type, asset_dir,
-                                                            self.create_object_entry, self.create_lod_collection_entry)
-                        if result:
-                            process, asset_blend_path, catalog_id = result
+                        entry = prepare_asset_browser_entry(context, name, product_data, asset_type, asset_dir,
+                                                            self.create_object_entry,
+                                                            self.create_lod_collection_entry)
+                        if entry:
+                            entries.append(entry)
 
                         # Check for effects.json and if found install it
                         effect_json = asset_dir.joinpath("effects.json")
@@ -300,6 +303,32 @@ class AssetBrowserInstallAssetsOperator(Operator, ImportHelper):
                             shutil.copytree(icons_folder, user_icons_folder, dirs_exist_ok=True)
                             icons.load_user_icons()
 
+        # The blend files are built in parallel once all bundles are extracted
+        if entries:
+            with StartSlowTask("Building Asset Browser Entries", len(entries)) as build_task:
+                build_task.set_progress(0)
+                build_task.set_progress_text(f"Building {len(entries)} assets")
+                build_task.refresh()
+
+                def on_built(job: BuildJob, built: int):
+                    build_task.set_progress(built)
+                    build_task.set_progress_text(f"Built {built}/{len(entries)} assets")
+                    build_task.refresh()
+
+                build_jobs = build_asset_browser_entries(entries, on_built, get_preferences(context).use_fork_server)
+
+            for job in build_jobs:
+                debug(f"Built {len(job.data)} assets in {job.duration:.1f}s, exit code {job.returncode}")
+                for _, asset_blend_path, entry_catalog_id in job.data:
+                    if Path(asset_blend_path).exists():
+                        catalog_id = entry_catalog_id
+                    else:
+                        total_failed += 1
+                        operator.report({"ERROR"}, f'Failed to build "{Path(asset_blend_path).stem}", '
+                                        f'see {job.log_path}')
+                if not job.succeeded:
+                    print(job.log())
+
         if catalog_id:
             bpy.app.timers.register(partial(set_catalog_id, catalog_id), first_interval=1)
         bpy.app.timers.register(utils.load_library, first_interval=1)
@@ -555,14 +584,10 @@ class SyncInstalledAssetsOperator(Operator):
         selected = [asset for asset in self.assets if asset.select]
         total = len(selected)
         with StartSlowTask("Installing Assets", total) as task:
+            entries = []
             for i in range(total):
                 asset_data = selected[i]
                 asset = eval(asset_data.target)
-                name = getattr(asset, "product_name", asset.name)
-                task.set_progress(i)
-                task.set_progress_text(f"Installing: {name}\nWarning, this operation will take a few minutes.")
-                task.refresh()
-
                 asset_dir = Path(asset.blends[0].name).parent.parent
 
                 product_json = asset_dir.joinpath("product.json")
@@ -572,8 +597,26 @@ class SyncInstalledAssetsOperator(Operator):
                 f.close()
 
                 asset_type = utils.get_asset_type(product_json_path=product_json)
-                create_asset_browser_entry(context, product_data.get("name", asset_dir.name), product_data, asset_type,
-                                           asset_dir, self.create_object_entry, self.create_lod_collection_entry)
+                entry = prepare_asset_browser_entry(context, product_data.get("name", asset_dir.name), product_data,
+                                                    asset_type, asset_dir, self.create_object_entry,
+                                                    self.create_lod_collection_entry)
+                if entry:
+                    entries.append(entry)
+
+            # Many products are built per Blender session, several sessions at once
+            task.set_progress(0)
+            task.set_progress_text(f"Installing {len(entries)} assets\nWarning, this operation will take a few minutes.")
+            task.refresh()
+
+            def on_built(job: BuildJob, built: int):
+                task.set_progress(built * total // max(len(entries), 1))
+                task.set_progress_text(f"Installed {built}/{len(entries)} assets")
+                task.refresh()
+
+            for job in build_asset_browser_entries(entries, on_built, get_preferences(context).use_fork_server):
+                if not job.succeeded:
+                    print(f"Gscatter: Failed to install some assets, see {job.log_path}")
+                    print(job.log())
 
             refresh_library()
 
@@ -1,15 +1,113 @@
 import bpy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from ..vendor.t3dn_bip import previews
+from ..vendor.t3dn_bip.utils import tag_redraw
+from ..utils.getters import get_user_library
+from . import thumbnails
 
 previews.settings.WARNINGS = False
 collection = None
 
+# Cached thumbnails by (source path, kind).
+_thumbnails = {}
+
+# Sources waiting for their thumbnails, with an optional function fetching a missing source.
+_requested = {}
+
+# Sources without thumbnails, their previews are loaded from the full image.
+_failed = set()
+
+# Thumbnails are built one batch at a time, away from the main thread.
+_executor = None
+_building = None
+
 
 def get(path: str) -> bpy.types.ImagePreview:
     return collection.load_safe(path, path, 'IMAGE')
 
 
+def thumbnail_dir():
+    return get_user_library(bpy.context).joinpath(thumbnails.CACHE_DIR)
+
+
+def get_thumbnail(path: str, kind: str = "gallery") -> int:
+    '''Get the icon id of the cached thumbnail of an image, 0 until it is built.'''
+    if not path:
+        return 0
+
+    thumbnail = _thumbnails.get((path, kind))
+    if thumbnail is None:
+        if path in _failed:
+            return get(path).icon_id
+        if path in _requested:
+            _schedule()
+            return 0
+        thumbnail = thumbnails.cached(path, kind, thumbnail_dir())
+        if thumbnail is None:
+            request(path)
+            return 0
+        thumbnail = _thumbnails[(path, kind)] = thumbnail.as_posix()
+    return get(thumbnail).icon_id
+
+
+def request(path: str, fetch=None):
+    '''Build the thumbnails of an image in the background, after calling fetch if it does not exist.
+
+    Safe to call from other threads, their requests start once the thumbnail is drawn.'''
+    _requested[path] = fetch
+    if threading.current_thread() is threading.main_thread():
+        _schedule()
+
+
+def _schedule():
+    if not bpy.app.timers.is_registered(_update):
+        bpy.app.timers.register(_update, first_interval=0.1)
+
+
+def _build(batch: dict, cache_dir):
+    for path, fetch in batch.items():
+        if fetch is not None:
+            try:
+                fetch()
+            except Exception as e:
+                print(f"Gscatter: Failed to fetch {path}: {str(e)}")
+    return thumbnails.build(batch, cache_dir)
+
+
+def _update():
+    global _executor, _building
+    if _building is not None:
+        batch, future = _building
+        if not future.done():
+            return 0.1
+
+        _building = None
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Gscatter: Failed to make thumbnails: {str(e)}")
+            results = {}
+        for path in batch:
+            _requested.pop(path, None)
+            if not results.get(path):
+                _failed.add(path)
+            for kind, thumbnail in results.get(path, {}).items():
+                _thumbnails[(path, kind)] = thumbnail.as_posix()
+        tag_redraw()
+
+    # Sources requested while the last batch was built
+    pending = dict(_requested)
+    if not pending:
+        return None
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+    _building = (pending, _executor.submit(_build, pending, thumbnail_dir()))
+    return 0.1
+
+
 def register():
     global collection
     collection = previews.new(max_size=(1024, 1024))
@@ -17,4 +115,14 @@ def register():
 
 def unregister():
     #bpy.utils.previews.remove(collection._collection)
+    global _executor, _building
+    if bpy.app.timers.is_registered(_update):
+        bpy.app.timers.unregister(_update)
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    _building = None
+    _requested.clear()
+    _failed.clear()
+    _thumbnails.clear()
     previews.remove(collection)
@@ -3,6 +3,7 @@ import os
 import shutil
 import tempfile
 import threading
+from functools import partial
 from typing import Union
 from zipfile import ZipFile
 
@@ -65,20 +66,18 @@ class FreeAssetWidget(BaseWidget):
         user_icons_folder = library_path.joinpath("icons")
         user_icons_folder.mkdir(exist_ok=True)
         icon = user_icons_folder.joinpath(self.asset_id + ".bip")
-        if icon.exists():
-            self.icon = icon.as_posix()
-            image_path = icon.as_posix()
-        else:
-            image_path = download_image(data.get("icon", ""), self.asset_id)
-            self.icon = image_path.as_posix()
+        self.icon = icon.as_posix()
+        if not icon.exists():
+            # Downloaded with the thumbnails, the gallery shows a blank icon until then
+            previews.request(self.icon, partial(download_image, data.get("icon", ""), self.asset_id, library_path))
 
         if create_entry and prefs.enable_experimental_features:
             return True
 
     def draw_gallery(self, layout: UILayout):
         box = layout.box()
-        preview = previews.get(self.icon)
-        box.template_icon(icon_value=preview.icon_id, scale=utils.icon_scale_from_res(173))
+        box.template_icon(icon_value=previews.get_thumbnail(self.icon, "gallery"),
+                          scale=utils.icon_scale_from_res(173))
         row = layout.row(align=True)
         row.scale_y = 1.6
         library = self.parent
@@ -295,8 +294,8 @@ def requestdownloadUrl(url: str):
     return response
 
 
-def download_image(url: str, asset_id: str):
-    library_path = get_user_library(bpy.context)
+def download_image(url: str, asset_id: str, library_path=None):
+    library_path = library_path or get_user_library(bpy.context)
     user_icons_folder = library_path.joinpath("icons")
     temp_dir = tempfile.mkdtemp()
     filename: str = os.path.basename(url)
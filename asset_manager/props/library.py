@@ -1,3 +1,4 @@
+import hashlib
 import json
 import math
 from typing import Union
@@ -25,6 +26,7 @@ from ..ops.page import (
 )
 from ..ops.popup import FilterPopup
 from ..ops.scatter import AddToSceneOperator, ScatterSelectedOperator
+from ..search_index import SearchIndex
 from ..utils import get_asset_type_from_asset_browser
 from .asset import AssetWidget
 from .base import BaseWidget
@@ -66,6 +68,111 @@ def enumerate_environments(self, context: bpy.types.Context):
 
 environment_items = []
 
+# Search indices by library widget and browse type, with the collection version they were built from.
+_search_indices = {}
+
+# Indices of the items matching the search by library widget, with the collection version. None if unfiltered.
+_search_results = {}
+
+# Signatures of the data loaded into widgets, by collection and widget key.
+_widget_signatures = {}
+
+# Change counters of widget collections, see touch_collection.
+_collection_versions = {}
+
+
+def touch_collection(collection: bpy.types.bpy_prop_collection):
+    '''Mark the items of a widget collection as changed, searches over it are run again.'''
+    key = repr(collection)
+    _collection_versions[key] = _collection_versions.get(key, 0) + 1
+
+
+def collection_version(collection: bpy.types.bpy_prop_collection) -> tuple:
+    return (repr(collection), _collection_versions.get(repr(collection), 0))
+
+
+def clear_collection(collection: bpy.types.bpy_prop_collection):
+    '''Remove all widgets of a collection filled outside sync_collection, with their signatures.'''
+    collection.clear()
+    _widget_signatures.pop(repr(collection), None)
+    touch_collection(collection)
+
+
+def _data_signature(data: dict) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _unique_keys(keys) -> list:
+    '''Number repeated keys, so entries sharing an id still pair up in order.'''
+    seen = {}
+    unique = []
+    for key in keys:
+        seen[key] = seen.get(key, -1) + 1
+        unique.append((key, seen[key]))
+    return unique
+
+
+def sync_collection(collection: bpy.types.bpy_prop_collection, items: list, data_key, widget_key, load) -> int:
+    '''Make a widget collection match a list of data, in order.
+
+    Widgets are paired with data by key. Widgets without data are removed,
+    new data gets a widget, and only widgets whose data changed are loaded
+    again. Unchanged widgets keep their previews and UI state.
+
+    Args:
+        collection: The widget collection
+        items: Data dicts in the wanted order
+        data_key: Gets the id of a data dict
+        widget_key: Gets the id of a widget
+        load: Fills a widget from a data dict
+
+    Returns:
+        The number of loaded widgets.
+    '''
+    signatures = _widget_signatures.setdefault(repr(collection), {})
+    wanted = _unique_keys(data_key(data) for data in items)
+    wanted_set = set(wanted)
+
+    keys = _unique_keys(widget_key(widget) for widget in collection)
+    changed = False
+    for index in reversed(range(len(keys))):
+        if keys[index] not in wanted_set:
+            collection.remove(index)
+            signatures.pop(keys.pop(index), None)
+            changed = True
+
+    loaded = 0
+    positions = set(keys)
+    for position, (key, data) in enumerate(zip(wanted, items)):
+        if key in positions:
+            if keys[position] != key:
+                index = keys.index(key, position)
+                collection.move(index, position)
+                keys.insert(position, keys.pop(index))
+                changed = True
+            widget = collection[position]
+            is_new = False
+        else:
+            widget = collection.add()
+            collection.move(len(collection) - 1, position)
+            keys.insert(position, key)
+            positions.add(key)
+            is_new = True
+
+        signature = _data_signature(data)
+        if is_new or signatures.get(key) != signature:
+            load(widget, data)
+            signatures[key] = signature
+            loaded += 1
+
+    # Collections may also be cleared elsewhere, forget what is gone
+    for key in set(signatures) - wanted_set:
+        del signatures[key]
+
+    if changed or loaded:
+        touch_collection(collection)
+    return loaded
+
 
 def get_environment_items(self, context):
     return environment_items
@@ -98,29 +205,40 @@ class LibraryWidget(BaseWidget):
             if env.name == name:
                 return env
 
-    def update_search(self, context: Context):
-        queries = self.search.lower().split()
+    def browse_collection(self) -> bpy.types.bpy_prop_collection:
+        return (self.assets if self.browse_type == "ASSETS" else
+                self.environments if self.browse_type == "ENVIRONMENTS" else self.free_assets)
 
-        def filter_asset(asset: AssetWidget) -> bool:
-            name = asset.name.lower()
+    def search_index(self) -> SearchIndex:
+        collection = self.browse_collection()
+        key = (self.as_pointer(), self.browse_type)
+        version = collection_version(collection)
+        built = _search_indices.get(key)
 
-            if queries and any(query not in name for query in queries):
-                return False
+        # Rebuilt whenever the items changed, see touch_collection
+        if built is None or built[0] != version:
+            built = _search_indices[key] = (version, SearchIndex([item.name for item in collection],
+                                                                 [item.tags.keys() for item in collection]))
+        return built[1]
 
-            tags = [tag.name for tag in self.tags if tag.select]
+    def search_tags(self) -> list:
+        return [tag.name for tag in self.tags if tag.select]
 
-            if tags and all(tag not in asset.tags for tag in tags):
-                return False
+    def clear_search_index(self):
+        pointer = self.as_pointer()
+        for key in [key for key in _search_indices if key[0] == pointer]:
+            del _search_indices[key]
+        _search_results.pop(pointer, None)
 
-            return True
+    def update_search(self, context: Context):
+        tags = self.search_tags()
 
-        result = list(
-            filter(
-                filter_asset,
-                self.assets if self.browse_type == "ASSETS" else
-                self.environments if self.browse_type == "ENVIRONMENTS" else self.free_assets,
-            ))
-        self.result = repr(result)
+        if not self.search.split() and not tags:
+            _search_results.pop(self.as_pointer(), None)
+            return
+
+        result = self.search_index().query(self.search, tags)
+        _search_results[self.as_pointer()] = (collection_version(self.browse_collection()), result)
 
         if result:
             number_of_pages = self.number_of_pages()
@@ -128,7 +246,6 @@ class LibraryWidget(BaseWidget):
                 self.page = number_of_pages
 
     search: StringProperty(name="Search", update=update_search, options={"TEXTEDIT_UPDATE"})
-    result: StringProperty(name="Result")
 
     def update_browse_type(self, context):
         self.search = self.search
@@ -144,11 +261,17 @@ class LibraryWidget(BaseWidget):
     )
 
     def filtered_assets(self) -> list[AssetWidget]:
-        if self.result:
-            return eval(self.result)
-        else:
-            return (self.assets.values() if self.browse_type == "ASSETS" else
-                    self.environments.values() if self.browse_type == "ENVIRONMENTS" else self.free_assets.values())
+        collection = self.browse_collection()
+        result = _search_results.get(self.as_pointer())
+        if result is None:
+            return collection.values()
+
+        version, indices = result
+        if version != collection_version(collection):
+            # Items were synced or added since the search ran
+            indices = self.search_index().query(self.search, self.search_tags())
+            _search_results[self.as_pointer()] = (collection_version(collection), indices)
+        return [collection[index] for index in indices if index < len(collection)]
 
     def visible_assets(self) -> list[AssetWidget]:
         assets = self.filtered_assets()
@@ -235,38 +358,58 @@ class LibraryWidget(BaseWidget):
         self.property_unset("page")
 
         self["search"] = ""
-        self["result"] = ""
+        self.clear_search_index()
 
-        self.products.clear()
-        for product_data in data.get("products", []):
-            product = self.products.add()
+        def load_product(product: ProductWidget, product_data: dict):
+            product.authors.clear()
+            product.assets.clear()
             product.load(product_data)
 
-        self.assets.clear()
-        for asset_data in data.get("assets", []):
-            asset = self.assets.add()
-            asset.load(asset_data)
+        def load_tag(tag: TagWidget, tag_data: dict):
+            tag.name = tag_data["name"]
 
-        self.tags.clear()
-        for name in data.get("tags", []):
-            tag = self.tags.add()
-            tag.name = name
-
-        self.environments.clear()
-        for environment_data in data.get("environments", []):
-            environment = self.environments.add()
-            environment.load(environment_data)
-
-        self.configurators.clear()
-        for name, module in modules.items():
-            configurator = self.configurators.add()
-            configurator.load({"name": name, "properties": module.properties})
+        sync_collection(
+            self.products,
+            data.get("products", []),
+            lambda product_data: product_data['product_id'],
+            lambda product: product.id,
+            load_product,
+        )
+        loaded = sync_collection(
+            self.assets,
+            data.get("assets", []),
+            lambda asset_data: (asset_data.get('asset_id', ''), asset_data.get('name', '')),
+            lambda asset: (asset.asset_id, asset.name),
+            AssetWidget.load,
+        )
+        sync_collection(
+            self.tags,
+            [{"name": name} for name in data.get("tags", [])],
+            lambda tag_data: tag_data["name"],
+            lambda tag: tag.name,
+            load_tag,
+        )
+        sync_collection(
+            self.environments,
+            data.get("environments", []),
+            lambda environment_data: environment_data.get('asset_id', ''),
+            lambda environment: environment.asset_id,
+            EnvironmentWidget.load,
+        )
+        sync_collection(
+            self.configurators,
+            [{"name": name, "properties": module.properties} for name, module in modules.items()],
+            lambda configurator_data: configurator_data["name"],
+            lambda configurator: configurator.name,
+            LibraryConfiguratorWidget.load,
+        )
+        debug(f"GScatter: Loaded {loaded} of {len(self.assets)} library assets")
 
         global environment_items
         environment_items = enumerate_environments(self, bpy.context)
 
         if get_free_asset and get_allow_networking():
-            self.free_assets.clear()
+            clear_collection(self.free_assets)
             utils.clear_free_assets_entries()
             self.loading_free_assets = True
 
@@ -282,6 +425,7 @@ class LibraryWidget(BaseWidget):
 
                     except Exception as e:
                         error(e, "Couldn't load", debug=True)
+                touch_collection(self.free_assets)
 
             def on_done():
                 self.loading_free_assets = False
@@ -298,7 +442,6 @@ class LibraryWidget(BaseWidget):
 
             get_free_assets_list(get_assets, on_done)
         else:
-            self.free_assets.clear()
             user_library = get_asset_browser_dir()
             asset_list_path = user_library.joinpath("free_assets.json")
             free_assets_list = {}
@@ -306,13 +449,21 @@ class LibraryWidget(BaseWidget):
                 f = open(asset_list_path, "r")
                 free_assets_list = json.load(f)
                 f.close()
-            for asset_data in free_assets_list.get("assets", []):
+
+            def load_free_asset(free_asset: FreeAssetWidget, asset_data: dict):
                 try:
-                    free_asset = self.free_assets.add()
                     free_asset.load(asset_data, False)
                 except Exception:
                     ...
 
+            sync_collection(
+                self.free_assets,
+                free_assets_list.get("assets", []),
+                lambda asset_data: asset_data.get("asset_id", ""),
+                lambda free_asset: free_asset.asset_id,
+                load_free_asset,
+            )
+
     def draw(self, layout: UILayout, split_factor: float):
         selected = self.selected_assets()
 
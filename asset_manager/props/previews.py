@@ -20,12 +20,12 @@ class PreviewsWidget(BaseWidget):
             detail.name = path
 
     def draw_gallery(self, layout: UILayout):
-        icon_id = previews.get(self.gallery).icon_id
+        icon_id = previews.get_thumbnail(self.gallery, "gallery")
         layout.template_icon(icon_id, scale=utils.icon_scale_from_res(173))
 
     def draw_details(self, layout: UILayout):
         detail_path = self.details[self.index].name
-        icon_id = previews.get(detail_path).icon_id
+        icon_id = previews.get_thumbnail(detail_path, "detail")
         layout.template_icon(icon_id, scale=utils.icon_scale_from_res(300))
 
     @staticmethod
@@ -33,7 +33,7 @@ class PreviewsWidget(BaseWidget):
         layout.template_icon(0, scale=utils.icon_scale_from_res(173))
 
     def get_gallery_preview(self):
-        icon_id = previews.get(self.gallery).icon_id
+        icon_id = previews.get_thumbnail(self.gallery, "gallery")
         return icon_id
 
 
@@ -0,0 +1,96 @@
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _trigrams(token: str) -> set:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    '''Token, trigram and tag index over the items of a library collection.
+
+    Built once per library load. A query term matches an item if it is a
+    substring of the lowercased item name, like the former linear filter:
+    terms hold no whitespace, so they always lie within one name token.
+    Terms of three or more characters intersect the posting lists of their
+    trigrams and verify the few candidates, shorter terms are looked up in
+    the token vocabulary. Tags are boolean masks over the items.
+    '''
+
+    def __init__(self, names: list, tags: list):
+        self.size = len(names)
+        self.names = [name.lower() for name in names]
+
+        tokens = {}
+        trigrams = {}
+        for index, name in enumerate(self.names):
+            for token in set(name.split()):
+                tokens.setdefault(token, []).append(index)
+                for trigram in _trigrams(token):
+                    trigrams.setdefault(trigram, set()).add(index)
+
+        self.tokens = {token: np.array(items, dtype=np.int32) for token, items in tokens.items()}
+        self.trigrams = {trigram: np.array(sorted(items), dtype=np.int32) for trigram, items in trigrams.items()}
+
+        # Matches of terms too short for trigrams, filled while typing
+        self._short_terms = {}
+
+        self.tag_masks = {}
+        for index, item_tags in enumerate(tags):
+            for tag in item_tags:
+                mask = self.tag_masks.get(tag)
+                if mask is None:
+                    mask = self.tag_masks[tag] = np.zeros(self.size, dtype=bool)
+                mask[index] = True
+
+    def match_term(self, term: str) -> np.ndarray:
+        '''Sorted indices of the items whose name contains term.'''
+        if len(term) < 3:
+            items = self._short_terms.get(term)
+            if items is None:
+                mask = np.zeros(self.size, dtype=bool)
+                for token, token_items in self.tokens.items():
+                    if term in token:
+                        mask[token_items] = True
+                items = self._short_terms[term] = np.flatnonzero(mask).astype(np.int32)
+            return items
+
+        postings = []
+        for trigram in _trigrams(term):
+            items = self.trigrams.get(trigram)
+            if items is None:
+                return _EMPTY
+            postings.append(items)
+
+        # Shortest lists first keeps the intersections small
+        postings.sort(key=len)
+        candidates = postings[0]
+        for items in postings[1:]:
+            candidates = np.intersect1d(candidates, items, assume_unique=True)
+            if not len(candidates):
+                return _EMPTY
+
+        # Trigrams may be present in the wrong order
+        return np.array([index for index in candidates if term in self.names[index]], dtype=np.int32)
+
+    def query(self, text: str, tags: list = ()) -> list:
+        '''Indices of the items matching all terms of text and any of tags, in item order.'''
+        matches = None
+        for term in set(text.lower().split()):
+            items = self.match_term(term)
+            matches = items if matches is None else np.intersect1d(matches, items, assume_unique=True)
+            if not len(matches):
+                return []
+
+        if tags:
+            mask = np.zeros(self.size, dtype=bool)
+            for tag in tags:
+                tag_mask = self.tag_masks.get(tag)
+                if tag_mask is not None:
+                    mask |= tag_mask
+            matches = np.flatnonzero(mask) if matches is None else matches[mask[matches]]
+
+        if matches is None:
+            return list(range(self.size))
+        return matches.tolist()
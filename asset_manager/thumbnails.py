@@ -0,0 +1,184 @@
+'''Fixed size thumbnails of library previews, cached on disk.
+
+Previews are .bip files or images of any size. Their thumbnails are PNG
+files in a cache folder, named after a hash of the source path, the source
+modification time and the thumbnail kind, so a changed source gets new
+thumbnails. Both the asset browser builder and the library UI read them.
+
+Thumbnails are decoded and resized in worker processes running this module
+as a script, which only needs the standard library and the vendored PIL:
+
+    python thumbnails.py tasks.json
+'''
+import hashlib
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from zlib import decompress
+
+if __package__:
+    try:
+        from ..vendor.PIL import Image
+    except ImportError:
+        Image = None
+else:
+    # Worker processes import the vendored PIL as a top level package
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.joinpath("vendor")))
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+# Folder of the thumbnails in the user library, hidden from library scans.
+CACHE_DIR = ".thumbnails"
+
+# Largest width and height of every thumbnail kind.
+SIZES = {
+    "gallery": (256, 256),
+    "detail": (512, 512),
+}
+
+# Thumbnails per worker process, fewer are made in the calling process.
+MIN_TASKS_PER_WORKER = 8
+
+_BIP2_MAGIC = b'BIP2'
+
+
+def preview_source(preview: str) -> str:
+    '''Get the image thumbnails of a preview are made from, a .png next to a .bip is preferred.'''
+    png_preview = preview.replace(".bip", ".png")
+    return png_preview if os.path.exists(png_preview) else preview
+
+
+def thumbnail_path(source, kind: str, cache_dir: Path, mtime_ns: int = None) -> Path:
+    '''Get the cache file of a thumbnail, without checking it exists.'''
+    if mtime_ns is None:
+        mtime_ns = os.stat(source).st_mtime_ns
+    digest = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()
+    return Path(cache_dir, f"{digest}_{mtime_ns}_{kind}.png")
+
+
+def cached(source, kind: str, cache_dir: Path) -> Path:
+    '''Get the cache file of a thumbnail, None if the source or the thumbnail does not exist.'''
+    try:
+        path = thumbnail_path(source, kind, cache_dir)
+    except OSError:
+        return None
+    return path if path.exists() else None
+
+
+def decode(source) -> "Image.Image":
+    '''Decode the largest image of a .bip file, or any image PIL reads, as top down RGBA.'''
+    if Image is None:
+        raise ImportError("PIL is not available")
+
+    with open(source, 'rb') as f:
+        if f.read(4) != _BIP2_MAGIC:
+            f.seek(0)
+            with Image.open(f) as image:
+                return image.convert('RGBA')
+
+        count = int.from_bytes(f.read(1), 'big')
+        assert count > 0, 'the file contains no images'
+        f.seek(8 * (count - 1), io.SEEK_CUR)
+
+        size = [int.from_bytes(f.read(2), 'big') for _ in range(2)]
+        length = int.from_bytes(f.read(4), 'big')
+
+        f.seek(-length, io.SEEK_END)
+        content = decompress(f.read(length))
+
+    # Blender pixels are premultiplied and start at the bottom row
+    image = Image.frombytes('RGBa', size, content)
+    return image.convert('RGBA').transpose(Image.FLIP_TOP_BOTTOM)
+
+
+def render(source, targets: list):
+    '''Decode a source once and write its thumbnails.
+
+    targets are (path, (width, height)) pairs. Files are written under a temporary
+    name and moved in place, older thumbnails of the same source and kind are removed.'''
+    image = decode(source)
+    for path, size in targets:
+        path = Path(path)
+        thumbnail = image.copy()
+        thumbnail.thumbnail(size, Image.LANCZOS)
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        thumbnail.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+
+        digest, _, kind = path.stem.split("_", 2)
+        for stale in path.parent.glob(f"{digest}_*_{kind}.png"):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+
+def _render_all(tasks: list):
+    for source, targets in tasks:
+        try:
+            render(source, targets)
+        except Exception as e:
+            print(f"Gscatter: Failed to make thumbnails of {source}: {str(e)}")
+
+
+def build(sources, cache_dir: Path, kinds=tuple(SIZES), workers: int = None) -> dict:
+    '''Make the missing thumbnails of sources, in parallel worker processes.
+
+    Returns {source: {kind: path}} for every source whose thumbnails exist.'''
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    tasks = []
+    for source in dict.fromkeys(str(source) for source in sources):
+        try:
+            mtime_ns = os.stat(source).st_mtime_ns
+        except OSError:
+            continue
+        paths = {kind: thumbnail_path(source, kind, cache_dir, mtime_ns) for kind in kinds}
+        results[source] = paths
+        missing = [(str(path), SIZES[kind]) for kind, path in paths.items() if not path.exists()]
+        if missing:
+            tasks.append((source, missing))
+
+    workers = min(workers or os.cpu_count() or 1, math.ceil(len(tasks) / MIN_TASKS_PER_WORKER))
+    if workers > 1:
+        processes = []
+        task_files = []
+        try:
+            for i in range(workers):
+                fd, task_file = tempfile.mkstemp(prefix="gscatter_thumbnails_", suffix=".json")
+                with os.fdopen(fd, "w") as f:
+                    json.dump(tasks[i::workers], f)
+                task_files.append(task_file)
+                processes.append(subprocess.Popen([sys.executable, __file__, task_file]))
+        except OSError as e:
+            print(f"Gscatter: Making thumbnails in this process: {str(e)}")
+            for process in processes:
+                process.kill()
+            _render_all(tasks)
+        finally:
+            for process in processes:
+                process.wait()
+            for task_file in task_files:
+                os.remove(task_file)
+    else:
+        _render_all(tasks)
+
+    return {
+        source: {kind: path for kind, path in paths.items() if path.exists()} for source, paths in results.items()
+    }
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "r") as f:
+        _render_all(json.load(f))
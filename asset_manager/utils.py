@@ -1,10 +1,14 @@
+import ast
+import hashlib
 import json
 import math
 import os
+import platform
 import re
-import subprocess
+import sys
+import time
 import zipfile
-from glob import glob
+from concurrent.futures import ThreadPoolExecutor
 from json import loads
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -14,14 +18,36 @@ import bpy
 
 from ..utils.logger import debug
 
-from ..utils.getters import get_asset_browser_dir, get_preferences
-from . import default
+from ..utils.getters import get_asset_browser_dir, get_preferences, get_user_library
+from . import default, thumbnails
+from .build_pool import BUILD_LOGS_DIR, BuildJob, BuildPool
 from .schema import verify_asset, verify_environment
 
 if TYPE_CHECKING:
     from ..common.props import WindowManagerProps
     from .props.library import LibraryWidget
 
+# Script building the asset browser blend file of an asset.
+ASSET_ENTRY_SCRIPT = Path(__file__).parent.joinpath("asset_blend_file_creator.py").resolve()
+
+# Products built by one background Blender, see build_asset_browser_entries.
+ASSET_ENTRY_BATCH_SIZE = 8
+
+# Index of built asset browser blend files, in the asset browser library.
+ASSET_ENTRY_CACHE = "asset_entry_cache.json"
+
+# Seconds after which a lock of an asset entry is considered abandoned.
+ASSET_ENTRY_LOCK_TIMEOUT = 600
+
+# Index of the parsed products of a library, in the library folder.
+LIBRARY_INDEX = "library_index.json"
+
+# Bumped when the records stored in the library index change.
+LIBRARY_INDEX_VERSION = 1
+
+# Threads parsing new and changed products of a library.
+LIBRARY_PARSE_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
 # def system_library() -> Path:
 #     return Path(__file__).resolve().parent.joinpath('library')
 
@@ -32,106 +58,236 @@ def user_library() -> Path:
     return library_path
 
 
-def load_library(get_free_assets=False):
-    '''Load assets for the library.'''
-    all_products = list()
-    all_assets = list()
-    all_environments = list()
-    all_tags = set()
+def _stat_signature(path) -> list:
+    '''Modification time and size of a file, None if it does not exist.'''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
 
-    # library_path_internal = system_library()
-    library_path_external = user_library()
 
-    # product_paths_internal = list(glob(str(library_path_internal.joinpath('**', 'product.json')), recursive=True))
-    product_paths_external = list(glob(str(library_path_external.joinpath('**', 'product.json')), recursive=True))
+def parse_product(product_path: Path) -> dict:
+    '''Parse and validate a product.json and the asset files it lists.
 
-    new_assets = []
+    Returns a record with the product data of an environment, or the parsed
+    assets of a product, and the signatures of all files read. The record
+    is None for invalid products.
+    '''
+    files = {str(product_path): _stat_signature(product_path)}
+    entry = {"files": files, "record": None}
 
-    for product_path in ([] + product_paths_external):
-        product_path = Path(product_path)
+    try:
+        product_data = loads(product_path.read_text())
+    except json.decoder.JSONDecodeError:
+        debug(f"GScatter:  Invalid JSON at {product_path}")
+        return entry
+
+    # Verify product.json schema
+    if not verify_asset(product_data) and not verify_environment(product_data):
+        return entry
+
+    folder_name = product_path.parent.name
+    product_id = product_data.get('product_id')
+    if product_id is None:
+        product_id = product_path.parent.name
+    asset_pattern = re.compile('([a-zA-Z0-9]*_[a-zA-Z0-9]*)')
+    m = asset_pattern.match(product_id)
+
+    is_old = False
+    if m and product_data.get('asset_type') != "environment":
+        folder_name = m.groups()[0]
+    else:
+        is_old = True
 
-        try:
-            product_data = loads(product_path.read_text())
-        except json.decoder.JSONDecodeError:
-            debug(f"GScatter:  Invalid JSON at {product_path}")
-            continue
+    if product_data.get('asset_type') == "environment":
+        icon_path = product_data['preview']
+        icon_path = product_path.parent.joinpath(icon_path)
 
-        # Verify product.json schema
-        if not verify_asset(product_data) and not verify_environment(product_data):
-            continue
+        for index, path in enumerate(product_data['blends']):
+            path = product_path.parent.joinpath(path)
+            product_data['blends'][index] = str(path)
 
-        folder_name = product_path.parent.name
-        # Check if the product is already loaded
-        product_id = product_data.get('product_id')
-        if product_id is None:
-            product_id = product_path.parent.name
-        asset_pattern = re.compile('([a-zA-Z0-9]*_[a-zA-Z0-9]*)')
-        m = asset_pattern.match(product_id)
-
-        is_old = False
-        if m and product_data.get('asset_type') != "environment":
-            folder_name = m.groups()[0]
-            if folder_name in new_assets:
-                continue
-            new_assets.append(product_id)
-        else:
-            is_old = True
+        product_data['previews'] = {"gallery": icon_path.as_posix(), "details": [icon_path.as_posix()]}
 
-        if product_data.get('asset_type') == "environment":
-            icon_path = product_data['preview']
-            icon_path = product_path.parent.joinpath(icon_path)
+        entry["record"] = {"environment": product_data}
+        return entry
 
-            for index, path in enumerate(product_data['blends']):
-                path = product_path.parent.joinpath(path)
-                product_data['blends'][index] = str(path)
+    for author_data in product_data['authors'].values():
+        icon_path = author_data['icon']
+        icon_path = product_path.parent.joinpath(icon_path)
+        author_data['icon'] = str(icon_path)
 
-            product_data['previews'] = {"gallery": icon_path.as_posix(), "details": [icon_path.as_posix()]}
+    product_assets = []
 
-            all_environments.append(product_data)
+    for asset_path in product_data['assets']:
+        asset_path = product_path.parent.joinpath(asset_path)
+
+        # Missing assets are recorded too, the product is parsed again once they appear
+        files[str(asset_path)] = _stat_signature(asset_path)
+        if files[str(asset_path)] is None:
+            debug(f"GScatter:  ASSET_META_NOT_FOUND: {asset_path.as_posix()} ")
             continue
 
-        for author_data in product_data['authors'].values():
-            icon_path = author_data['icon']
-            icon_path = product_path.parent.joinpath(icon_path)
-            author_data['icon'] = str(icon_path)
+        asset_data = loads(asset_path.read_text())
 
-        product_assets = []
+        author_id = asset_data['author']
+        author_data = product_data['authors'][author_id]
+        asset_data['author'] = author_data
 
-        for asset_path in product_data['assets']:
-            asset_path = product_path.parent.joinpath(asset_path)
+        gallery_path = asset_data['previews']['gallery']
+        gallery_path = product_path.parent.joinpath(gallery_path)
+        asset_data['previews']['gallery'] = str(gallery_path)
 
-            if not asset_path.exists():
-                debug(f"GScatter:  ASSET_META_NOT_FOUND: {asset_path.as_posix()} ")
-                continue
+        for index, path in enumerate(asset_data['previews']['details']):
+            path = product_path.parent.joinpath(path)
+            asset_data['previews']['details'][index] = str(path)
 
-            asset_data = loads(asset_path.read_text())
+        for index, path in enumerate(asset_data['blends']):
+            path = product_path.parent.joinpath(path)
+            asset_data['blends'][index] = str(path)
 
-            # Check if asset is old and is already loaded
-            if is_old and asset_data['name'] in [asset_data['name'] for asset_data in all_assets]:
-                continue
+        asset_data['asset_id'] = folder_name
+        asset_data['product_name'] = product_data.get("name", "Unknown")
 
-            author_id = asset_data['author']
-            author_data = product_data['authors'][author_id]
-            asset_data['author'] = author_data
+        product_assets.append(asset_data)
 
-            gallery_path = asset_data['previews']['gallery']
-            gallery_path = product_path.parent.joinpath(gallery_path)
-            asset_data['previews']['gallery'] = str(gallery_path)
+    entry["record"] = {
+        "product_id": product_id,
+        "folder_name": folder_name,
+        "is_old": is_old,
+        "assets": product_assets,
+    }
+    return entry
 
-            for index, path in enumerate(asset_data['previews']['details']):
-                path = product_path.parent.joinpath(path)
-                asset_data['previews']['details'][index] = str(path)
 
-            for index, path in enumerate(asset_data['blends']):
-                path = product_path.parent.joinpath(path)
-                asset_data['blends'][index] = str(path)
+def scan_library(library_path: Path, directories: dict) -> tuple:
+    '''Find the product.json files of a library.
 
-            asset_data['asset_id'] = folder_name
-            asset_data['product_name'] = product_data.get("name", "Unknown")
+    Directories whose modification time did not change since the last scan
+    are not listed again, their subdirectories are taken from the index.
+
+    Returns the sorted product.json paths relative to the library and the
+    updated directory index.
+    '''
+    product_paths = []
+    scanned = {}
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        directory = os.path.join(library_path, relative)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+
+        cached = directories.get(relative)
+        if cached is None or cached["mtime"] != mtime:
+            subdirs = []
+            has_product = False
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Hidden folders are skipped like glob does
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.name == "product.json":
+                        has_product = True
+            cached = {"mtime": mtime, "subdirs": sorted(subdirs), "product": has_product}
+
+        scanned[relative] = cached
+        # Relative paths are joined by hand, pathlib is slow for thousands of folders
+        prefix = f"{relative}/" if relative else ""
+        if cached["product"]:
+            product_paths.append(f"{prefix}product.json")
+        pending.extend(f"{prefix}{name}" for name in cached["subdirs"])
+
+    return sorted(product_paths), scanned
+
+
+def update_library_index(library_path: Path) -> list:
+    '''Refresh the library index and get the parsed product records.
+
+    The index in the library folder keeps the directory tree, the parsed
+    records of every product and the signatures of the files they were
+    parsed from. Only new and changed products are parsed, deleted ones
+    are dropped.
+    '''
+    index_path = library_path.joinpath(LIBRARY_INDEX)
+    try:
+        index = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        index = {}
+    if index.get("version") != LIBRARY_INDEX_VERSION or index.get("root") != str(library_path):
+        index = {"version": LIBRARY_INDEX_VERSION, "root": str(library_path), "directories": {}, "products": {}}
+
+    product_paths, directories = scan_library(library_path, index["directories"])
+    changed = directories != index["directories"] or len(product_paths) != len(index["products"])
+
+    products = {}
+    stale = []
+    for relative in product_paths:
+        entry = index["products"].get(relative)
+        if entry is None or any(_stat_signature(path) != signature for path, signature in entry["files"].items()):
+            stale.append(relative)
+        else:
+            products[relative] = entry
+
+    if stale:
+        # Parsing is mostly file reads, threads overlap them
+        with ThreadPoolExecutor(max_workers=LIBRARY_PARSE_WORKERS) as executor:
+            parsed = executor.map(parse_product, [library_path.joinpath(relative) for relative in stale])
+            products.update(zip(stale, parsed))
+        changed = True
+
+    if changed:
+        index["directories"] = directories
+        index["products"] = products
+        tmp_path = index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(index))
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            debug(f"GScatter: Failed to write the library index: {str(e)}")
+
+    return [products[relative]["record"] for relative in product_paths if products[relative]["record"]]
+
+
+def load_library(get_free_assets=False):
+    '''Load assets for the library.'''
+    all_products = list()
+    all_assets = list()
+    all_environments = list()
+    all_tags = set()
+
+    # library_path_internal = system_library()
+    library_path_external = user_library()
+
+    new_assets = set()
+    asset_names = set()
+
+    # Records are sorted by path, so the merge is the same on every load
+    for record in update_library_index(library_path_external):
+        if "environment" in record:
+            all_environments.append(record["environment"])
+            continue
+
+        # Check if the product is already loaded
+        is_old = record["is_old"]
+        if not is_old:
+            if record["folder_name"] in new_assets:
+                continue
+            new_assets.add(record["product_id"])
+
+        for asset_data in record["assets"]:
+            # Check if asset is old and is already loaded
+            if is_old and asset_data['name'] in asset_names:
+                continue
 
             all_assets.append(asset_data)
-            product_assets.append(asset_data)
-            all_tags.update(set(asset_data['tags']))
+            asset_names.add(asset_data['name'])
+            all_tags.update(asset_data['tags'])
 
     all_products = sorted(all_products, key=lambda data: data['name'])
     all_assets = sorted(all_assets, key=lambda data: data['name'])
@@ -285,27 +441,202 @@ def get_asset_type_from_asset_browser(asset):
             return "FREE_ASSET"
 
 
-def create_asset_browser_entry(context,
-                               name: str,
-                               product_data: dict,
-                               asset_type: str,
-                               asset_dir: Path,
-                               create_object_entry=False,
-                               create_lod_collection_entry=False,
-                               background=True):
-    '''create asset browser blend file'''
-    # prefs = get_preferences()
+def get_data_blend_path(asset_dir: Path, name: str) -> Path:
+    '''Get the blend file holding the data of a downloaded asset.'''
+    data_blend_path = asset_dir.joinpath("data", "data.blend")
+    if data_blend_path.exists():
+        return data_blend_path
 
-    asset_browser_library = get_asset_browser_dir(context)
+    blend_filename = name.lower().replace(" ", "")
+    return asset_dir.joinpath("data", f"{blend_filename}.blend")
 
-    blender_exec = Path(bpy.app.binary_path)
-    script_path = Path(__file__).parent.joinpath("asset_blend_file_creator.py").resolve()
-    script_path = str(script_path)
 
+def get_asset_blend_path(asset_browser_library: Path, name: str, asset_type: str) -> Path:
+    '''Get the asset browser blend file of an asset.'''
     if asset_type == "FREE_ASSET":
-        asset_blend_path = asset_browser_library.joinpath(f"FREE_ASSET-{name}.blend")
-    else:
-        asset_blend_path = asset_browser_library.joinpath(f"{name}.blend")
+        return asset_browser_library.joinpath(f"FREE_ASSET-{name}.blend")
+    return asset_browser_library.joinpath(f"{name}.blend")
+
+
+# Backups Blender writes next to saved blend files, not part of an asset folder's content.
+_BLEND_BACKUP = re.compile(r"\.blend\d+$")
+
+
+def folder_content_hash(folder: Path) -> str:
+    '''Hash the relative paths, sizes and modification times of all files in a folder, except blend backups.'''
+    digest = hashlib.sha1()
+    for path in sorted(path for path in folder.rglob("*") if path.is_file() and not _BLEND_BACKUP.search(path.name)):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(folder).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _lock_owner(lock_path: Path) -> str:
+    try:
+        return lock_path.read_text()
+    except FileNotFoundError:
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    '''Check if a process of this host is running, None where that cannot be told.'''
+    if sys.platform == "win32":
+        import ctypes
+
+        SYNCHRONIZE = 0x00100000
+        WAIT_TIMEOUT = 0x102
+        handle = ctypes.windll.kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+        if not handle:
+            return False
+        try:
+            return ctypes.windll.kernel32.WaitForSingleObject(handle, 0) == WAIT_TIMEOUT
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return None
+    return True
+
+
+def _lock_abandoned(lock_path: Path, owner: str) -> bool:
+    '''Check if the owner of a lock died.
+
+    Owners on this host are checked by pid, however long they build. Owners on
+    other hosts, when the library is on a shared drive, are given up once they
+    held the lock longer than ASSET_ENTRY_LOCK_TIMEOUT.'''
+    host, pid = (owner.split(":") + ["", ""])[:2]
+    if host == platform.node():
+        try:
+            alive = _process_alive(int(pid))
+        except ValueError:
+            alive = None
+        if alive is not None:
+            return not alive
+
+    try:
+        return time.time() - lock_path.stat().st_mtime > ASSET_ENTRY_LOCK_TIMEOUT
+    except FileNotFoundError:
+        return False
+
+
+def _unlock(lock_path: Path, owner: str):
+    '''Remove a lock file only while it is held by owner.
+
+    The lock is moved aside first, so a lock taken over in the meantime is
+    put back instead of being removed.'''
+    moved_path = lock_path.with_name(f"{lock_path.name}.{uuid4().hex}")
+    try:
+        os.rename(lock_path, moved_path)
+    except FileNotFoundError:
+        return
+    if _lock_owner(moved_path) != owner:
+        try:
+            os.link(moved_path, lock_path)
+        except OSError:
+            pass
+    moved_path.unlink()
+
+
+def _lock(lock_path: Path) -> str:
+    '''Create a lock file holding a token of this process, waiting while it is held.
+
+    Returns the token to pass to _unlock.'''
+    owner = f"{platform.node()}:{os.getpid()}:{uuid4().hex}"
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            current = _lock_owner(lock_path)
+            if current is not None and _lock_abandoned(lock_path, current):
+                _unlock(lock_path, current)
+                continue
+            time.sleep(0.1)
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(owner)
+        return owner
+
+
+def get_cached_asset_browser_entry(context,
+                                   name: str,
+                                   product_data: dict,
+                                   asset_type: str,
+                                   asset_dir: Path,
+                                   create_object_entry=False,
+                                   create_lod_collection_entry=False) -> Path:
+    '''Get the asset browser blend file of an asset, only building it when the asset folder changed.
+
+    Built blend files are indexed by the content hash of their asset folder. Every
+    asset folder has its own lock, so concurrent Blender processes build an asset
+    only once while other assets are built in parallel. The index itself is only
+    locked while it is updated.'''
+    asset_browser_library = get_asset_browser_dir(context)
+    cache_path = asset_browser_library.joinpath(ASSET_ENTRY_CACHE)
+    asset_blend_path = get_asset_blend_path(asset_browser_library, name, asset_type)
+
+    key = asset_dir.resolve().as_posix()
+    content_hash = folder_content_hash(asset_dir)
+
+    key_digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    lock_path = asset_browser_library.joinpath(f"{ASSET_ENTRY_CACHE}.{key_digest}.lock")
+    owner = _lock(lock_path)
+    try:
+        cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+        entry = cache.get(key)
+        if entry and entry["hash"] == content_hash and asset_blend_path.exists():
+            return asset_blend_path
+
+        # A stale entry is never rebuilt by create_asset_browser_entry
+        if asset_blend_path.exists():
+            asset_blend_path.unlink()
+
+        create_asset_browser_entry(context,
+                                   name=name,
+                                   product_data=product_data,
+                                   asset_type=asset_type,
+                                   asset_dir=asset_dir,
+                                   create_object_entry=create_object_entry,
+                                   create_lod_collection_entry=create_lod_collection_entry)
+        if not asset_blend_path.exists():
+            return None
+
+        # Vol1 products are converted and saved back into their folder by the build
+        content_hash = folder_content_hash(asset_dir)
+
+        # Entries of other assets may have been added during the build
+        index_lock_path = cache_path.with_name(cache_path.name + ".lock")
+        index_owner = _lock(index_lock_path)
+        try:
+            cache = json.loads(cache_path.read_text()) if cache_path.exists() else {}
+            cache[key] = {"hash": content_hash, "blend": asset_blend_path.as_posix()}
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(cache, indent=2))
+            os.replace(tmp_path, cache_path)
+        finally:
+            _unlock(index_lock_path, index_owner)
+        return asset_blend_path
+    finally:
+        _unlock(lock_path, owner)
+
+
+def prepare_asset_browser_entry(context,
+                                name: str,
+                                product_data: dict,
+                                asset_type: str,
+                                asset_dir: Path,
+                                create_object_entry=False,
+                                create_lod_collection_entry=False):
+    '''Add the catalogs of an asset and get the arguments of the script building its blend file.
+
+    Returns (script_args, asset_blend_path, catalog_id), or None if the blend file exists.
+    Catalogs are written here, so only the script runs in parallel to other builds.'''
+    asset_browser_library = get_asset_browser_dir(context)
+
+    asset_blend_path = get_asset_blend_path(asset_browser_library, name, asset_type)
 
     CATALOG = {"3D_PLANT": "Assets", "ENVIRONMENT": "Environments", "FREE_ASSET": "Free Assets"}
 
@@ -362,26 +693,82 @@ def create_asset_browser_entry(context,
         product_data.get("preview")) if asset_type == "ENVIRONMENT" else product_data.get(
             "preview") if asset_type == "FREE_ASSET" else ""
 
-    data_blend_path = asset_dir.joinpath("data", "data.blend")
-    if data_blend_path.exists():
-        pass
-    else:
-        blend_filename = name.lower().replace(" ", "")
-        data_blend_path = asset_dir.joinpath("data", f"{blend_filename}.blend")
+    data_blend_path = get_data_blend_path(asset_dir, name)
 
-    blender_cmd = [
-        blender_exec, "-b", "-P", script_path, "--", data_blend_path, asset_blend_path, product_data['name'],
+    script_args = [
+        data_blend_path, asset_blend_path, product_data['name'],
         product_id, catalog_id,
         str(variants), asset_type, environment_preview,
         str(create_object_entry),
         str(create_lod_collection_entry)
     ]
-    process = subprocess.call(blender_cmd)
+    return script_args, asset_blend_path, catalog_id
+
+
+def create_asset_browser_entry(context,
+                               name: str,
+                               product_data: dict,
+                               asset_type: str,
+                               asset_dir: Path,
+                               create_object_entry=False,
+                               create_lod_collection_entry=False,
+                               background=True):
+    '''create asset browser blend file'''
+    # prefs = get_preferences()
+
+    entry = prepare_asset_browser_entry(context, name, product_data, asset_type, asset_dir, create_object_entry,
+                                        create_lod_collection_entry)
+    if entry is None:
+        return None
+    script_args, asset_blend_path, catalog_id = entry
+
+    # Imported here, the scripts package imports this module
+    from ..scripts import fork_server
+
+    process = fork_server.call(Path(bpy.app.binary_path), ASSET_ENTRY_SCRIPT, script_args,
+                               get_preferences().use_fork_server)
 
     # process = subprocess.Popen(blender_cmd)
     return process, asset_blend_path, catalog_id
 
 
+def build_asset_browser_entries(entries: list, on_built=None, use_fork_server=True) -> list:
+    '''Build the blend files of entries from prepare_asset_browser_entry in background Blender batches.
+
+    Every job builds its products in one Blender session, the jobs run in a BuildPool.
+    on_built(job, built) is called as every job completes, built counts the products of the completed jobs.
+    Returns the jobs, job.data holds their entries. An entry failed if its blend file does not exist.'''
+    pool = BuildPool(ASSET_ENTRY_SCRIPT, use_fork_server=use_fork_server)
+
+    # The builders load the gallery thumbnails, made here in parallel for all entries
+    sources = []
+    for script_args, _, _ in entries:
+        sources.extend(thumbnails.preview_source(variant["preview"]) for variant in ast.literal_eval(script_args[5]))
+        if script_args[7]:
+            sources.append(str(script_args[7]))
+    thumbnails.build(sources, get_user_library(bpy.context).joinpath(thumbnails.CACHE_DIR), kinds=("gallery",))
+
+    # Enough jobs to keep the pool busy, each with at most ASSET_ENTRY_BATCH_SIZE products
+    count = max(min(pool.size, len(entries)), math.ceil(len(entries) / ASSET_ENTRY_BATCH_SIZE))
+    BUILD_LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    for i in range(count):
+        batch = entries[i::count]
+        batch_path = BUILD_LOGS_DIR.joinpath(f"asset_browser_batch_{i}.json")
+        batch_path.write_text(json.dumps([[str(arg) for arg in script_args] for script_args, _, _ in batch]))
+        jobs.append(BuildJob(f"asset_browser_batch_{i}", ["--batch", batch_path], data=batch))
+
+    built = 0
+
+    def on_done(job: BuildJob, done: int):
+        nonlocal built
+        built += len(job.data)
+        if on_built:
+            on_built(job, built)
+
+    return pool.run(jobs, on_done)
+
+
 def get_catalog_name(id: str):
     asset_browser_library = get_asset_browser_dir()
     catalog_path = asset_browser_library.joinpath("blender_assets.cats.txt")
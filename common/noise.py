@@ -0,0 +1,228 @@
+'''Vectorized gradient noise evaluated over whole coordinate arrays.'''
+
+from functools import lru_cache
+
+import numpy as np
+
+BASES = ('PERLIN', 'SIMPLEX')
+
+_GRADIENTS_X = np.array((1.0, -1.0, 1.0, -1.0, 1.0, -1.0, 0.0, 0.0))
+_GRADIENTS_Y = np.array((1.0, 1.0, -1.0, -1.0, 0.0, 0.0, 1.0, -1.0))
+
+_SKEW = 0.5 * (np.sqrt(3.0) - 1.0)
+_UNSKEW = (3.0 - np.sqrt(3.0)) / 6.0
+
+# Offset between octaves, keeps octaves from lining up at the origin.
+_OCTAVE_OFFSET = 19.19
+
+
+@lru_cache(maxsize=32)
+def permutation(seed: int = None) -> np.ndarray:
+    '''
+    Get the doubled permutation table for a seed.
+
+    Args:
+        seed: Seed of the table, None gives the default table.
+
+    Returns:
+        A read-only array of 512 indices.
+    '''
+    rng = np.random.default_rng(0 if seed is None else seed)
+    table = rng.permutation(256).astype(np.intp)
+    table = np.concatenate((table, table))
+    table.flags.writeable = False
+    return table
+
+
+def _gradient_dot(perm: np.ndarray, hashes: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    index = perm[hashes] & 7
+    return _GRADIENTS_X[index] * x + _GRADIENTS_Y[index] * y
+
+
+def perlin(x, y, seed: int = None) -> np.ndarray:
+    '''
+    2D gradient (Perlin) noise.
+
+    Args:
+        x: Array of x coordinates.
+        y: Array of y coordinates.
+        seed: Seed of the permutation table.
+
+    Returns:
+        Noise values roughly in [-1, 1], shaped like the coordinates.
+    '''
+    perm = permutation(seed)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    xi = x0.astype(np.intp) & 255
+    yi = y0.astype(np.intp) & 255
+
+    # Quintic fade curve
+    u = fx * fx * fx * (fx * (fx * 6.0 - 15.0) + 10.0)
+    v = fy * fy * fy * (fy * (fy * 6.0 - 15.0) + 10.0)
+
+    px0 = perm[xi] + yi
+    px1 = perm[xi + 1] + yi
+
+    n00 = _gradient_dot(perm, px0, fx, fy)
+    n10 = _gradient_dot(perm, px1, fx - 1.0, fy)
+    n01 = _gradient_dot(perm, px0 + 1, fx, fy - 1.0)
+    n11 = _gradient_dot(perm, px1 + 1, fx - 1.0, fy - 1.0)
+
+    nx0 = n00 + u * (n10 - n00)
+    nx1 = n01 + u * (n11 - n01)
+    return nx0 + v * (nx1 - nx0)
+
+
+def simplex(x, y, seed: int = None) -> np.ndarray:
+    '''
+    2D simplex noise.
+
+    Args:
+        x: Array of x coordinates.
+        y: Array of y coordinates.
+        seed: Seed of the permutation table.
+
+    Returns:
+        Noise values roughly in [-1, 1], shaped like the coordinates.
+    '''
+    perm = permutation(seed)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Skew into simplex cell space
+    s = (x + y) * _SKEW
+    i = np.floor(x + s)
+    j = np.floor(y + s)
+    t = (i + j) * _UNSKEW
+    x0 = x - (i - t)
+    y0 = y - (j - t)
+
+    # Pick the triangle of the cell
+    upper = x0 > y0
+    i1 = upper.astype(np.intp)
+    j1 = 1 - i1
+
+    x1 = x0 - i1 + _UNSKEW
+    y1 = y0 - j1 + _UNSKEW
+    x2 = x0 - 1.0 + 2.0 * _UNSKEW
+    y2 = y0 - 1.0 + 2.0 * _UNSKEW
+
+    ii = i.astype(np.intp) & 255
+    jj = j.astype(np.intp) & 255
+
+    total = np.zeros_like(x)
+    for corner_x, corner_y, hashes in (
+        (x0, y0, ii + perm[jj]),
+        (x1, y1, ii + i1 + perm[jj + j1]),
+        (x2, y2, ii + 1 + perm[jj + 1]),
+    ):
+        falloff = 0.5 - corner_x * corner_x - corner_y * corner_y
+        np.maximum(falloff, 0.0, out=falloff)
+        falloff *= falloff
+        falloff *= falloff
+        total += falloff * _gradient_dot(perm, hashes, corner_x, corner_y)
+
+    return total * 70.0
+
+
+def _basis_function(basis: str):
+    if basis == 'PERLIN':
+        return perlin
+    if basis == 'SIMPLEX':
+        return simplex
+    raise ValueError(f"Unknown noise basis {basis}, expected one of {BASES}")
+
+
+def fbm(x,
+        y,
+        octaves: int = 4,
+        lacunarity: float = 2.0,
+        gain: float = 0.5,
+        basis: str = 'PERLIN',
+        seed: int = None) -> np.ndarray:
+    '''
+    Fractal Brownian motion, a sum of noise octaves.
+
+    Args:
+        x: Array of x coordinates.
+        y: Array of y coordinates.
+        octaves: Number of noise layers.
+        lacunarity: Frequency multiplier between octaves.
+        gain: Amplitude multiplier between octaves.
+        basis: The noise of each octave, one of BASES.
+        seed: Seed of the permutation table.
+
+    Returns:
+        Noise values roughly in [-1, 1], shaped like the coordinates.
+    '''
+    function = _basis_function(basis)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    total = np.zeros(np.broadcast(x, y).shape)
+    amplitude = 1.0
+    frequency = 1.0
+    norm = 0.0
+    for octave in range(octaves):
+        offset = octave * _OCTAVE_OFFSET
+        total += amplitude * function(x * frequency + offset, y * frequency + offset, seed)
+        norm += amplitude
+        amplitude *= gain
+        frequency *= lacunarity
+
+    return total / norm if norm else total
+
+
+def ridged(x,
+           y,
+           octaves: int = 4,
+           lacunarity: float = 2.0,
+           gain: float = 0.5,
+           offset: float = 1.0,
+           basis: str = 'PERLIN',
+           seed: int = None) -> np.ndarray:
+    '''
+    Ridged multifractal noise, sharp crests where the basis noise crosses zero.
+
+    Each octave is weighted by the previous one, so detail gathers on ridges.
+
+    Args:
+        x: Array of x coordinates.
+        y: Array of y coordinates.
+        octaves: Number of noise layers.
+        lacunarity: Frequency multiplier between octaves.
+        gain: Amplitude multiplier between octaves.
+        offset: Ridge height, raises the crests.
+        basis: The noise of each octave, one of BASES.
+        seed: Seed of the permutation table.
+
+    Returns:
+        Noise values roughly in [0, 1], shaped like the coordinates.
+    '''
+    function = _basis_function(basis)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    total = np.zeros(np.broadcast(x, y).shape)
+    weight = np.ones_like(total)
+    amplitude = 1.0
+    frequency = 1.0
+    norm = 0.0
+    for octave in range(octaves):
+        shift = octave * _OCTAVE_OFFSET
+        signal = offset - np.abs(function(x * frequency + shift, y * frequency + shift, seed))
+        signal *= signal
+        signal *= weight
+        weight = np.clip(signal, 0.0, 1.0)
+        total += signal * amplitude
+        norm += amplitude * offset * offset
+        amplitude *= gain
+        frequency *= lacunarity
+
+    return total / norm if norm else total
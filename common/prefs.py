@@ -46,6 +46,10 @@ class GScatterPreferences(AddonPreferences):
                                                default=False,
                                                update=create_library)
     enable_developer_mode: BoolProperty(name="Enable Developer Mode", default=False)
+    use_fork_server: BoolProperty(
+        name="Use Fork Server",
+        default=False,
+        description="Run background Blender jobs in forks of one warm Blender process (Linux only, experimental)")
 
     use_proxy_on_new_systems: BoolProperty(
         name="Enable Proxy On New Systems",
@@ -187,6 +191,7 @@ class GScatterPreferences(AddonPreferences):
         col = self.draw_category_box(left_col, title="Advanced Settings", icon="TOOL_SETTINGS")
         col.prop(self, "enable_experimental_features")
         col.prop(self, "enable_developer_mode")
+        col.prop(self, "use_fork_server")
 
         # PRIVACY
         col = self.draw_category_box(left_col, title="Privacy & Data Usage", icon="GHOST_ENABLED")
@@ -2,6 +2,7 @@ import itertools
 from typing import TYPE_CHECKING, Any, List, Tuple, Union
 from uuid import uuid4
 import bpy
+import numpy as np
 from bpy.types import Context
 
 from ...utils.logger import debug, info
@@ -25,6 +26,7 @@ from ..utils.setter import (
     set_params,
 )
 from ...tracking.core import track
+from ...common import noise
 from ... import icons
 # from functools import partial
 # from ..utils.trees import update_subivide_node
@@ -459,6 +461,26 @@ class AddEffectOperator(bpy.types.Operator):
         return {'FINISHED'}
 
 
+def _get_weight_map_group(context: Context, effect_name: str, input_name: str) -> bpy.types.VertexGroup:
+    '''Get the vertex group of a weight map input, creating it if needed.'''
+    scene_props = get_scene_props(context)
+    category: str = scene_props.active_category
+    scatter_surface = get_scatter_surface(context)
+    node_tree = get_node_tree(context)
+    node: bpy.types.GeometryNodeGroup = node_tree.nodes[category]
+    effects: bpy.types.bpy_prop_collection = node.node_tree.gscatter.effects
+    weight_map_effect: 'EffectLayerProps' = effects[effect_name]
+
+    vg_name: str = weight_map_effect.effect_node.inputs[input_name].default_value
+    if vg_name == '' or scatter_surface.vertex_groups.get(vg_name) is None:
+        vg = scatter_surface.vertex_groups.new()
+        vg_name = vg.name
+    vg = scatter_surface.vertex_groups.get(vg_name)
+    scatter_surface.vertex_groups.active = vg
+    weight_map_effect.effect_node.inputs[input_name].default_value = vg.name
+    return vg
+
+
 class PaintWeightMapOperator(bpy.types.Operator):
     bl_idname = "gscatter.paint_weight_map"
     bl_label = "Paint Weight Map"
@@ -468,22 +490,9 @@ class PaintWeightMapOperator(bpy.types.Operator):
 
     def execute(self, context: Context):
         if context.mode == 'OBJECT':
-            scene_props = get_scene_props(context)
-            category: str = scene_props.active_category
             scatter_surface = get_scatter_surface(context)
             scatter_system = get_scatter_system(context)
-            node_tree = get_node_tree(context)
-            node: bpy.types.GeometryNodeGroup = node_tree.nodes[category]
-            effects: bpy.types.bpy_prop_collection = node.node_tree.gscatter.effects
-            weight_map_effect: 'EffectLayerProps' = effects[self.effect_name]
-
-            vg_name: str = weight_map_effect.effect_node.inputs[self.input_name].default_value
-            if vg_name == '' or scatter_surface.vertex_groups.get(vg_name) is None:
-                vg = scatter_surface.vertex_groups.new()
-                vg_name = vg.name
-            vg = scatter_surface.vertex_groups.get(vg_name)
-            scatter_surface.vertex_groups.active = vg
-            weight_map_effect.effect_node.inputs[self.input_name].default_value = vg.name
+            _get_weight_map_group(context, self.effect_name, self.input_name)
 
             scatter_system.hide_set(False)
             scatter_surface.hide_set(False)
@@ -501,6 +510,73 @@ class PaintWeightMapOperator(bpy.types.Operator):
         return {'CANCELLED'}
 
 
+class FillWeightMapNoiseOperator(bpy.types.Operator):
+    bl_idname = "gscatter.fill_weight_map_noise"
+    bl_label = "Fill Weight Map with Noise"
+    bl_description = "Fill the weight map with fractal noise over the scatter surface"
+    bl_options = {"UNDO"}
+
+    # Number of distinct weights, each level is assigned with one call.
+    LEVELS = 256
+
+    effect_name: bpy.props.StringProperty()
+    input_name: bpy.props.StringProperty()
+    noise_type: bpy.props.EnumProperty(
+        name="Type",
+        items=[
+            ("FBM", "fBm", "Smooth fractal noise"),
+            ("RIDGED", "Ridged", "Ridged multifractal noise with sharp crests"),
+        ],
+    )
+    basis: bpy.props.EnumProperty(
+        name="Basis",
+        items=[
+            ("PERLIN", "Perlin", "Gradient noise"),
+            ("SIMPLEX", "Simplex", "Simplex noise"),
+        ],
+    )
+    scale: bpy.props.FloatProperty(name="Scale", default=1.0, min=0.001)
+    octaves: bpy.props.IntProperty(name="Octaves", default=4, min=1, max=12)
+    lacunarity: bpy.props.FloatProperty(name="Lacunarity", default=2.0, min=1.0)
+    gain: bpy.props.FloatProperty(name="Gain", default=0.5, min=0.0, max=1.0)
+    seed: bpy.props.IntProperty(name="Seed", default=0, min=0)
+
+    @classmethod
+    def poll(cls, context: Context):
+        return context.mode in {'OBJECT', 'PAINT_WEIGHT'} and get_scatter_surface(context) is not None
+
+    def invoke(self, context: Context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: Context):
+        scatter_surface = get_scatter_surface(context)
+        vg = _get_weight_map_group(context, self.effect_name, self.input_name)
+
+        mesh: bpy.types.Mesh = scatter_surface.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        co = co.reshape(-1, 3) / self.scale
+
+        if self.noise_type == 'RIDGED':
+            weights = noise.ridged(co[:, 0], co[:, 1], self.octaves, self.lacunarity, self.gain, basis=self.basis,
+                                   seed=self.seed)
+        else:
+            weights = noise.fbm(co[:, 0], co[:, 1], self.octaves, self.lacunarity, self.gain, self.basis,
+                                self.seed) * 0.5 + 0.5
+
+        # Quantize so every weight level is written with a single call
+        levels = np.clip(np.rint(weights * (self.LEVELS - 1)), 0, self.LEVELS - 1).astype(np.intp)
+        order = np.argsort(levels, kind="stable")
+        bounds = np.searchsorted(levels[order], np.arange(self.LEVELS + 1))
+        for level in range(self.LEVELS):
+            indices = order[bounds[level]:bounds[level + 1]]
+            if len(indices):
+                vg.add(indices.tolist(), level / (self.LEVELS - 1), 'REPLACE')
+
+        mesh.update()
+        return {'FINISHED'}
+
+
 def enum_categories(self, context: Context):
     scene_props = get_scene_props(context)
     src_cat: str = scene_props.active_category
@@ -926,6 +1002,7 @@ classes = (
     MakeUniqueEffectOperator,
     AddExistingEffectOperator,
     PaintWeightMapOperator,
+    FillWeightMapNoiseOperator,
     ToggleLayerCollapseOperator,
     AddEffectInputToEffectPropertiesOperator,
     RenameEnvironmentPropertyOperator,
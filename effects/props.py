@@ -12,6 +12,7 @@ from ..utils.getters import get_scene_props, get_wm_props
 from . import default
 from .ops.effect_layers import (
     AddEffectInputToEffectPropertiesOperator,
+    FillWeightMapNoiseOperator,
     MakeUniqueEffectOperator,
     MoveEffectOperator,
     MuteEffectOperator,
@@ -562,6 +563,9 @@ class EffectLayerProps(bpy.types.PropertyGroup):
                                             depress=painting)
                             op.effect_name = self.name
                             op.input_name = input.name
+                            op = r.operator(FillWeightMapNoiseOperator.bl_idname, text="", icon='MOD_NOISE')
+                            op.effect_name = self.name
+                            op.input_name = input.name
                         else:
                             row.prop(input, "default_value", text="")
                     else:
@@ -4,7 +4,7 @@ from uuid import uuid4
 
 import bpy
 
-from ...utils import recursive_exclude
+from ...utils import profiler, recursive_exclude
 
 from ...utils.logger import debug, error
 
@@ -67,6 +67,7 @@ def set_curve_float_points(node, curve_float):
         node.mapping.update()
 
 
+@profiler.stage
 def set_effect_properties(
     effect_datas: list[dict],
     ntree: bpy.types.GeometryNodeTree,
@@ -215,7 +215,18 @@ class CreateEnvironmentOperator(Operator):
                 str(dependency_images),
                 str(dependency_mats),
             ]
-            process = subprocess.Popen(blender_cmd, shell=True)
+            # Imported here, the scripts package imports the asset manager
+            from ..scripts import fork_server
+
+            server = fork_server.get_server(blender_exec) if get_preferences().use_fork_server else None
+            process = None
+            if server is not None:
+                try:
+                    process = server.spawn(script_path, blender_cmd[5:])
+                except (OSError, RuntimeError) as e:
+                    print(f"Gscatter: Fork server failed, launching Blender: {str(e)}")
+            if process is None:
+                process = subprocess.Popen(blender_cmd, shell=True)
 
             while not dest_blend_path.exists():
                 time.sleep(0.5)
@@ -1 +1,4 @@
 NODETREE_VERSION = (2, 5, 0)
+
+# Custom property of a surface naming the coarse object systems distribute on in the viewport.
+VIEWPORT_LOD_PROPERTY = "gscatter_viewport_lod"
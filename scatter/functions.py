@@ -2,11 +2,13 @@ from random import randint, random
 from typing import List, Union
 
 import bpy
+import numpy as np
 
 from .. import effects
 from ..common.props import ScatterItemProps, SceneProps
 from ..effects.utils.setter import set_effect_properties
 from ..utils import get_preferences, main_collection, recursive_exclude
+from ..utils import profiler
 from ..utils.getters import get_scene_props
 from . import default
 from .store import scattersystempresetstore
@@ -51,6 +53,48 @@ def create_viewport_proxy_node_tree() -> bpy.types.GeometryNodeTree:
     return effects.utils.trees.get_effect_nodetree('internal.viewport_proxy')
 
 
+def create_viewport_lod_node_tree(lod: bpy.types.Object) -> bpy.types.GeometryNodeTree:
+    '''Create a node tree passing lod on in the viewport and its input geometry in renders.'''
+    group = bpy.data.node_groups.new(type="GeometryNodeTree", name="viewport_lod")
+
+    if bpy.app.version >= (4, 0, 0):
+        group.interface.new_socket(socket_type="NodeSocketGeometry", name="Geometry", in_out="INPUT")
+        group.interface.new_socket(socket_type="NodeSocketGeometry", name="Geometry", in_out="OUTPUT")
+    else:
+        group.inputs.new("NodeSocketGeometry", "Geometry")
+        group.outputs.new("NodeSocketGeometry", "Geometry")
+
+    input = group.nodes.new("NodeGroupInput")
+    input.location = (0, 0)
+
+    lod_info = group.nodes.new("GeometryNodeObjectInfo")
+    lod_info.inputs["Object"].default_value = lod
+    lod_info.transform_space = "RELATIVE"
+    lod_info.location = (0, -200)
+
+    is_viewport = group.nodes.new("GeometryNodeIsViewport")
+    is_viewport.location = (0, 200)
+
+    switch = group.nodes.new("GeometryNodeSwitch")
+    switch.input_type = "GEOMETRY"
+    switch.location = (300, 0)
+
+    output = group.nodes.new("NodeGroupOutput")
+    output.location = (500, 0)
+
+    # Socket layout of the switch node differs between Blender versions
+    condition = next(s for s in switch.inputs if s.type == "BOOLEAN" and s.enabled)
+    false_input, true_input = [s for s in switch.inputs if s.type == "GEOMETRY" and s.enabled]
+    result = next(s for s in switch.outputs if s.type == "GEOMETRY" and s.enabled)
+
+    group.links.new(is_viewport.outputs[0], condition)
+    group.links.new(input.outputs[0], false_input)
+    group.links.new(lod_info.outputs["Geometry"], true_input)
+    group.links.new(result, output.inputs[0])
+
+    return group
+
+
 def create_point_mask_node_tree() -> bpy.types.GeometryNodeTree:
     group = effects.utils.trees.get_effect_nodetree('internal.distribution_mask')
 
@@ -93,6 +137,7 @@ def create_main_tree(surface, group) -> bpy.types.GeometryNodeTree:
     return main_group
 
 
+@profiler.stage
 def create_scatter_node_trees(surface: bpy.types.Object,
                               scatter_item: ScatterItemProps,
                               is_terrain: bool = False) -> bpy.types.GeometryNodeTree:
@@ -187,7 +232,18 @@ def create_scatter_node_trees(surface: bpy.types.Object,
     input_node = group.nodes.new("NodeGroupInput")
     input_node.location = (0, 0)
 
-    group.links.new(input_node.outputs[0], initial_values.inputs[0])
+    # Surfaces with a coarse level are distributed on that level in the viewport
+    lod = bpy.data.objects.get(surface.get(default.VIEWPORT_LOD_PROPERTY, ""))
+    if lod is not None:
+        viewport_lod: bpy.types.GeometryNodeGroup = group.nodes.new("GeometryNodeGroup")
+        viewport_lod.node_tree = create_viewport_lod_node_tree(lod)
+        viewport_lod.name = "VIEWPORT_LOD"
+        viewport_lod.label = "Viewport LOD"
+        viewport_lod.location = (200, 0)
+        group.links.new(input_node.outputs[0], viewport_lod.inputs[0])
+        group.links.new(viewport_lod.outputs[0], initial_values.inputs[0])
+    else:
+        group.links.new(input_node.outputs[0], initial_values.inputs[0])
     group.links.new(initial_values.outputs[0], distribution.inputs[0])
     group.links.new(initial_values.outputs[0], distribution.inputs[1])
     group.links.new(distribution.outputs[0], camera_culling.inputs[0])
@@ -207,6 +263,7 @@ def create_scatter_node_trees(surface: bpy.types.Object,
     return main_group
 
 
+@profiler.stage
 def create_new_system(name: str, ss: bpy.types.Object, is_terrain: bool = False):
 
     mesh = bpy.data.meshes.new(name)
@@ -318,3 +375,48 @@ def scatter_collection(collection: bpy.types.Collection, preset_id: str):
     bpy.ops.object.select_all(action="DESELECT")
     ss.select_set(True)
     bpy.context.view_layer.objects.active = ss
+
+
+@profiler.stage
+def create_grass_system(emitter: bpy.types.Object,
+                        asset_collection: bpy.types.Collection,
+                        count: int = 1000,
+                        size_base: float = 1.0,
+                        size_random: float = 0.3,
+                        clustering: float = 0.5,
+                        seed: int = None,
+                        preset_id: str = 'system.default') -> ScatterItemProps:
+    '''Scatter a collection on an emitter with roughly count instances.
+
+    The system is created from a preset and its effect inputs are tuned by name,
+    inputs the preset's effects do not have are skipped.'''
+    G: SceneProps = bpy.context.scene.gscatter
+    G.scatter_surface = emitter
+    scatter_collection(asset_collection, preset_id)
+    scatter_item = emitter.gscatter.scatter_items[-1]
+
+    areas = np.empty(len(emitter.data.polygons), dtype=np.float32)
+    emitter.data.polygons.foreach_get("area", areas)
+    area = float(areas.sum()) * abs(emitter.scale.x * emitter.scale.y)
+
+    values = {
+        "DISTRIBUTION": {
+            "Density": count / max(area, 1e-6),
+            "Position Random": 1.0 - clustering,
+            "Seed": seed,
+        },
+        "SCALE": {
+            "Scale": size_base,
+            "Scale Random": size_random,
+        },
+    }
+
+    main_ntree = scatter_item.obj.modifiers["GScatterGeometryNodes"].node_group
+    for main_node, inputs in values.items():
+        ntree = main_ntree.nodes['GScatter'].node_tree.nodes[main_node].node_tree
+        for node in ntree.nodes:
+            for name, value in inputs.items():
+                if value is not None and name in node.inputs:
+                    node.inputs[name].default_value = value
+
+    return scatter_item
@@ -4,6 +4,7 @@ import bpy
 from . import env_setup
 from . import surface
 from . import create_synthetic
+from . import fork_server
 
 
 def register():
@@ -19,4 +20,5 @@ def unregister():
     """
     Called automatically when the add-on is disabled/uninstalled.
     """
-    pass
+    # Do not leave warm Blender processes or their sockets behind
+    fork_server.shutdown()
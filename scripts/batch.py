@@ -0,0 +1,329 @@
+"""Headless batch generation of synthetic lawn datasets.
+
+Run from a shell, outside of Blender:
+
+    python batch.py job.json --blender /path/to/blender
+
+The coordinator serves sample indices on a local queue and launches worker
+Blender processes in background mode. Every worker pulls indices until the
+queue is drained, so throughput scales with the number of workers. This
+module only uses the standard library, it is imported by the workers too.
+
+A job spec is a JSON or YAML file:
+
+    {
+        "samples": 1000,
+        "seed": 0,
+        "output_dir": "dataset",
+        "workers": 8,
+        "asset_folders": ["assets/DactylisGlomerata_bb1ly"],
+        "surface": {"size": [8.0, 12.0], "noise_scale": [0.4, 0.9]},
+        "scatter": {"count": [500, 2000], "size_random": 0.3}
+    }
+
+label_resolution sets the size of the top-down label maps, 0 disables them.
+profile writes per-stage timings of every worker to output_dir/profile.
+views renders that many camera views of every built scene (camera_rig.py),
+views that mostly see empty ground are rejected by min_view_coverage.
+With fork_server set to true, workers on Linux are forked from one Blender
+that has loaded the addon and the assets of the job (fork_server.py). By
+default, or if the server cannot start them, a Blender is launched per
+worker.
+Parameter values are passed as is, except pairs of numbers which are ranges
+(integers if both bounds are integers). Ranges are sampled with the design
+named by sampler: RANDOM (the default, uniform), or SOBOL, HALTON or LHS from
+sampling.py, which cover the ranges with far fewer samples. Relative paths
+are resolved against the spec file.
+"""
+import argparse
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from queue import Empty, Queue
+
+try:
+    from . import fork_server
+except ImportError:
+    import fork_server
+
+WORKER_SCRIPT = Path(__file__).parent.joinpath("batch_worker.py").resolve()
+
+DEFAULTS = {
+    "samples": 1,
+    "seed": 0,
+    "workers": None,
+    "threads_per_worker": 1,
+    "fork_server": False,
+    "label_resolution": 512,
+    "views": 0,
+    "view_resolution": [640, 480],
+    "camera_height": [1.0, 3.0],
+    "camera_pitch": [25.0, 70.0],
+    "focal_length": 35.0,
+    "min_view_coverage": 0.5,
+    "profile": False,
+    "sampler": "RANDOM",
+    "asset_folders": [],
+    "surface": {},
+    "scatter": {},
+}
+
+# Seconds between liveness checks of the workers while waiting for results.
+POLL_INTERVAL = 1.0
+
+
+class QueueManager(BaseManager):
+    pass
+
+
+def load_spec(path):
+    """Reads a job spec and fills in defaults.
+
+    Args:
+        path (Path): A .json, .yaml or .yml job spec
+
+    Returns:
+        dict: The spec with absolute output_dir and asset_folders
+    """
+    path = Path(path).resolve()
+    with open(path, "r") as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("YAML job specs need PyYAML, use a JSON spec instead")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    spec = dict(DEFAULTS, **data)
+    if "output_dir" not in spec:
+        raise ValueError("Job spec needs an output_dir")
+    if spec["samples"] < 1:
+        raise ValueError("Job spec needs at least one sample")
+    if not spec["asset_folders"]:
+        raise ValueError("Job spec needs at least one asset folder")
+    if spec["sampler"] not in ("RANDOM", "SOBOL", "HALTON", "LHS"):
+        raise ValueError(f"Unknown sampler {spec['sampler']}")
+
+    spec["output_dir"] = str(path.parent.joinpath(spec["output_dir"]))
+    spec["asset_folders"] = [str(path.parent.joinpath(folder)) for folder in spec["asset_folders"]]
+    return spec
+
+
+def is_range(value):
+    """Checks if a parameter value is a (low, high) range."""
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(
+        isinstance(bound, (int, float)) and not isinstance(bound, bool) for bound in value)
+
+
+def sample_value(value, rng):
+    """Draws a value from a parameter range, other values are returned as is."""
+    if is_range(value):
+        low, high = value
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+    return value
+
+
+def sample_parameters(spec, index):
+    """Draws the parameters of one sample.
+
+    The parameters only depend on the job seed and the sample index, so any
+    worker produces the same sample for an index.
+
+    Args:
+        spec (dict): The job spec
+        index (int): Index of the sample
+
+    Returns:
+        dict: Keyword arguments for the surface and the scatter system, and
+            the asset folder of the sample
+    """
+    rng = random.Random(f"{spec['seed']}:{index}")
+    params = {"index": index}
+    for stage in ("surface", "scatter"):
+        params[stage] = {name: sample_value(value, rng) for name, value in sorted(spec[stage].items())}
+
+    if spec["sampler"] != "RANDOM":
+        # Needs numpy, which the workers have but the coordinator may not
+        from . import sampling
+
+        ranges = {
+            (stage, name): value
+            for stage in ("surface", "scatter")
+            for name, value in sorted(spec[stage].items())
+            if is_range(value)
+        }
+        if ranges:
+            values = sampling.sample(ranges, index, 1, spec["sampler"], spec["seed"], spec["samples"])
+            for (stage, name), value in values.items():
+                params[stage][name] = value[0].item()
+    params["surface"].setdefault("seed", rng.randrange(2**31))
+    params["scatter"].setdefault("seed", rng.randrange(2**31))
+    params["asset_folder"] = rng.choice(spec["asset_folders"])
+    return params
+
+
+def sample_path(output_dir, index, suffix):
+    """Gets the path of a sample output file."""
+    return Path(output_dir).joinpath(f"sample_{index:06d}{suffix}")
+
+
+def write_marker(output_dir, index, params):
+    """Writes the parameters of a finished sample, marking it as done."""
+    path = sample_path(output_dir, index, ".json")
+    # Shard workers whose lease was taken over may write the same sample at once
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(params, indent=2))
+    os.replace(tmp_path, path)
+
+
+def pending_indices(spec):
+    """Gets the indices of samples without a completion marker."""
+    return [
+        index for index in range(spec["samples"])
+        if not sample_path(spec["output_dir"], index, ".json").exists()
+    ]
+
+
+def connect(address, authkey):
+    """Connects a worker to the queues of the coordinator.
+
+    Returns:
+        tuple[Queue, Queue]: The task queue of sample indices and the
+            result queue of (index, error) tuples
+    """
+    QueueManager.register("get_tasks")
+    QueueManager.register("get_results")
+    manager = QueueManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.get_tasks(), manager.get_results()
+
+
+def _serve(tasks, results, authkey):
+    QueueManager.register("get_tasks", callable=lambda: tasks)
+    QueueManager.register("get_results", callable=lambda: results)
+    server = QueueManager(address=("127.0.0.1", 0), authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.address
+
+
+def run(spec_path, blender, workers=None):
+    """Generates all pending samples of a job.
+
+    Samples with a completion marker are skipped, so an interrupted job
+    resumes where it stopped.
+
+    Args:
+        spec_path (Path): The job spec
+        blender (str): The Blender executable
+        workers (int): Number of worker processes, overrides the spec and
+            defaults to the CPU count
+
+    Returns:
+        list[int]: Indices of the samples that failed
+    """
+    spec = load_spec(spec_path)
+    output_dir = Path(spec["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Workers read the resolved spec so relative paths stay valid
+    job_path = output_dir.joinpath("job.json")
+    job_path.write_text(json.dumps(spec, indent=2))
+
+    indices = pending_indices(spec)
+    if not indices:
+        return []
+
+    workers = min(workers or spec["workers"] or os.cpu_count(), len(indices))
+
+    tasks = Queue()
+    results = Queue()
+    for index in indices:
+        tasks.put(index)
+    for _ in range(workers):
+        tasks.put(None)
+
+    authkey = secrets.token_bytes(16)
+    host, port = _serve(tasks, results, authkey)
+
+    # One thread per worker keeps the workers from oversubscribing the cores
+    threads = str(spec["threads_per_worker"])
+    env = dict(os.environ, OMP_NUM_THREADS=threads)
+    worker_args = [str(job_path), host, str(port), authkey.hex()]
+
+    server = None
+    processes = []
+    if spec["fork_server"] and fork_server.available():
+        try:
+            # The server loads the addon and the job assets once for all workers
+            server = fork_server.ForkServer(blender, job_path, threads, env)
+            for worker_id in range(workers):
+                processes.append(server.spawn(WORKER_SCRIPT, worker_args + [str(worker_id)]))
+        except (OSError, RuntimeError) as e:
+            print(f"Fork server failed, launching Blender per worker: {str(e)}")
+
+    # Workers the fork server did not start
+    processes += [
+        subprocess.Popen(
+            [blender, "-b", "-noaudio", "-t", threads, "-P", str(WORKER_SCRIPT), "--"] + worker_args + [str(worker_id)],
+            env=env,
+        ) for worker_id in range(len(processes), workers)
+    ]
+
+    failed = []
+    done = 0
+    start = time.perf_counter()
+    try:
+        while done < len(indices):
+            try:
+                index, error = results.get(timeout=POLL_INTERVAL)
+            except Empty:
+                if all(process.poll() is not None for process in processes):
+                    break
+                continue
+
+            done += 1
+            if error:
+                failed.append(index)
+                print(f"Sample {index} failed:\n{error}")
+            rate = done / (time.perf_counter() - start)
+            print(f"{done}/{len(indices)} samples, {rate:.2f} samples/s")
+
+        for process in processes:
+            process.wait()
+    finally:
+        if server is not None:
+            server.close()
+
+    # Samples of crashed workers never report back
+    failed.extend(index for index in pending_indices(spec) if index not in failed)
+    return sorted(failed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic lawn dataset with headless Blender workers.")
+    parser.add_argument("spec", help="JSON or YAML job spec")
+    parser.add_argument("--blender", default="blender", help="Blender executable")
+    parser.add_argument("--workers", type=int, default=None, help="Number of Blender worker processes")
+    args = parser.parse_args(argv)
+
+    failed = run(args.spec, args.blender, args.workers)
+    if failed:
+        print(f"{len(failed)} samples failed: {failed}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import bpy
+import sys
+import traceback
+from pathlib import Path
+
+addon_name = 'gscatter'
+
+try:
+    # Children of the fork server start with the addon enabled
+    if addon_name not in bpy.context.preferences.addons:
+        success = bpy.ops.preferences.addon_enable(module=addon_name)
+    from gscatter.scripts import batch, create_synthetic, ground_truth
+    from gscatter.utils import profiler
+except ImportError:
+    print(addon_name, "is not found")
+    sys.exit(1)
+
+# read command line arguments
+args = sys.argv[sys.argv.index("--") + 1:]
+
+job_path = args[0]
+address = (args[1], int(args[2]))
+authkey = bytes.fromhex(args[3])
+worker_id = args[4]
+
+spec = batch.load_spec(job_path)
+tasks, results = batch.connect(address, authkey)
+
+if spec["profile"]:
+    profiler.enable()
+
+# Build the warm baseline once, samples only reset what they add to it. Does
+# nothing in children of a fork server that was warmed up with this job.
+create_synthetic.warm_up(spec)
+
+# Instance arrays are written while the next sample is built
+writer = ground_truth.GroundTruthWriter()
+
+
+def finish(index):
+    return lambda: results.put((index, None))
+
+
+while True:
+    index = tasks.get()
+    if index is None:
+        break
+
+    try:
+        create_synthetic.export_batch_sample(spec, index, writer, finish(index))
+    except Exception:
+        results.put((index, traceback.format_exc()))
+
+writer.close()
+
+if spec["profile"]:
+    profiler.write(Path(spec["output_dir"]).joinpath("profile", f"worker_{worker_id}"))
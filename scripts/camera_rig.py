@@ -0,0 +1,290 @@
+import bpy
+from pathlib import Path
+
+import numpy as np
+
+from . import labels
+from ..utils import profiler
+
+# Blender's default sensor width in millimetres, fitted to the longer image side.
+SENSOR_WIDTH = 36.0
+
+# Cells per side of the grid over the image used to measure view coverage.
+COVERAGE_GRID = 16
+
+# Instances projected into every candidate view when checking its coverage.
+MAX_CHECK_POINTS = 20000
+
+# Candidate poses drawn per accepted view and round, and rounds before giving up.
+OVERSAMPLE = 4
+MAX_ROUNDS = 8
+
+
+def intrinsics(focal_length, resolution):
+    """Gets the (3, 3) pixel intrinsics of a camera with an automatic sensor fit."""
+    width, height = resolution
+    focal = focal_length * max(width, height) / SENSOR_WIDTH
+    return np.array([
+        [focal, 0.0, width * 0.5],
+        [0.0, focal, height * 0.5],
+        [0.0, 0.0, 1.0],
+    ])
+
+
+def look_at(eyes, targets):
+    """Builds camera to world matrices looking from eyes at targets.
+
+    Args:
+        eyes (numpy.ndarray): (C, 3) camera positions
+        targets (numpy.ndarray): (C, 3) points in the image centre
+
+    Returns:
+        numpy.ndarray: (C, 4, 4) matrices, the camera looks down its -Z axis
+            with +Y up like Blender cameras
+    """
+    forward = targets - eyes
+    forward /= np.linalg.norm(forward, axis=1, keepdims=True)
+    right = np.cross(forward, (0.0, 0.0, 1.0))
+    right /= np.linalg.norm(right, axis=1, keepdims=True)
+    up = np.cross(right, forward)
+
+    matrices = np.zeros((len(eyes), 4, 4))
+    matrices[:, :3, 0] = right
+    matrices[:, :3, 1] = up
+    matrices[:, :3, 2] = -forward
+    matrices[:, :3, 3] = eyes
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def project(points, matrices, camera_intrinsics, resolution):
+    """Projects world points into camera views.
+
+    Args:
+        points (numpy.ndarray): (N, 3) world positions
+        matrices (numpy.ndarray): (C, 4, 4) camera to world matrices
+        camera_intrinsics (numpy.ndarray): (3, 3) pixel intrinsics
+        resolution (tuple[int, int]): Image width and height
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: (C, N, 2) pixel
+            coordinates (row 0 is the top), (C, N) depths along the view
+            direction and (C, N) bool masks of points inside the image
+    """
+    rotations = matrices[:, :3, :3]
+    offsets = points[None, :, :] - matrices[:, None, :3, 3]
+    local = np.einsum("cnk,ckj->cnj", offsets, rotations)
+    depths = -local[:, :, 2]
+
+    safe_depths = np.where(depths > 1e-6, depths, 1.0)
+    pixels = np.empty(local.shape[:2] + (2,))
+    pixels[:, :, 0] = camera_intrinsics[0, 2] + camera_intrinsics[0, 0] * local[:, :, 0] / safe_depths
+    pixels[:, :, 1] = camera_intrinsics[1, 2] - camera_intrinsics[1, 1] * local[:, :, 1] / safe_depths
+
+    width, height = resolution
+    visible = ((depths > 1e-6) & (pixels[:, :, 0] >= 0.0) & (pixels[:, :, 0] < width)
+               & (pixels[:, :, 1] >= 0.0) & (pixels[:, :, 1] < height))
+    return pixels, depths, visible
+
+
+def view_coverage(points, matrices, camera_intrinsics, resolution, grid=COVERAGE_GRID):
+    """Measures how much of each view is covered by instances.
+
+    The image is split into grid x grid cells, the coverage of a view is the
+    fraction of cells holding at least one projected instance.
+
+    Returns:
+        numpy.ndarray: (C,) coverage of every view, in [0, 1]
+    """
+    count = len(matrices)
+    if len(points) == 0:
+        return np.zeros(count)
+
+    pixels, _, visible = project(points, matrices, camera_intrinsics, resolution)
+    width, height = resolution
+    columns = np.minimum((pixels[:, :, 0] * grid / width).astype(np.int64), grid - 1)
+    rows = np.minimum((pixels[:, :, 1] * grid / height).astype(np.int64), grid - 1)
+
+    views = np.broadcast_to(np.arange(count)[:, None], visible.shape)
+    cells = (views * grid + rows) * grid + columns
+    occupied = np.zeros(count * grid * grid, dtype=bool)
+    occupied[cells[visible]] = True
+    return occupied.reshape(count, grid * grid).mean(axis=1)
+
+
+def sample_poses(positions,
+                 bounds,
+                 count,
+                 seed=0,
+                 height=(1.0, 3.0),
+                 pitch=(25.0, 70.0),
+                 focal_length=35.0,
+                 resolution=(640, 480),
+                 min_coverage=0.5,
+                 ground_height=0.0):
+    """Samples camera poses over a surface that see enough instances.
+
+    Candidates look at random points inside the bounds from a random
+    direction, height and pitch. Candidates whose image is mostly empty
+    ground (see view_coverage) are rejected, all candidates of a round are
+    checked at once.
+
+    Args:
+        positions (numpy.ndarray): (N, 3) instance world positions
+        bounds (tuple[float, float, float, float]): (min_x, min_y, max_x,
+            max_y) the targets are drawn from
+        count (int): Number of poses
+        seed (int): Seed of the poses
+        height (tuple[float, float]): Camera height range above the ground
+        pitch (tuple[float, float]): Range of angles below the horizon in
+            degrees
+        focal_length (float): Focal length in millimetres
+        resolution (tuple[int, int]): Image width and height
+        min_coverage (float): Smallest accepted view coverage
+        ground_height (float): World Z of the ground
+
+    Returns:
+        numpy.ndarray: (M, 4, 4) camera to world matrices, M < count if too
+            few candidates passed within MAX_ROUNDS rounds
+    """
+    rng = np.random.default_rng(seed)
+    if len(positions) > MAX_CHECK_POINTS:
+        positions = positions[rng.choice(len(positions), MAX_CHECK_POINTS, replace=False)]
+    positions = np.asarray(positions, dtype=np.float64)
+    camera_intrinsics = intrinsics(focal_length, resolution)
+
+    min_x, min_y, max_x, max_y = bounds
+    accepted = []
+    for _ in range(MAX_ROUNDS):
+        candidates = max(1, (count - len(accepted)) * OVERSAMPLE)
+        targets = np.column_stack((
+            rng.uniform(min_x, max_x, candidates),
+            rng.uniform(min_y, max_y, candidates),
+            np.full(candidates, ground_height),
+        ))
+        yaw = rng.uniform(0.0, 2.0 * np.pi, candidates)
+        angle = np.radians(rng.uniform(pitch[0], pitch[1], candidates))
+        above = rng.uniform(height[0], height[1], candidates)
+
+        distance = above / np.tan(angle)
+        eyes = targets + np.column_stack((-np.cos(yaw) * distance, -np.sin(yaw) * distance, above))
+        matrices = look_at(eyes, targets)
+
+        coverage = view_coverage(positions, matrices, camera_intrinsics, resolution)
+        accepted.extend(matrices[coverage >= min_coverage])
+        if len(accepted) >= count:
+            break
+
+    return np.array(accepted[:count]).reshape(-1, 4, 4)
+
+
+def view_labels(positions, matrices, focal_length, resolution):
+    """Projects every instance into every view.
+
+    Occlusion is not resolved, an instance hidden behind another one is
+    still listed with its depth.
+
+    Returns:
+        dict: "camera_matrices" (K, 4, 4) and "intrinsics" (3, 3), plus the
+            visible instances of all views concatenated: "view_offsets"
+            (K + 1,) start of every view, "instance_ids" (V,) into the
+            instance arrays, "pixels" (V, 2) and "depths" (V,)
+    """
+    camera_intrinsics = intrinsics(focal_length, resolution)
+    instance_ids = []
+    pixels = []
+    depths = []
+    for matrix in matrices:
+        # One view at a time, all instances of a scene may not fit K times
+        view_pixels, view_depths, visible = project(positions, matrix[None], camera_intrinsics, resolution)
+        instance_ids.append(np.flatnonzero(visible[0]).astype(np.int32))
+        pixels.append(view_pixels[0][visible[0]].astype(np.float32))
+        depths.append(view_depths[0][visible[0]].astype(np.float32))
+
+    return {
+        "camera_matrices": np.asarray(matrices, dtype=np.float32).reshape(-1, 4, 4),
+        "intrinsics": camera_intrinsics.astype(np.float32),
+        "view_offsets": np.concatenate(([0], np.cumsum([len(ids) for ids in instance_ids]))).astype(np.int64),
+        "instance_ids": np.concatenate(instance_ids) if instance_ids else np.empty(0, dtype=np.int32),
+        "pixels": np.concatenate(pixels) if pixels else np.empty((0, 2), dtype=np.float32),
+        "depths": np.concatenate(depths) if depths else np.empty(0, dtype=np.float32),
+    }
+
+
+def create_camera(name="GScatterRigCamera", focal_length=35.0, scene=None):
+    """Creates a camera object in a scene and makes it the active camera."""
+    scene = scene or bpy.context.scene
+    camera_data = bpy.data.cameras.new(name)
+    camera_data.lens = focal_length
+    camera_data.sensor_width = SENSOR_WIDTH
+    camera_data.sensor_fit = 'AUTO'
+    camera = bpy.data.objects.new(name, camera_data)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    return camera
+
+
+def render_views(matrices, image_paths, focal_length=35.0, resolution=(640, 480), scene=None):
+    """Renders one built scene from several camera poses.
+
+    The scene is evaluated once, only the camera moves between renders.
+
+    Args:
+        matrices (numpy.ndarray): (K, 4, 4) camera to world matrices
+        image_paths (list[Path]): Output .png image of every view
+        focal_length (float): Focal length in millimetres
+        resolution (tuple[int, int]): Image width and height
+        scene (bpy.types.Scene): Scene to render, defaults to the active one
+
+    Returns:
+        bpy.types.Object: The rig camera
+    """
+    scene = scene or bpy.context.scene
+    camera = create_camera(focal_length=focal_length, scene=scene)
+    scene.render.resolution_x, scene.render.resolution_y = resolution
+    scene.render.resolution_percentage = 100
+    scene.render.image_settings.file_format = 'PNG'
+
+    for matrix, image_path in zip(matrices, image_paths):
+        camera.matrix_world = [list(row) for row in matrix]
+        scene.render.filepath = str(Path(image_path))
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+    return camera
+
+
+@profiler.stage
+def render_rig(surface_obj,
+               arrays,
+               image_path,
+               views=4,
+               seed=0,
+               height=(1.0, 3.0),
+               pitch=(25.0, 70.0),
+               focal_length=35.0,
+               resolution=(640, 480),
+               min_coverage=0.5):
+    """Samples camera poses over a built scene, renders them and labels them.
+
+    Args:
+        surface_obj (bpy.types.Object): The surface the cameras look at
+        arrays (dict): Instance arrays from ground_truth.collect_instances
+        image_path (callable): Gets the image path of a view index
+        views (int): Number of views
+        seed (int): Seed of the poses
+        height, pitch, focal_length, resolution, min_coverage: See
+            sample_poses
+
+    Returns:
+        tuple[list[Path], dict]: The rendered images and their view labels
+    """
+    positions = arrays["positions"]
+    ground_height = float(np.median(positions[:, 2])) if len(positions) else surface_obj.matrix_world.translation.z
+
+    matrices = sample_poses(positions, labels.surface_bounds(surface_obj), views, seed, height, pitch,
+                            focal_length, resolution, min_coverage, ground_height)
+    if len(matrices) < views:
+        print(f"Only {len(matrices)} of {views} camera poses see enough instances")
+
+    image_paths = [Path(image_path(view)) for view in range(len(matrices))]
+    render_views(matrices, image_paths, focal_length, resolution)
+    return image_paths, view_labels(positions, matrices, focal_length, resolution)
@@ -0,0 +1,206 @@
+import bpy
+import json
+from pathlib import Path
+
+# Relative imports from your add-on
+from . import batch, camera_rig, env_setup, ground_truth, labels, surface
+from ..asset_manager.utils import get_cached_asset_browser_entry
+from ..scatter import functions
+from ..utils import profiler
+
+@profiler.stage
+def load_strand_asset(asset_folder, asset_name):
+    folder_path = Path(asset_folder)
+    product_json_path = folder_path / "product.json"
+    if not product_json_path.exists():
+        print(f"Error: product.json not found in {asset_folder}")
+        return None
+
+    with open(product_json_path, "r") as f:
+        product_data = json.load(f)
+
+    # Only builds the asset blend when the product folder changed
+    asset_blend_path = get_cached_asset_browser_entry(
+        bpy.context,
+        name=asset_name,
+        product_data=product_data,
+        asset_type="3D_PLANT",
+        asset_dir=folder_path,
+        create_object_entry=True,
+        create_lod_collection_entry=True,
+    )
+    if asset_blend_path is None:
+        print(f"Error: failed to build the asset blend of {asset_folder}")
+        return None
+
+    with bpy.data.libraries.load(str(asset_blend_path), link=True) as (data_from, data_to):
+        data_to.objects = list(data_from.objects)
+
+    meshes = [obj for obj in data_to.objects if obj is not None and obj.type == "MESH"]
+    if not meshes:
+        return None
+
+    # Prefer the full resolution level of detail
+    return next((obj for obj in meshes if "lod0" in obj.name.lower()), meshes[0])
+
+def scatter_single_strand(emitter_obj, strand_asset, count=1, size_base=1.0, size_random=0.3, clustering=0.5, seed=None):
+    single_strand_collection = bpy.data.collections.new("Single Strand")
+    bpy.context.scene.collection.children.link(single_strand_collection)
+
+    if strand_asset.name not in single_strand_collection.objects:
+        single_strand_collection.objects.link(strand_asset)
+
+    scatter_system = functions.create_grass_system(
+        emitter=emitter_obj,
+        asset_collection=single_strand_collection,
+        count=count,
+        size_base=size_base,
+        size_random=size_random,
+        clustering=clustering,
+        seed=seed,
+    )
+    return scatter_system
+
+# Strand objects already loaded, by asset folder.
+_strand_assets = {}
+
+# Job spec the current reset baseline was built for, see warm_up.
+_warm_spec = None
+
+def get_strand_asset(asset_folder):
+    """Gets the strand object of an asset folder, loading it only once."""
+    asset_folder = Path(asset_folder)
+    key = _strand_assets.get(str(asset_folder))
+    asset_obj = bpy.data.objects.get(key) if key else None
+    if asset_obj is None:
+        asset_obj = load_strand_asset(asset_folder, asset_folder.name.split("_")[0])
+        if asset_obj is not None:
+            # Linked objects are looked up by name and library path
+            library = asset_obj.library.filepath if asset_obj.library else None
+            _strand_assets[str(asset_folder)] = (asset_obj.name, library)
+    return asset_obj
+
+def generate_sample(params, blend_path, reset=False):
+    """Builds one lawn from sampled batch parameters and saves it.
+
+    Args:
+        params (dict): Parameters from batch.sample_parameters
+        blend_path (Path): Where the scene of the sample is saved
+        reset (bool): Only remove the data of the previous sample with
+            env_setup.reset_scene instead of cleaning the whole scene
+
+    Returns:
+        ScatterItemProps: The created scatter system
+    """
+    if reset:
+        env_setup.reset_scene()
+    else:
+        env_setup.clean_scene(verbose=False)
+    lawn_surface = surface.create_grass_surface(**params["surface"])
+
+    strand_asset = get_strand_asset(params["asset_folder"])
+    if strand_asset is None:
+        raise RuntimeError(f"Failed to load the strand asset from {params['asset_folder']}")
+
+    scatter_system = scatter_single_strand(lawn_surface, strand_asset, **params["scatter"])
+    with profiler.section("save_blend"):
+        bpy.ops.wm.save_as_mainfile(filepath=str(blend_path), copy=True)
+    return scatter_system
+
+@profiler.stage
+def export_batch_sample(spec, index, writer, callback=None):
+    """Generates a batch sample and queues its ground truth and labels.
+
+    The .blend and the camera rig views are saved right away, the instance
+    arrays, label maps and view labels are written by the writer thread,
+    which writes the completion marker last.
+
+    Args:
+        spec (dict): The job spec
+        index (int): Index of the sample
+        writer (ground_truth.GroundTruthWriter): Writer of the sample arrays
+        callback (callable): Called once the marker is written
+    """
+    output_dir = spec["output_dir"]
+    params = batch.sample_parameters(spec, index)
+    scatter_system = generate_sample(params, batch.sample_path(output_dir, index, ".blend"), reset=True)
+
+    with profiler.section("evaluate_depsgraph"):
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    arrays = ground_truth.collect_instances(depsgraph)
+    if spec["label_resolution"]:
+        label_maps = labels.rasterize_labels(scatter_system.obj.gscatter.ss, arrays, spec["label_resolution"])
+        writer.submit(batch.sample_path(output_dir, index, "_labels.npz"), label_maps)
+
+    if spec["views"]:
+        # Several views share the cost of building the scene
+        image_paths, view_maps = camera_rig.render_rig(
+            scatter_system.obj.gscatter.ss,
+            arrays,
+            lambda view: batch.sample_path(output_dir, index, f"_view_{view:02d}.png"),
+            views=spec["views"],
+            seed=(spec["seed"], index),
+            height=spec["camera_height"],
+            pitch=spec["camera_pitch"],
+            focal_length=spec["focal_length"],
+            resolution=spec["view_resolution"],
+            min_coverage=spec["min_view_coverage"],
+        )
+        params["views"] = [path.name for path in image_paths]
+        writer.submit(batch.sample_path(output_dir, index, "_views.npz"), view_maps)
+
+    def finish():
+        batch.write_marker(output_dir, index, params)
+        if callback is not None:
+            callback()
+
+    # The writer is first in first out, the marker follows all files
+    writer.submit(batch.sample_path(output_dir, index, ".npz"), arrays, finish)
+
+def build_throwaway_system(strand_asset):
+    """Builds a scatter system on a dummy surface and removes its objects.
+
+    The data all systems share, such as the GScatter collections and the
+    placeholder node groups, is created on first use and stays behind.
+    """
+    dummy_surface = surface.create_grass_surface(size=1.0, subdivisions=1, cache_dir=None, seed=0)
+    scatter_system = scatter_single_strand(dummy_surface, strand_asset)
+
+    sample_data = [dummy_surface, scatter_system.obj, scatter_system.proxy_mat]
+    sample_data += [obj.data for obj in sample_data[:2] if obj.data is not None]
+    sample_data += [col for col in strand_asset.users_collection if col.name.startswith("Single Strand")]
+    bpy.data.batch_remove(sample_data)
+
+def warm_up(spec):
+    """Loads the assets of a job and marks them as the reset baseline.
+
+    A throwaway system is built first, so reset_scene keeps the data shared
+    by all systems and later samples only create their own.
+
+    Does nothing if the scene is already warmed up with the same spec, such
+    as in a child of a fork server.
+    """
+    global _warm_spec
+    if spec == _warm_spec:
+        return
+
+    env_setup.clean_scene(verbose=False)
+    strand_assets = [get_strand_asset(asset_folder) for asset_folder in spec["asset_folders"]]
+    strand_asset = next((asset for asset in strand_assets if asset is not None), None)
+    if strand_asset is not None:
+        build_throwaway_system(strand_asset)
+    env_setup.mark_baseline()
+    _warm_spec = spec
+
+def main():
+    env_setup.clean_scene()
+    lawn_surface = surface.create_grass_surface()
+
+    asset_folder = r"C:\Users\yazan\Workspace\tcv\assets\FieldMeadowPathside_lms82_FadedDandelionMeadow\Faded Dandelion Meadow\Assets\DactylisGlomerata_bb1ly"
+    strand_asset = load_strand_asset(asset_folder, "DactylisGlomerata")
+
+    if strand_asset is None:
+        print("Failed to load the strand asset.")
+    else:
+        scatter_system = scatter_single_strand(lawn_surface, strand_asset)
+        print("Scatter system created:", scatter_system)
@@ -2,6 +2,8 @@ import os
 import sys
 import bpy
 
+from ..utils import profiler
+
 
 def find_project_root():
     """Find the project root directory containing blender_scripts."""
@@ -50,9 +52,15 @@ def setup_environment():
         print(f"Environment setup failed: {str(e)}")
         raise
 
-def clean_scene():
-    """Remove all objects and data from the Blender scene"""
-    print("\nPerforming complete scene cleanup...")
+@profiler.stage
+def clean_scene(verbose=True):
+    """Remove all objects and data from the Blender scene
+
+    Args:
+        verbose (bool): Print every removed item, off on per-sample paths
+    """
+    if verbose:
+        print("\nPerforming complete scene cleanup...")
     
     # Deselect all objects first
     if bpy.context.selected_objects:
@@ -60,12 +68,14 @@ def clean_scene():
     
     # Remove objects directly
     for obj in list(bpy.data.objects):  # Create a list to avoid modification during iteration
-        print(f"Removing object: {obj.name}")
+        if verbose:
+            print(f"Removing object: {obj.name}")
         bpy.data.objects.remove(obj, do_unlink=True)
     
     # Clear all collections
     for collection in list(bpy.data.collections):  # Create a list to avoid modification during iteration
-        print(f"Removing collection: {collection.name}")
+        if verbose:
+            print(f"Removing collection: {collection.name}")
         bpy.data.collections.remove(collection)
     
     # Clear all scene data
@@ -81,7 +91,64 @@ def clean_scene():
     
     for data_container, type_name in data_types:
         for item in list(data_container):  # Create a list to avoid modification during iteration
-            print(f"Removing {type_name}: {item.name}")
+            if verbose:
+                print(f"Removing {type_name}: {item.name}")
             data_container.remove(item)
     
-    print("Complete scene cleanup completed")
+    if verbose:
+        print("Complete scene cleanup completed")
+
+
+# bpy.data collections holding per-sample data-blocks.
+SAMPLE_DATA = (
+    "objects",
+    "collections",
+    "meshes",
+    "materials",
+    "textures",
+    "images",
+    "node_groups",
+    "actions",
+    "particles",
+    "cameras",
+)
+
+# Pointers of the data-blocks that survive reset_scene.
+_baseline = set()
+
+
+def mark_baseline():
+    """Keep everything currently in bpy.data across reset_scene calls.
+
+    Call once the warm state is built: loaded assets and the data shared by
+    all scatter systems, such as the GScatter collections and placeholder
+    node groups, see create_synthetic.warm_up.
+    """
+    _baseline.clear()
+    for attr in SAMPLE_DATA:
+        _baseline.update(id_data.as_pointer() for id_data in getattr(bpy.data, attr))
+
+
+@profiler.stage
+def reset_scene():
+    """Remove the data-blocks created since mark_baseline.
+
+    Only the per-sample surface, scatter systems and their data go, in a
+    single batch_remove call, so the reset takes milliseconds.
+
+    Returns:
+        int: Number of removed data-blocks
+    """
+    if not _baseline:
+        clean_scene(verbose=False)
+        mark_baseline()
+        return 0
+
+    sample_data = [
+        id_data
+        for attr in SAMPLE_DATA
+        for id_data in getattr(bpy.data, attr)
+        if id_data.as_pointer() not in _baseline
+    ]
+    bpy.data.batch_remove(sample_data)
+    return len(sample_data)
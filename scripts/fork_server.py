@@ -0,0 +1,370 @@
+"""Fork server for background Blender jobs.
+
+Every background Blender normally registers the whole addon before running
+its script. A fork server does that once: a warm Blender process enables
+the addon, optionally loads the assets of a batch job, and then forks a
+child per job. The child inherits the loaded state, receives the script and
+its arguments over a Unix socket and runs it like `blender -b -P script --
+args` would, so per-job startup is a fork instead of a Blender launch.
+
+    blender -b -noaudio -P fork_server.py -- /tmp/gscatter.sock [job.json]
+
+Forking needs Linux, available() is False elsewhere and callers fall back to
+launching Blender, as they do when a server dies. The client side only uses
+the standard library, batch.py starts servers from outside of Blender.
+"""
+import atexit
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_SCRIPT = Path(__file__).resolve()
+
+# Seconds to wait for a new server to listen on its socket.
+START_TIMEOUT = 120.0
+
+# Servers of this process by Blender executable, see get_server.
+_servers = {}
+
+
+def available():
+    """Checks if jobs can be forked on this platform."""
+    return sys.platform.startswith("linux") and hasattr(os, "fork")
+
+
+def _read_message(connection, buffer=b""):
+    while b"\n" not in buffer:
+        data = connection.recv(4096)
+        if not data:
+            return None, buffer
+        buffer += data
+    line, buffer = buffer.split(b"\n", 1)
+    return json.loads(line), buffer
+
+
+def _send_message(connection, message):
+    connection.sendall(json.dumps(message).encode() + b"\n")
+
+
+class ForkedProcess:
+    """A job running in a child of a fork server.
+
+    Has the poll, wait and terminate methods of subprocess.Popen, so callers
+    handle forked jobs and launched Blender processes alike.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._buffer = b""
+        self.returncode = None
+
+        message = self._read(None)
+        if message is None:
+            raise RuntimeError("Fork server closed the connection before starting the job")
+        self.pid = message["pid"]
+
+    def _read(self, timeout):
+        self._connection.settimeout(timeout)
+        try:
+            message, self._buffer = _read_message(self._connection, self._buffer)
+        except (socket.timeout, BlockingIOError):
+            return None
+        if message is None:
+            # The child was killed before it could report
+            return {"returncode": -signal.SIGKILL}
+        return message
+
+    def poll(self):
+        if self.returncode is None:
+            message = self._read(0.0)
+            if message is not None:
+                self.returncode = message["returncode"]
+                self._connection.close()
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            message = self._read(timeout)
+            if message is None:
+                raise subprocess.TimeoutExpired(f"fork server job {self.pid}", timeout)
+            self.returncode = message["returncode"]
+            self._connection.close()
+        return self.returncode
+
+    def terminate(self):
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+class ForkServer:
+    """Starts a warm Blender process and runs jobs in forks of it.
+
+    Args:
+        blender (str): The Blender executable
+        job_path (Path): Batch job spec whose assets are loaded before forking
+        threads (int): Blender thread count (-t), 0 for all cores
+        env (dict): Environment of the server process
+    """
+
+    def __init__(self, blender, job_path=None, threads=0, env=None):
+        self._directory = tempfile.mkdtemp(prefix="gscatter_fork_")
+        self.socket_path = os.path.join(self._directory, "server.sock")
+
+        command = [str(blender), "-b", "-noaudio", "-t", str(threads), "-P", str(SERVER_SCRIPT), "--", self.socket_path]
+        if job_path is not None:
+            command.append(str(job_path))
+        self.process = subprocess.Popen(command, env=env)
+
+        start = time.perf_counter()
+        while not os.path.exists(self.socket_path):
+            if self.process.poll() is not None:
+                self._cleanup()
+                raise RuntimeError(f"Fork server exited with code {self.process.returncode}")
+            if time.perf_counter() - start > START_TIMEOUT:
+                self.close()
+                raise RuntimeError("Fork server did not start")
+            time.sleep(0.1)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def spawn(self, script, args=(), cwd=None, env=None, log=None):
+        """Runs a script in a new child of the server.
+
+        Args:
+            script (str): Path of the Python script
+            args (list[str]): Arguments after "--" of the script
+            cwd (str): Working directory of the job
+            env (dict): Environment variables set for the job
+            log (str): File receiving the output of the job, by default it
+                goes to the output of the server
+
+        Returns:
+            ForkedProcess: The running job
+        """
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.socket_path)
+        _send_message(connection, {
+            "script": str(script),
+            "args": [str(arg) for arg in args],
+            "cwd": str(cwd) if cwd is not None else None,
+            "env": env or {},
+            "log": str(log) if log is not None else None,
+        })
+        return ForkedProcess(connection)
+
+    def call(self, script, args=(), cwd=None, env=None):
+        """Runs a script in a new child of the server and waits for it.
+
+        Returns:
+            int: Exit code of the job
+        """
+        return self.spawn(script, args, cwd, env).wait()
+
+    def close(self):
+        """Stops the server, running jobs are not interrupted."""
+        if self.alive():
+            try:
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                connection.connect(self.socket_path)
+                _send_message(connection, {"command": "shutdown"})
+                connection.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self._cleanup()
+
+    def _cleanup(self):
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def get_server(blender):
+    """Gets the shared fork server of a Blender executable.
+
+    The server is started on first use, restarted if it died, and stopped
+    by shutdown when the addon is disabled or this process exits.
+
+    Returns:
+        ForkServer: The server, or None where jobs cannot be forked or the
+            server failed to start
+    """
+    if not available():
+        return None
+
+    blender = str(blender)
+    server = _servers.pop(blender, None)
+    if server is not None:
+        if server.alive():
+            _servers[blender] = server
+            return server
+        # Removes the socket directory of the dead server
+        server.close()
+
+    try:
+        server = ForkServer(blender)
+    except (OSError, RuntimeError) as e:
+        print(f"Gscatter: Fork server unavailable, launching Blender per job: {str(e)}")
+        return None
+
+    atexit.unregister(shutdown)
+    atexit.register(shutdown)
+    _servers[blender] = server
+    return server
+
+
+def call(blender, script, args=(), use_fork_server=True):
+    """Runs a Blender script in the background and waits for it.
+
+    Uses the shared fork server of the executable where possible and
+    launches `blender -b -P script -- args` otherwise, or if the server
+    cannot start the job.
+
+    Returns:
+        int: Exit code of the job
+    """
+    server = get_server(blender) if use_fork_server else None
+    if server is not None:
+        try:
+            return server.call(script, args)
+        except (OSError, RuntimeError) as e:
+            print(f"Gscatter: Fork server failed, launching Blender: {str(e)}")
+    return subprocess.call([str(blender), "-b", "-P", str(script), "--", *[str(arg) for arg in args]])
+
+
+def shutdown():
+    """Stops the shared fork servers and removes their sockets."""
+    atexit.unregister(shutdown)
+    while _servers:
+        _, server = _servers.popitem()
+        server.close()
+
+
+def _run_job(connection, request):
+    import atexit
+    import runpy
+    import traceback
+
+    import bpy
+
+    # Jobs may start and wait for their own subprocesses
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    reported = []
+
+    def report(returncode):
+        if not reported:
+            reported.append(returncode)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            try:
+                _send_message(connection, {"returncode": returncode})
+            except OSError:
+                pass
+
+    # Scripts ending with bpy.ops.wm.quit_blender() exit through Blender
+    atexit.register(report, 0)
+
+    returncode = 1
+    try:
+        _send_message(connection, {"pid": os.getpid()})
+        if request.get("log"):
+            log = os.open(request["log"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(log, sys.stdout.fileno())
+            os.dup2(log, sys.stderr.fileno())
+            os.close(log)
+        os.environ.update(request["env"])
+        if request["cwd"]:
+            os.chdir(request["cwd"])
+        sys.argv = [bpy.app.binary_path, "-b", "-P", request["script"], "--", *request["args"]]
+        runpy.run_path(request["script"], run_name="__main__")
+        returncode = 0
+    except SystemExit as e:
+        returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        report(returncode)
+        os._exit(returncode)
+
+
+def serve(socket_path):
+    """Forks a child per job received on a Unix socket until shutdown.
+
+    Args:
+        socket_path (str): Path of the socket to listen on
+    """
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    # Bind under a temporary name so clients never see a socket that is not listening
+    tmp_path = f"{socket_path}.tmp"
+    listener.bind(tmp_path)
+    listener.listen(64)
+    os.rename(tmp_path, socket_path)
+
+    # Finished children are reaped by the kernel
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    try:
+        while True:
+            connection, _ = listener.accept()
+            try:
+                request, _ = _read_message(connection)
+            except (OSError, ValueError):
+                connection.close()
+                continue
+            if request is None:
+                connection.close()
+                continue
+            if request.get("command") == "shutdown":
+                connection.close()
+                return
+
+            if os.fork() == 0:
+                listener.close()
+                _run_job(connection, request)
+            connection.close()
+    finally:
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    import bpy
+
+    addon_name = 'gscatter'
+
+    try:
+        success = bpy.ops.preferences.addon_enable(module=addon_name)
+        from gscatter.scripts import batch, create_synthetic
+    except ImportError:
+        print(addon_name, "is not found")
+        sys.exit(1)
+
+    args = sys.argv[sys.argv.index("--") + 1:]
+
+    if len(args) > 1:
+        # Children start from the warm baseline of the job
+        create_synthetic.warm_up(batch.load_spec(args[1]))
+
+    serve(args[0])
+    sys.exit(0)
@@ -0,0 +1,265 @@
+import bpy
+import os
+import queue
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from ..utils import profiler
+
+# Instances copied per block when walking depsgraph.object_instances.
+CHUNK_SIZE = 65536
+
+# Samples waiting for the writer thread before submit blocks.
+MAX_PENDING = 4
+
+
+def scatter_systems(scene=None):
+    """Gets the GScatter system objects of a scene."""
+    scene = scene or bpy.context.scene
+    return [obj for obj in scene.objects if obj.gscatter.is_gscatter_system]
+
+
+def decompose(matrices):
+    """Splits (N, 4, 4) affine matrices into positions, rotations and scales.
+
+    Args:
+        matrices (numpy.ndarray): (N, 4, 4) row-major transforms
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]: (N, 3) positions,
+            (N, 4) unit quaternions (w, x, y, z) and (N, 3) scales, float32
+    """
+    positions = matrices[:, :3, 3]
+    basis = matrices[:, :3, :3]
+    scales = np.linalg.norm(basis, axis=1)
+    rotation = basis / np.where(scales > 0.0, scales, 1.0)[:, None, :]
+
+    # Shepperd's method, every branch evaluated at once and picked per row
+    m00, m11, m22 = rotation[:, 0, 0], rotation[:, 1, 1], rotation[:, 2, 2]
+    candidates = np.stack((
+        1.0 + m00 + m11 + m22,
+        1.0 + m00 - m11 - m22,
+        1.0 - m00 + m11 - m22,
+        1.0 - m00 - m11 + m22,
+    ), axis=1)
+    pick = np.argmax(candidates, axis=1)
+    s = np.sqrt(np.maximum(candidates[np.arange(len(pick)), pick], 1e-12)) * 2.0
+
+    zy = rotation[:, 2, 1] - rotation[:, 1, 2]
+    xz = rotation[:, 0, 2] - rotation[:, 2, 0]
+    yx = rotation[:, 1, 0] - rotation[:, 0, 1]
+    yx_sum = rotation[:, 1, 0] + rotation[:, 0, 1]
+    xz_sum = rotation[:, 0, 2] + rotation[:, 2, 0]
+    zy_sum = rotation[:, 2, 1] + rotation[:, 1, 2]
+
+    branches = np.stack((
+        np.stack((0.25 * s, zy / s, xz / s, yx / s), axis=1),
+        np.stack((zy / s, 0.25 * s, yx_sum / s, xz_sum / s), axis=1),
+        np.stack((xz / s, yx_sum / s, 0.25 * s, zy_sum / s), axis=1),
+        np.stack((yx / s, xz_sum / s, zy_sum / s, 0.25 * s), axis=1),
+    ), axis=1)
+    rotations = branches[np.arange(len(pick)), pick]
+    rotations *= np.where(rotations[:, :1] < 0.0, -1.0, 1.0)
+
+    return positions.astype(np.float32), rotations.astype(np.float32), scales.astype(np.float32)
+
+
+def _instances_from_geometry(system_eval):
+    geometry = system_eval.evaluated_geometry()
+    pointcloud = geometry.instances_pointcloud()
+    if pointcloud is None:
+        return np.empty((0, 4, 4)), np.empty(0, dtype=np.int32), []
+
+    count = len(pointcloud.points)
+    transforms = np.empty(count * 16, dtype=np.float32)
+    pointcloud.attributes["instance_transform"].data.foreach_get("value", transforms)
+    # float4x4 attributes are stored column by column
+    matrices = transforms.reshape(count, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+    reference_index = np.empty(count, dtype=np.int32)
+    pointcloud.attributes[".reference_index"].data.foreach_get("value", reference_index)
+    names = [getattr(reference, "name", "") for reference in geometry.instance_references()]
+
+    world = np.array(system_eval.matrix_world, dtype=np.float64)
+    return world @ matrices, reference_index, names
+
+
+def _instances_from_depsgraph(depsgraph, system):
+    blocks = []
+    block_ids = []
+    names = {}
+
+    block = np.empty((CHUNK_SIZE, 4, 4))
+    ids = np.empty(CHUNK_SIZE, dtype=np.int32)
+    filled = 0
+    for instance in depsgraph.object_instances:
+        if not instance.is_instance or instance.parent is None or instance.parent.original != system:
+            continue
+
+        block[filled] = instance.matrix_world
+        ids[filled] = names.setdefault(instance.object.original.name, len(names))
+        filled += 1
+        if filled == CHUNK_SIZE:
+            blocks.append(block)
+            block_ids.append(ids)
+            block = np.empty((CHUNK_SIZE, 4, 4))
+            ids = np.empty(CHUNK_SIZE, dtype=np.int32)
+            filled = 0
+
+    blocks.append(block[:filled])
+    block_ids.append(ids[:filled])
+    return np.concatenate(blocks), np.concatenate(block_ids), list(names)
+
+
+@profiler.stage
+def collect_instances(depsgraph=None, systems=None):
+    """Collects the evaluated instances of scatter systems into arrays.
+
+    Uses the evaluated instance attributes where Blender exposes them and
+    falls back to walking depsgraph.object_instances in fixed size blocks,
+    so no Python object is kept per instance.
+
+    Args:
+        depsgraph (bpy.types.Depsgraph): Evaluated depsgraph, defaults to
+            the one of the active view layer
+        systems (list[bpy.types.Object]): Scatter system objects, defaults
+            to all systems of the scene
+
+    Returns:
+        dict: Arrays "positions" (N, 3), "rotations" (N, 4) quaternions
+            (w, x, y, z), "scales" (N, 3), "asset_ids" (N,) indices into
+            "asset_names", "system_ids" (N,) indices into "system_names"
+    """
+    depsgraph = depsgraph or bpy.context.evaluated_depsgraph_get()
+    systems = scatter_systems(depsgraph.scene) if systems is None else systems
+
+    matrices = []
+    asset_ids = []
+    system_ids = []
+    asset_names = {}
+    for system_id, system in enumerate(systems):
+        system_eval = system.evaluated_get(depsgraph)
+        if hasattr(system_eval, "evaluated_geometry"):
+            system_matrices, reference_index, names = _instances_from_geometry(system_eval)
+        else:
+            system_matrices, reference_index, names = _instances_from_depsgraph(depsgraph, system)
+
+        # Map the local asset indices of the system onto shared ones
+        lookup = np.array([asset_names.setdefault(name, len(asset_names)) for name in names] or [0], dtype=np.int32)
+        matrices.append(system_matrices)
+        asset_ids.append(lookup[reference_index])
+        system_ids.append(np.full(len(system_matrices), system_id, dtype=np.int32))
+
+    matrices = np.concatenate(matrices) if matrices else np.empty((0, 4, 4))
+    positions, rotations, scales = decompose(matrices)
+    return {
+        "positions": positions,
+        "rotations": rotations,
+        "scales": scales,
+        "asset_ids": np.concatenate(asset_ids) if asset_ids else np.empty(0, dtype=np.int32),
+        "asset_names": np.array(list(asset_names), dtype=str),
+        "system_ids": np.concatenate(system_ids) if system_ids else np.empty(0, dtype=np.int32),
+        "system_names": np.array([system.name for system in systems], dtype=str),
+    }
+
+
+def write_arrays(path, arrays, compress=False):
+    """Writes arrays to a .npz file, or to a directory of .npy files.
+
+    The .npz file is written under a temporary name and moved in place, so
+    an existing file is always complete.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        tmp_path = path.with_suffix(".tmp.npz")
+        if compress:
+            np.savez_compressed(tmp_path, **arrays)
+        else:
+            np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(path.joinpath(f"{name}.npy"), array)
+
+
+class GroundTruthWriter:
+    """Writes ground truth arrays to disk from a background thread.
+
+    Submitting only blocks once MAX_PENDING samples are waiting, so scene
+    building and file writes overlap.
+
+    Args:
+        compress (bool): Write compressed .npz files
+    """
+
+    def __init__(self, compress=False):
+        self.compress = compress
+        self.errors = []
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path, arrays, callback=None):
+        """Queues arrays for writing.
+
+        Args:
+            path (Path): Target .npz file, or a directory receiving one .npy
+                file per array
+            arrays (dict): Arrays by name
+            callback (callable): Called on the writer thread once the files
+                are complete
+        """
+        self._queue.put((Path(path), arrays, callback))
+
+    def flush(self):
+        """Waits until all queued samples are written."""
+        self._queue.join()
+
+    def close(self):
+        """Writes all queued samples and stops the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            path, arrays, callback = job
+            try:
+                write_arrays(path, arrays, self.compress)
+                if callback is not None:
+                    callback()
+            except Exception as e:
+                self.errors.append((path, e))
+                print(f"Failed to write ground truth {path}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+
+def export_ground_truth(path, writer=None, callback=None, depsgraph=None, systems=None):
+    """Collects the instances of scatter systems and writes them.
+
+    Args:
+        path (Path): Target .npz file or .npy directory
+        writer (GroundTruthWriter): Writer to queue the arrays on, without
+            one the arrays are written before returning
+        callback (callable): Called once the files are complete
+        depsgraph (bpy.types.Depsgraph): Evaluated depsgraph
+        systems (list[bpy.types.Object]): Scatter system objects
+
+    Returns:
+        int: Number of exported instances
+    """
+    arrays = collect_instances(depsgraph, systems)
+    if writer is None:
+        write_arrays(path, arrays)
+        if callback is not None:
+            callback()
+    else:
+        writer.submit(path, arrays, callback)
+    return len(arrays["positions"])
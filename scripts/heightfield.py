@@ -0,0 +1,429 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from ..common import noise
+
+# Bump whenever the surface algorithm changes so stale cache entries are ignored.
+CACHE_VERSION = 2
+
+# Terrain noise bases. COSINE is the original sum of separable cosine
+# layers, the others are fractal noise from common.noise.
+NOISE_BASES = ("COSINE", "PERLIN", "SIMPLEX", "RIDGED")
+
+# Number of random phase offsets driving the terrain noise layers:
+# base (x, y), medium (x1, y1, x2, y2) and micro (x1, y1, x2, y2).
+PHASE_COUNT = 10
+
+
+def terrain_displacement(
+    x,
+    y,
+    size,
+    phases,
+    noise_scale,
+    terrain_complexity,
+    micro_detail,
+    feature_size=None,
+    noise_basis="COSINE",
+    octaves=4,
+    lacunarity=2.0,
+    gain=0.5,
+    noise_seed=None,
+):
+    """Evaluate the layered terrain noise for arrays of vertex coordinates.
+
+    With the COSINE basis this is the array form of the original per-vertex
+    noise of create_grass_surface and gives the same values for the same
+    phases. The fractal bases replace the cosine layers with noise from
+    common.noise, which does not tile visibly.
+
+    Args:
+        x (numpy.ndarray): Vertex x coordinates
+        y (numpy.ndarray): Vertex y coordinates
+        size (float): Size of the grass surface (width and length)
+        phases (Sequence[float]): The PHASE_COUNT phase offsets
+        noise_scale (float): Amount of surface irregularity (0.0-1.0)
+        terrain_complexity (float): Intensity of terrain features (0.0-1.0)
+        micro_detail (float): Level of fine surface detail (0.0-1.0)
+        feature_size (float): Size the noise frequencies are scaled to,
+            defaults to size. Large tiled fields use a smaller value to
+            keep their detail density
+        noise_basis (str): One of NOISE_BASES
+        octaves (int): Number of fractal noise octaves
+        lacunarity (float): Frequency multiplier between fractal octaves
+        gain (float): Amplitude multiplier between fractal octaves
+        noise_seed (int): Permutation seed of the fractal noise
+
+    Returns:
+        numpy.ndarray: Height offset per vertex, falloff included
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    if feature_size is None:
+        feature_size = size
+
+    if noise_basis != "COSINE":
+        total_noise = _fractal_noise(
+            x * (5.0 / feature_size),
+            y * (5.0 / feature_size),
+            noise_scale,
+            terrain_complexity,
+            micro_detail,
+            noise_basis,
+            octaves,
+            lacunarity,
+            gain,
+            noise_seed,
+        )
+        height_scale = 1.0 - (np.abs(x) + np.abs(y)) / (size * 1.2)
+        return total_noise * np.maximum(0.2, height_scale)
+
+    (
+        base_phase_x,
+        base_phase_y,
+        med_phase_x1,
+        med_phase_y1,
+        med_phase_x2,
+        med_phase_y2,
+        micro_phase_x1,
+        micro_phase_y1,
+        micro_phase_x2,
+        micro_phase_y2,
+    ) = phases
+
+    # Scale coordinates for proper detail distribution at larger sizes
+    scaled_x = x * (5.0 / feature_size)
+    scaled_y = y * (5.0 / feature_size)
+
+    # Base terrain features (hills and depressions)
+    base_noise = (
+        np.cos(scaled_x * 1.2 + base_phase_x)
+        * np.cos(scaled_y * 1.2 + base_phase_y)
+        * 1.2
+        * noise_scale
+        * terrain_complexity
+    )
+
+    # Medium-scale variations (bumps and dips)
+    medium_noise = (
+        np.cos(scaled_x * 2.5 + med_phase_x1)
+        * np.cos(scaled_y * 2.5 + med_phase_y1)
+        * 0.6
+        * noise_scale
+        + np.cos(scaled_x * 3.5 + med_phase_x2)
+        * np.cos(scaled_y * 3.5 + med_phase_y2)
+        * 0.35
+        * noise_scale
+    ) * terrain_complexity
+
+    # Micro-detail for soil texture
+    micro_noise = (
+        (
+            np.cos(scaled_x * 8.0 + micro_phase_x1)
+            * np.cos(scaled_y * 8.0 + micro_phase_y1)
+            * 0.15
+            + np.cos(scaled_x * 12.0 + micro_phase_x2)
+            * np.cos(scaled_y * 12.0 + micro_phase_y2)
+            * 0.08
+        )
+        * micro_detail
+        * noise_scale
+    )
+
+    total_noise = base_noise + medium_noise + micro_noise
+
+    # Height-based scaling for a more natural look
+    height_scale = 1.0 - (np.abs(x) + np.abs(y)) / (size * 1.2)
+    return total_noise * np.maximum(0.2, height_scale)
+
+
+def _fractal_noise(
+    scaled_x, scaled_y, noise_scale, terrain_complexity, micro_detail, noise_basis, octaves, lacunarity, gain, seed
+):
+    # Hills, bumps and dips share one fractal, with the combined amplitude of
+    # the base and medium cosine layers.
+    if noise_basis == "RIDGED":
+        terrain = noise.ridged(scaled_x * 1.2, scaled_y * 1.2, octaves, lacunarity, gain, seed=seed) * 2.0 - 1.0
+    else:
+        terrain = noise.fbm(scaled_x * 1.2, scaled_y * 1.2, octaves, lacunarity, gain, noise_basis, seed)
+    terrain *= (1.2 + 0.6 + 0.35) * noise_scale * terrain_complexity
+
+    # Micro-detail for soil texture
+    micro_seed = None if seed is None else seed + 1
+    micro = noise.fbm(scaled_x * 8.0, scaled_y * 8.0, 2, lacunarity, gain, "PERLIN", micro_seed)
+    micro *= (0.15 + 0.08) * micro_detail * noise_scale
+
+    return terrain + micro
+
+
+def boundary_deformation(co, boundary, size, noise_scale, edge_randomness, edge_seed=None):
+    """Push the boundary vertices of a surface out into organic curves.
+
+    Boundary vertices move along their radial direction by a smooth edge
+    curve, and their height fades out towards the border.
+
+    Args:
+        co (numpy.ndarray): (N, 3) vertex coordinates, modified in place
+        boundary (numpy.ndarray): (N,) bool mask of the boundary vertices
+        size (float): Size of the surface (width and length)
+        noise_scale (float): Amount of surface irregularity
+        edge_randomness (float): Amount of border irregularity
+        edge_seed (int): Seed of the per vertex phases and height detail
+
+    Returns:
+        numpy.ndarray: co
+    """
+    index = np.flatnonzero(boundary)
+    rng = np.random.default_rng(edge_seed)
+    x = co[index, 0].astype(np.float64)
+    y = co[index, 1].astype(np.float64)
+
+    # Smooth periodic variation with a random phase offset per vertex
+    angle = rng.uniform(0, 6.28, len(index)) + np.cos(x * 0.8) * 2.0 + np.cos(y * 0.8) * 2.0
+
+    # Smooth, organic edge curves
+    edge_curve = (
+        np.cos(angle) * np.cos(x * 0.4)  # Large, smooth curves
+        + np.cos(angle + 1.5) * np.cos(y * 0.4) * 0.8
+        + np.cos(x * 0.8) * np.cos(y * 0.8) * 0.4  # Medium details
+    )
+
+    # Radial direction and distance of every boundary vertex
+    length = np.hypot(x, y)
+    inverse = np.divide(1.0, length, out=np.zeros_like(length), where=length > 0.0)
+    edge_dist = length / (size * 0.5)
+
+    deform = edge_curve * (edge_randomness * 2.0) * inverse
+    co[index, 0] = x + x * deform
+    co[index, 1] = y + y * deform
+
+    # Smooth height transition at edges with subtle height variation
+    falloff = 1.0 - np.minimum(1.0, edge_dist)
+    detail = np.cos(angle * 2.0) * 0.05 + rng.uniform(-0.02, 0.02, len(index))
+    co[index, 2] = co[index, 2] * falloff + detail * noise_scale * falloff
+    return co
+
+
+def grid_arrays(size, subdivisions):
+    """Build the vertex and face arrays of a subdivided square grid.
+
+    The grid matches a plane of the given size with `subdivisions` cuts per
+    edge, centered on the origin, with vertices ordered row by row along x.
+
+    Args:
+        size (float): Size of the grid (width and length)
+        subdivisions (int): Number of cuts per edge
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: (N, 3) float32 vertex
+            coordinates and (F, 4) int32 quad vertex indices
+    """
+    half = size * 0.5
+    return _grid_arrays(np.linspace(-half, half, subdivisions + 2), np.linspace(-half, half, subdivisions + 2))
+
+
+def _grid_arrays(x_axis, y_axis):
+    count_x = len(x_axis)
+    count_y = len(y_axis)
+    xs, ys = np.meshgrid(x_axis, y_axis)
+
+    co = np.zeros((count_x * count_y, 3), dtype=np.float32)
+    co[:, 0] = xs.ravel()
+    co[:, 1] = ys.ravel()
+    return co, grid_faces(count_x, count_y)
+
+
+def grid_faces(count_x, count_y):
+    """Build the quad indices of a grid with vertices ordered row by row.
+
+    Args:
+        count_x (int): Number of vertices per row
+        count_y (int): Number of rows
+
+    Returns:
+        numpy.ndarray: (F, 4) int32 quad vertex indices
+    """
+    # Lower-left corner index of every quad, wound counter-clockwise from +Z
+    corners = (np.arange(count_y - 1)[:, None] * count_x + np.arange(count_x - 1)[None, :]).ravel()
+    faces = np.stack((corners, corners + 1, corners + count_x + 1, corners + count_x), axis=1)
+    return faces.astype(np.int32)
+
+
+def downsample(co, count, factor):
+    """Downsample a square grid heightfield by keeping every nth vertex.
+
+    The last row and column are always kept, so the border of the surface
+    stays intact even when the grid does not divide evenly.
+
+    Args:
+        co (numpy.ndarray): (count * count, 3) vertex coordinates ordered
+            row by row
+        count (int): Number of vertices per side
+        factor (int): Step between kept vertices per side, 2 keeps a
+            quarter of the vertices
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray, int]: (N, 3) float32 vertex
+            coordinates, (F, 4) int32 quad vertex indices and the new
+            number of vertices per side
+    """
+    keep = np.arange(0, count, factor)
+    if keep[-1] != count - 1:
+        keep = np.append(keep, count - 1)
+
+    grid = np.asarray(co, dtype=np.float32).reshape(count, count, 3)
+    coarse = np.ascontiguousarray(grid[keep][:, keep]).reshape(-1, 3)
+    return coarse, grid_faces(len(keep), len(keep)), len(keep)
+
+
+def lod_pyramid(co, count, levels):
+    """Build a pyramid of downsampled heightfields.
+
+    Every level keeps a quarter of the vertices of the previous one.
+
+    Args:
+        co (numpy.ndarray): Full resolution (count * count, 3) vertex
+            coordinates ordered row by row
+        count (int): Number of vertices per side
+        levels (int): Number of coarse levels to build
+
+    Returns:
+        list[tuple[numpy.ndarray, numpy.ndarray]]: (co, faces) for every
+            coarse level, from fine to coarse
+    """
+    pyramid = []
+    for _ in range(levels):
+        if count <= 2:
+            break
+        co, faces, count = downsample(co, count, 2)
+        pyramid.append((co, faces))
+    return pyramid
+
+
+def tile_arrays(size, tiles, subdivisions, phases, noise_scale, terrain_complexity, micro_detail, feature_size,
+                tile_x, tile_y, **noise_options):
+    """Build the displaced grid of one tile of a tiled field.
+
+    Noise is evaluated in field coordinates and neighbouring tiles compute
+    their shared edge from the same values, so the tiles meet without seams.
+    Only NumPy is used, so this runs in worker threads without touching bpy.
+
+    Args:
+        size (float): Size of the whole field (width and length)
+        tiles (int): Number of tiles per side
+        subdivisions (int): Number of cuts per tile edge
+        phases (Sequence[float]): The PHASE_COUNT phase offsets
+        noise_scale (float): Amount of surface irregularity (0.0-1.0)
+        terrain_complexity (float): Intensity of terrain features (0.0-1.0)
+        micro_detail (float): Level of fine surface detail (0.0-1.0)
+        feature_size (float): Size the noise frequencies are scaled to
+        tile_x (int): Column of the tile
+        tile_y (int): Row of the tile
+        **noise_options: Fractal noise options of terrain_displacement
+
+    Returns:
+        tuple[tuple[float, float], numpy.ndarray, numpy.ndarray]: The tile
+            center in field coordinates, (N, 3) float32 vertex coordinates
+            relative to that center and (F, 4) int32 quad vertex indices
+    """
+    edges = np.linspace(-size * 0.5, size * 0.5, tiles + 1)
+    x_axis = np.linspace(edges[tile_x], edges[tile_x + 1], subdivisions + 2)
+    y_axis = np.linspace(edges[tile_y], edges[tile_y + 1], subdivisions + 2)
+    co, faces = _grid_arrays(x_axis, y_axis)
+    xs, ys = np.meshgrid(x_axis, y_axis)
+    xs = xs.ravel()
+    ys = ys.ravel()
+
+    center_x = (edges[tile_x] + edges[tile_x + 1]) * 0.5
+    center_y = (edges[tile_y] + edges[tile_y + 1]) * 0.5
+    co[:, 0] = xs - center_x
+    co[:, 1] = ys - center_y
+    co[:, 2] = terrain_displacement(
+        xs, ys, size, phases, noise_scale, terrain_complexity, micro_detail, feature_size, **noise_options
+    )
+    return (float(center_x), float(center_y)), co, faces
+
+
+def tile_heightfields(size, tiles, subdivisions, phases, noise_scale, terrain_complexity, micro_detail,
+                      feature_size, max_workers=None, **noise_options):
+    """Compute all tiles of a tiled field in parallel.
+
+    Tiles are computed by a thread pool inside the calling process, NumPy
+    releases the GIL for the heavy array work. No process is forked from
+    Blender, whose own worker threads would not survive the fork.
+
+    Args:
+        max_workers (int): Number of workers, defaults to the CPU count
+        The remaining arguments are passed on to tile_arrays.
+
+    Yields:
+        tuple: (tile_x, tile_y, center, co, faces) for every tile, row by row
+    """
+    build = partial(tile_arrays, size, tiles, subdivisions, phases, noise_scale, terrain_complexity, micro_detail,
+                    feature_size, **noise_options)
+    coords = [(tile_x, tile_y) for tile_y in range(tiles) for tile_x in range(tiles)]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(coords))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(build, *zip(*coords))
+        for (tile_x, tile_y), (center, co, faces) in zip(coords, results):
+            yield tile_x, tile_y, center, co, faces
+
+
+def cache_key(**params):
+    """Hash surface parameters into a stable content address.
+
+    Args:
+        **params: The parameters that fully determine the surface, including
+            the seed
+
+    Returns:
+        str: Hex digest identifying the surface
+    """
+    items = sorted(params.items())
+    text = repr((CACHE_VERSION, items))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_cached(cache_dir, key):
+    """Memory-map a cached vertex array.
+
+    Args:
+        cache_dir (Path): Directory holding cached heightfields
+        key (str): Key returned by cache_key
+
+    Returns:
+        numpy.ndarray | None: Read-only (N, 3) float32 vertex coordinates,
+            or None if the surface is not cached
+    """
+    path = Path(cache_dir).joinpath(f"{key}.npy")
+    if not path.exists():
+        return None
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached(cache_dir, key, co):
+    """Write a vertex array to the cache.
+
+    The file is written under a temporary name and moved into place, so
+    concurrent workers never read a partially written entry.
+
+    Args:
+        cache_dir (Path): Directory holding cached heightfields
+        key (str): Key returned by cache_key
+        co (numpy.ndarray): (N, 3) vertex coordinates
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_dir.joinpath(f"{key}.{os.getpid()}.tmp.npy")
+    np.save(tmp_path, np.ascontiguousarray(co, dtype=np.float32))
+    os.replace(tmp_path, cache_dir.joinpath(f"{key}.npy"))
@@ -0,0 +1,269 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Metadata key holding the (min, max) height range of 16-bit images.
+RANGE_KEY = "gscatter_height_range"
+
+IMAGE_SUFFIXES = (".png", ".tif", ".tiff")
+RAW_SUFFIXES = (".r32", ".raw")
+
+# Rows read at once when streaming a raw heightfield.
+CHUNK_ROWS = 1024
+
+
+def _image_module():
+    from ..vendor.PIL import Image
+
+    # DEMs are routinely larger than the decompression bomb guard
+    Image.MAX_IMAGE_PIXELS = None
+    return Image
+
+
+def _header_path(path):
+    return Path(path).with_suffix(Path(path).suffix + ".json")
+
+
+def save_image(path, heights, height_range=None):
+    """Write a heightfield as a 16-bit grayscale PNG or TIFF.
+
+    Heights are mapped linearly onto 0-65535. The height range is stored in
+    the file (PNG text chunk, TIFF image description) so it can be restored.
+
+    Args:
+        path (Path): Target .png, .tif or .tiff file
+        heights (numpy.ndarray): (rows, columns) heights
+        height_range (tuple[float, float]): Heights mapped to 0 and 65535,
+            defaults to the range of the data
+
+    Returns:
+        tuple[float, float]: The height range used
+    """
+    Image = _image_module()
+    path = Path(path)
+    heights = np.asarray(heights, dtype=np.float64)
+
+    if height_range is None:
+        height_range = (float(heights.min()), float(heights.max()))
+    low, high = height_range
+    span = (high - low) or 1.0
+
+    pixels = np.clip(np.rint((heights - low) / span * 65535.0), 0, 65535).astype(np.uint16)
+    image = Image.fromarray(pixels, mode="I;16")
+    metadata = json.dumps([low, high])
+
+    if path.suffix.lower() == ".png":
+        from ..vendor.PIL.PngImagePlugin import PngInfo
+
+        info = PngInfo()
+        info.add_text(RANGE_KEY, metadata)
+        image.save(path, pnginfo=info)
+    else:
+        # 270 is the ImageDescription tag
+        image.save(path, tiffinfo={270: metadata})
+
+    return low, high
+
+
+def save_raw(path, heights):
+    """Write a heightfield as raw little-endian float32 with a JSON header.
+
+    The data is copied in row chunks through a memory map, so heights can
+    themselves be a memory map larger than RAM.
+
+    Args:
+        path (Path): Target .r32 or .raw file
+        heights (numpy.ndarray): (rows, columns) heights
+    """
+    path = Path(path)
+    rows, columns = heights.shape
+
+    target = np.memmap(path, dtype="<f4", mode="w+", shape=(rows, columns))
+    for start in range(0, rows, CHUNK_ROWS):
+        target[start:start + CHUNK_ROWS] = heights[start:start + CHUNK_ROWS]
+    target.flush()
+    del target
+
+    _header_path(path).write_text(json.dumps({"rows": rows, "columns": columns, "dtype": "<f4"}))
+
+
+def save(path, heights, height_range=None):
+    """Write a heightfield, picking the format from the file suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix in IMAGE_SUFFIXES:
+        return save_image(path, heights, height_range)
+    if suffix in RAW_SUFFIXES:
+        return save_raw(path, heights)
+    raise ValueError(f"Unsupported heightfield format {suffix}")
+
+
+def open_raw(path, shape=None):
+    """Memory-map a raw float32 heightfield without reading it.
+
+    Args:
+        path (Path): The .r32 or .raw file
+        shape (tuple[int, int]): (rows, columns), read from the JSON header
+            if omitted. Headerless square files are accepted too
+
+    Returns:
+        numpy.memmap: Read-only (rows, columns) float32 heights
+    """
+    path = Path(path)
+    if shape is None:
+        header = _header_path(path)
+        if header.exists():
+            data = json.loads(header.read_text())
+            shape = (data["rows"], data["columns"])
+        else:
+            side = int(round((path.stat().st_size // 4)**0.5))
+            if side * side * 4 != path.stat().st_size:
+                raise ValueError(f"Cannot infer the shape of {path}, pass it explicitly")
+            shape = (side, side)
+
+    return np.memmap(path, dtype="<f4", mode="r", shape=tuple(shape))
+
+
+def _open_image(path):
+    Image = _image_module()
+    image = Image.open(path)
+
+    metadata = image.info.get(RANGE_KEY)
+    if metadata is None and hasattr(image, "tag_v2"):
+        metadata = image.tag_v2.get(270)
+    try:
+        low, high = json.loads(metadata)
+    except (TypeError, ValueError):
+        low, high = 0.0, 1.0
+
+    return image, low, high
+
+
+# PIL raw modes of 16-bit grayscale TIFF strips, by numpy dtype.
+_TIFF_STRIP_DTYPES = {
+    "I;16": "<u2",
+    "I;16L": "<u2",
+    "I;16B": ">u2",
+    "I;16N": "=u2",
+}
+
+
+def _tiff_strips(path, image):
+    """Memory-map the strips of an uncompressed 16-bit TIFF.
+
+    Returns:
+        list[tuple[int, numpy.memmap]]: First row index and rows of every run
+            of contiguous strips, None if the TIFF is compressed or tiled
+    """
+    if image.format != "TIFF" or not image.tile:
+        return None
+
+    runs = []
+    for decoder, extents, offset, args in sorted(image.tile, key=lambda tile: tile[1][1]):
+        rawmode = args[0] if isinstance(args, tuple) else args
+        dtype = _TIFF_STRIP_DTYPES.get(rawmode)
+        x0, y0, x1, y1 = extents
+        if decoder != "raw" or dtype is None or x0 != 0 or x1 != image.width:
+            return None
+        if isinstance(args, tuple) and (args[1] not in (0, image.width * 2) or args[2] != 1):
+            return None
+
+        start, rows, run_offset, run_dtype = runs[-1] if runs else (None, 0, None, None)
+        if run_dtype == dtype and start + rows == y0 and run_offset + rows * image.width * 2 == offset:
+            runs[-1] = (start, rows + y1 - y0, run_offset, dtype)
+        else:
+            runs.append((y0, y1 - y0, offset, dtype))
+
+    return [
+        (start, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(rows, image.width)))
+        for start, rows, offset, dtype in runs
+    ]
+
+
+def _open_rows(path, raw_shape=None):
+    """Open the rows of a heightfield without converting them.
+
+    Raw files and uncompressed TIFF, which save_image writes, are
+    memory-mapped. PNG and compressed TIFF have no row access and are
+    decoded whole by PIL, at 2 bytes per pixel.
+
+    Returns:
+        tuple[list, float, float]: (first row index, rows) pairs covering
+            the heightfield, and the scale and offset turning their values
+            into heights
+    """
+    if Path(path).suffix.lower() in RAW_SUFFIXES:
+        return [(0, open_raw(path, raw_shape))], 1.0, 0.0
+
+    image, low, high = _open_image(path)
+    scale = (high - low) / 65535.0
+    segments = _tiff_strips(path, image)
+    if segments is None:
+        segments = [(0, np.asarray(image))]
+    return segments, scale, low
+
+
+def _to_heights(values, scale, low):
+    return values.astype(np.float32) * np.float32(scale) + np.float32(low)
+
+
+def shape(path, raw_shape=None):
+    """Get the (rows, columns) of a heightfield without reading its data."""
+    if Path(path).suffix.lower() in RAW_SUFFIXES:
+        return open_raw(path, raw_shape).shape
+    image, _, _ = _open_image(path)
+    return image.height, image.width
+
+
+def iter_rows(path, chunk_rows=CHUNK_ROWS, raw_shape=None):
+    """Stream a heightfield in blocks of rows.
+
+    Raw files and uncompressed TIFF are read through memory maps, only one
+    block is resident at a time. PNG and compressed TIFF are decoded whole
+    first, see _open_rows.
+
+    Args:
+        path (Path): The heightfield file
+        chunk_rows (int): Largest number of rows per block
+        raw_shape (tuple[int, int]): Shape of headerless raw files
+
+    Yields:
+        tuple[int, numpy.ndarray]: First row index and (rows, columns)
+            float32 heights of every block
+    """
+    segments, scale, low = _open_rows(path, raw_shape)
+    for first_row, rows in segments:
+        for start in range(0, rows.shape[0], chunk_rows):
+            yield first_row + start, _to_heights(rows[start:start + chunk_rows], scale, low)
+
+
+def sample_grid(path, count, chunk_rows=CHUNK_ROWS, raw_shape=None):
+    """Resample a heightfield onto a square grid.
+
+    Raw files and uncompressed TIFF only read the rows under grid vertices,
+    so they can be far larger than RAM. PNG and compressed TIFF are decoded
+    whole, see _open_rows.
+
+    Args:
+        path (Path): The heightfield file
+        count (int): Number of grid vertices per side
+        chunk_rows (int): Number of grid rows gathered at once
+        raw_shape (tuple[int, int]): Shape of headerless raw files
+
+    Returns:
+        numpy.ndarray: (count, count) float32 heights, grid row 0 at -Y so
+            it can be raveled straight into a grid from heightfield.grid_arrays
+    """
+    rows, columns = shape(path, raw_shape)
+    row_index = np.rint(np.linspace(rows - 1, 0, count)).astype(np.intp)
+    column_index = np.rint(np.linspace(0, columns - 1, count)).astype(np.intp)
+
+    grid = np.empty((count, count), dtype=np.float32)
+    segments, scale, low = _open_rows(path, raw_shape)
+    for first_row, segment in segments:
+        # Only touch the pages of the sampled rows
+        hits = np.nonzero((row_index >= first_row) & (row_index < first_row + segment.shape[0]))[0]
+        for start in range(0, len(hits), chunk_rows):
+            block = hits[start:start + chunk_rows]
+            grid[block] = _to_heights(segment[row_index[block] - first_row][:, column_index], scale, low)
+    return grid
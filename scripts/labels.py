@@ -0,0 +1,163 @@
+import bpy
+
+import numpy as np
+
+from . import ground_truth
+from ..utils import profiler
+
+# Upper bound of stencil pixels splatted at once, bounds the temporary arrays.
+SPLAT_BATCH = 1 << 22
+
+
+def _world_corners(obj):
+    matrix = np.array(obj.matrix_world)
+    return np.array(obj.bound_box) @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def asset_footprints(asset_names):
+    """Gets the footprint radius of instanced assets.
+
+    The footprint is the XY distance from the instance origin to the farthest
+    bounding box corner of the asset, over all mesh objects of a collection
+    (such as the LOD collections of asset_blend_file_creator.py) or of a
+    single object.
+
+    Args:
+        asset_names (list[str]): Names of instanced collections or objects
+
+    Returns:
+        numpy.ndarray: (A,) float32 radii in asset space, 0 for unknown assets
+    """
+    radii = np.zeros(len(asset_names), dtype=np.float32)
+    for index, name in enumerate(asset_names):
+        collection = bpy.data.collections.get(name)
+        if collection:
+            objects = [obj for obj in collection.all_objects if obj.type == "MESH"]
+            if not objects:
+                continue
+            corners = np.concatenate([_world_corners(obj) for obj in objects])[:, :2]
+            corners = corners - np.array(collection.instance_offset)[:2]
+        else:
+            obj = bpy.data.objects.get(name)
+            if obj is None:
+                continue
+            corners = np.array(obj.bound_box)[:, :2]
+        radii[index] = np.hypot(corners[:, 0], corners[:, 1]).max()
+    return radii
+
+
+def surface_bounds(obj):
+    """Gets the world space XY bounds (min_x, min_y, max_x, max_y) of an object."""
+    corners = _world_corners(obj)[:, :2]
+    return (*corners.min(axis=0), *corners.max(axis=0))
+
+
+def _disk_offsets(radius):
+    extent = int(np.ceil(radius))
+    dy, dx = np.mgrid[-extent:extent + 1, -extent:extent + 1]
+    inside = dx * dx + dy * dy <= max(radius, 0.5)**2
+    return dy[inside], dx[inside]
+
+
+def rasterize(positions, scales, asset_ids, radii, bounds, resolution=512):
+    """Splats instances as footprint disks onto a top-down label grid.
+
+    Args:
+        positions (numpy.ndarray): (N, 3) world positions
+        scales (numpy.ndarray): (N, 3) instance scales
+        asset_ids (numpy.ndarray): (N,) asset index of every instance
+        radii (numpy.ndarray): (A,) footprint radius of every asset
+        bounds (tuple[float, float, float, float]): (min_x, min_y, max_x,
+            max_y) covered by the grid
+        resolution (int): Number of pixels of the longer side
+
+    Returns:
+        dict: "density" (H, W) float32 instances per square metre,
+            "coverage" (H, W) uint16 overlapping footprints, "instance"
+            (H, W) int32 topmost instance index (highest index wins, -1
+            for ground), "class" (H, W) int16 asset index of that instance
+            (-1 for ground), "class_masks" (A, H, W) bool footprint masks
+            per asset. Row 0 is the +Y edge
+    """
+    min_x, min_y, max_x, max_y = bounds
+    pixel = max(max_x - min_x, max_y - min_y) / resolution
+    width = max(1, int(np.ceil((max_x - min_x) / pixel)))
+    height = max(1, int(np.ceil((max_y - min_y) / pixel)))
+    pixels = width * height
+    asset_count = len(radii)
+
+    columns = np.floor((positions[:, 0] - min_x) / pixel).astype(np.int64)
+    rows = np.floor((max_y - positions[:, 1]) / pixel).astype(np.int64)
+
+    inside = (columns >= 0) & (columns < width) & (rows >= 0) & (rows < height)
+    density = np.bincount(rows[inside] * width + columns[inside], minlength=pixels)
+    density = (density / (pixel * pixel)).astype(np.float32)
+
+    coverage = np.zeros(pixels, dtype=np.int64)
+    class_counts = np.zeros(asset_count * pixels, dtype=np.int64)
+    instance = np.full(pixels, -1, dtype=np.int64)
+
+    # Instances with the same pixel radius share one stencil
+    radius_px = radii[asset_ids] * np.abs(scales[:, :2]).max(axis=1) / pixel
+    radius_px = np.rint(radius_px * 2.0) * 0.5
+    for radius in np.unique(radius_px):
+        dy, dx = _disk_offsets(radius)
+        members = np.flatnonzero(radius_px == radius)
+        step = max(1, SPLAT_BATCH // len(dy))
+
+        for start in range(0, len(members), step):
+            batch = members[start:start + step]
+            stencil_rows = rows[batch, None] + dy
+            stencil_columns = columns[batch, None] + dx
+            valid = ((stencil_rows >= 0) & (stencil_rows < height)
+                     & (stencil_columns >= 0) & (stencil_columns < width))
+
+            flat = (stencil_rows * width + stencil_columns)[valid]
+            ids = np.broadcast_to(batch[:, None], valid.shape)[valid]
+            coverage += np.bincount(flat, minlength=pixels)
+            class_counts += np.bincount(asset_ids[ids] * pixels + flat, minlength=asset_count * pixels)
+            np.maximum.at(instance, flat, ids)
+
+    classes = np.full(pixels, -1, dtype=np.int16)
+    covered = instance >= 0
+    classes[covered] = asset_ids[instance[covered]]
+
+    return {
+        "density": density.reshape(height, width),
+        "coverage": np.minimum(coverage, np.iinfo(np.uint16).max).astype(np.uint16).reshape(height, width),
+        "instance": instance.astype(np.int32).reshape(height, width),
+        "class": classes.reshape(height, width),
+        "class_masks": (class_counts > 0).reshape(asset_count, height, width),
+    }
+
+
+@profiler.stage
+def rasterize_labels(surface_obj, arrays=None, resolution=512, depsgraph=None):
+    """Rasterizes top-down labels of the scatter systems on a surface.
+
+    Args:
+        surface_obj (bpy.types.Object): The surface the labels cover, such as
+            the one from create_grass_surface
+        arrays (dict): Instance arrays from ground_truth.collect_instances,
+            collected if omitted
+        resolution (int): Number of pixels of the longer side
+        depsgraph (bpy.types.Depsgraph): Evaluated depsgraph
+
+    Returns:
+        dict: The label maps from rasterize plus "asset_names" and "bounds"
+    """
+    if arrays is None:
+        arrays = ground_truth.collect_instances(depsgraph)
+
+    bounds = surface_bounds(surface_obj)
+    labels = rasterize(
+        arrays["positions"],
+        arrays["scales"],
+        arrays["asset_ids"],
+        asset_footprints(list(arrays["asset_names"])),
+        bounds,
+        resolution,
+    )
+    labels["asset_names"] = arrays["asset_names"]
+    labels["bounds"] = np.array(bounds, dtype=np.float32)
+    return labels
@@ -0,0 +1,226 @@
+"""Quasi-random designs over parameter ranges for dataset sweeps.
+
+Sobol and Halton points are computed directly from their index, so any
+slice of a sequence can be generated on its own and a sweep can be sharded
+across workers. Latin hypercube designs are drawn for a fixed total size
+from the seed, every slice of the same design is identical too.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+METHODS = ("SOBOL", "HALTON", "LHS", "RANDOM")
+
+# Bits of the Sobol integers, sequences are valid for 2**BITS points.
+BITS = 32
+
+# Joe and Kuo direction numbers (new-joe-kuo-6.21201) of dimensions 2-21:
+# degree s, polynomial coefficients a and initial m values.
+_SOBOL_POLYNOMIALS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+
+MAX_SOBOL_DIMENSIONS = len(_SOBOL_POLYNOMIALS) + 1
+
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97, 101)
+
+
+def _sobol_directions(dimensions):
+    directions = np.zeros((dimensions, BITS), dtype=np.uint64)
+
+    # The first dimension is the van der Corput sequence in base 2
+    directions[0] = 1 << np.arange(BITS - 1, -1, -1, dtype=np.uint64)
+
+    for dimension in range(1, dimensions):
+        degree, coefficients, initial = _SOBOL_POLYNOMIALS[dimension - 1]
+        m = list(initial)
+        for k in range(degree, BITS):
+            value = m[k - degree] ^ (m[k - degree] << degree)
+            for bit in range(1, degree):
+                if (coefficients >> (degree - 1 - bit)) & 1:
+                    value ^= m[k - bit] << bit
+            m.append(value)
+        directions[dimension] = [m[k] << (BITS - 1 - k) for k in range(BITS)]
+
+    return directions
+
+
+def sobol(start, count, dimensions):
+    """Points start to start + count of the Sobol sequence.
+
+    Args:
+        start (int): Index of the first point
+        count (int): Number of points
+        dimensions (int): Number of dimensions, up to MAX_SOBOL_DIMENSIONS
+
+    Returns:
+        numpy.ndarray: (count, dimensions) points in [0, 1)
+    """
+    if dimensions > MAX_SOBOL_DIMENSIONS:
+        raise ValueError(f"Sobol designs support up to {MAX_SOBOL_DIMENSIONS} dimensions")
+
+    directions = _sobol_directions(dimensions)
+    index = np.arange(start, start + count, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+
+    points = np.zeros((count, dimensions), dtype=np.uint64)
+    for bit in range(BITS):
+        mask = ((gray >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+        points[mask] ^= directions[:, bit]
+
+    return points.astype(np.float64) / float(1 << BITS)
+
+
+def halton(start, count, dimensions):
+    """Points start to start + count of the Halton sequence.
+
+    Args:
+        start (int): Index of the first point
+        count (int): Number of points
+        dimensions (int): Number of dimensions, one prime base each
+
+    Returns:
+        numpy.ndarray: (count, dimensions) points in [0, 1)
+    """
+    if dimensions > len(_PRIMES):
+        raise ValueError(f"Halton designs support up to {len(_PRIMES)} dimensions")
+
+    # Index 0 is the origin, skip it like the usual leaped sequence
+    index = np.arange(start + 1, start + count + 1, dtype=np.int64)
+    points = np.zeros((count, dimensions))
+    for dimension, base in enumerate(_PRIMES[:dimensions]):
+        remaining = index.copy()
+        scale = 1.0 / base
+        while remaining.any():
+            remaining, digit = np.divmod(remaining, base)
+            points[:, dimension] += digit * scale
+            scale /= base
+    return points
+
+
+@lru_cache(maxsize=4)
+def _latin_hypercube_design(dimensions, total, seed):
+    rng = np.random.default_rng(seed)
+    strata = np.stack([rng.permutation(total) for _ in range(dimensions)], axis=1)
+    jitter = rng.random((total, dimensions))
+    design = (strata + jitter) / total
+    # Shared by all calls with the same arguments
+    design.setflags(write=False)
+    return design
+
+
+def latin_hypercube(start, count, dimensions, total, seed=0):
+    """Points start to start + count of a Latin hypercube design.
+
+    Every dimension is split into total strata and every stratum holds one
+    point of the whole design. The whole design is drawn once per process
+    and cached, so slicing it sample by sample stays cheap.
+
+    Args:
+        start (int): Index of the first point
+        count (int): Number of points
+        dimensions (int): Number of dimensions
+        total (int): Size of the whole design
+        seed (int): Seed of the design
+
+    Returns:
+        numpy.ndarray: (count, dimensions) points in [0, 1)
+    """
+    if start + count > total:
+        raise ValueError("Latin hypercube slices must lie within the total design size")
+
+    return _latin_hypercube_design(dimensions, total, seed)[start:start + count].copy()
+
+
+def unit_points(method, start, count, dimensions, seed=0, total=None):
+    """Points of a design in the unit hypercube.
+
+    Sobol and Halton points get a random shift modulo 1 drawn from the seed
+    (Cranley-Patterson rotation), so different seeds give different, equally
+    uniform designs.
+
+    Args:
+        method (str): One of METHODS
+        start (int): Index of the first point
+        count (int): Number of points
+        dimensions (int): Number of dimensions
+        seed (int): Seed of the design
+        total (int): Size of the whole design, required by LHS
+
+    Returns:
+        numpy.ndarray: (count, dimensions) points in [0, 1)
+    """
+    if method == "SOBOL":
+        points = sobol(start, count, dimensions)
+    elif method == "HALTON":
+        points = halton(start, count, dimensions)
+    elif method == "LHS":
+        if total is None:
+            raise ValueError("LHS designs need the total design size")
+        return latin_hypercube(start, count, dimensions, total, seed)
+    elif method == "RANDOM":
+        # Seeded per point so slices match the whole sequence
+        return np.array([np.random.default_rng((seed, index)).random(dimensions) for index in range(start, start + count)])
+    else:
+        raise ValueError(f"Unknown sampling method {method}, expected one of {METHODS}")
+
+    shift = np.random.default_rng(seed).random(dimensions)
+    return (points + shift) % 1.0
+
+
+def scale_points(points, ranges):
+    """Maps unit points onto parameter ranges.
+
+    Args:
+        points (numpy.ndarray): (count, len(ranges)) points in [0, 1)
+        ranges (dict): (low, high) per parameter name, integer parameters
+            (both bounds int) are sampled inclusively
+
+    Returns:
+        dict: A (count,) array per parameter name
+    """
+    values = {}
+    for column, (name, (low, high)) in enumerate(ranges.items()):
+        unit = points[:, column]
+        if isinstance(low, int) and isinstance(high, int):
+            values[name] = np.minimum(low + np.floor(unit * (high - low + 1)), high).astype(np.int64)
+        else:
+            values[name] = low + unit * (high - low)
+    return values
+
+
+def sample(ranges, start, count, method="SOBOL", seed=0, total=None):
+    """Samples a batch of a design over declared parameter ranges.
+
+    Args:
+        ranges (dict): (low, high) per parameter name
+        start (int): Index of the first sample, resumes a sequence
+        count (int): Number of samples
+        method (str): One of METHODS
+        seed (int): Seed of the design
+        total (int): Size of the whole design, required by LHS
+
+    Returns:
+        dict: A (count,) array per parameter name
+    """
+    points = unit_points(method, start, count, len(ranges), seed, total)
+    return scale_points(points, ranges)
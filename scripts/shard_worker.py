@@ -0,0 +1,47 @@
+import bpy
+import os
+import sys
+import traceback
+from pathlib import Path
+
+addon_name = 'gscatter'
+
+try:
+    success = bpy.ops.preferences.addon_enable(module=addon_name)
+    from gscatter.scripts import batch, create_synthetic, ground_truth, shards
+    from gscatter.utils import profiler
+except ImportError:
+    print(addon_name, "is not found")
+    sys.exit(1)
+
+# read command line arguments
+args = sys.argv[sys.argv.index("--") + 1:]
+
+output_dir = args[0]
+worker_id = args[1] if len(args) > 1 else None
+
+spec = batch.load_spec(shards.load_manifest(output_dir)["job"])
+
+if spec["profile"]:
+    profiler.enable()
+
+# Build the warm baseline once, samples only reset what they add to it
+create_synthetic.warm_up(spec)
+
+# Instance arrays are written while the next sample is built
+writer = ground_truth.GroundTruthWriter()
+
+
+def process_sample(spec, index):
+    try:
+        create_synthetic.export_batch_sample(spec, index, writer)
+    except Exception:
+        print(f"Sample {index} failed:\n{traceback.format_exc()}")
+
+
+completed = shards.run_worker(output_dir, process_sample, worker_id, flush=writer.flush)
+writer.close()
+
+if spec["profile"]:
+    profiler.write(Path(output_dir).joinpath("profile", f"worker_{worker_id or os.getpid()}"))
+print(f"Completed {completed} shards")
@@ -0,0 +1,382 @@
+"""Sharded dataset generation across hosts sharing a filesystem.
+
+A manifest in the output directory splits the sample indices of a job into
+shards. Workers on any host claim shards by linking numbered lease files
+in place, keep them alive by touching them, and mark finished shards with
+completion files. A lease whose mtime is older than the lease timeout
+belongs to a crashed worker and is taken over by linking the next lease
+generation, samples that already have a completion marker are never
+generated again. No queue service is involved.
+
+    python shards.py init job.json --shard-size 100
+    python shards.py status dataset
+    blender -b -P shard_worker.py -- dataset     (on every host)
+
+Like batch.py this module only uses the standard library.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+try:
+    from . import batch
+except ImportError:
+    import batch
+
+MANIFEST = "manifest.json"
+
+# Minimum seconds after which a lease without heartbeat is considered abandoned.
+LEASE_TIMEOUT = 120.0
+
+# Expected seconds per sample, the default lease timeout covers a whole shard
+# since bpy operators can hold the GIL and stall the heartbeat thread.
+SAMPLE_TIME = 30.0
+
+# Seconds between lease heartbeats, well below LEASE_TIMEOUT.
+HEARTBEAT_INTERVAL = 15.0
+
+# Seconds between polls while all open shards are leased by other workers.
+POLL_INTERVAL = 5.0
+
+
+def create_manifest(spec_path, shard_size=100, lease_timeout=None):
+    """Writes the manifest of a job, or returns the existing one.
+
+    Args:
+        spec_path (Path): The job spec
+        shard_size (int): Number of samples per shard
+        lease_timeout (float): Seconds without heartbeat after which a shard
+            lease is taken over. Leases are also renewed between samples, so
+            it must exceed the longest sample. Defaults to the expected time
+            of a shard, at least LEASE_TIMEOUT
+
+    Returns:
+        dict: The manifest
+    """
+    spec = batch.load_spec(spec_path)
+    output_dir = Path(spec["output_dir"])
+    manifest_path = output_dir.joinpath(MANIFEST)
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if manifest["samples"] != spec["samples"]:
+            raise ValueError(f"{manifest_path} was created for {manifest['samples']} samples")
+        return manifest
+
+    for directory in ("leases", "done"):
+        output_dir.joinpath(directory).mkdir(parents=True, exist_ok=True)
+
+    job_path = output_dir.joinpath("job.json")
+    job_path.write_text(json.dumps(spec, indent=2))
+
+    if lease_timeout is None:
+        lease_timeout = max(LEASE_TIMEOUT, shard_size * SAMPLE_TIME)
+
+    manifest = {
+        "job": str(job_path),
+        "samples": spec["samples"],
+        "shard_size": shard_size,
+        "shards": -(-spec["samples"] // shard_size),
+        "lease_timeout": lease_timeout,
+    }
+
+    # Several hosts may initialize at once, the first manifest wins
+    tmp_path = output_dir.joinpath(f"{MANIFEST}.{uuid.uuid4().hex}")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    try:
+        os.link(tmp_path, manifest_path)
+    except FileExistsError:
+        pass
+    finally:
+        tmp_path.unlink()
+    return json.loads(manifest_path.read_text())
+
+
+def load_manifest(output_dir):
+    """Reads the manifest of an output directory."""
+    return json.loads(Path(output_dir).joinpath(MANIFEST).read_text())
+
+
+def shard_indices(manifest, shard):
+    """Gets the sample indices of a shard."""
+    start = shard * manifest["shard_size"]
+    return range(start, min(start + manifest["shard_size"], manifest["samples"]))
+
+
+def _lease_path(output_dir, shard, generation):
+    return Path(output_dir).joinpath("leases", f"shard_{shard:06d}.{generation:06d}.lease")
+
+
+def _lease_generations(output_dir, shard):
+    """Lists the lease files of a shard as (generation, path), oldest first."""
+    leases = []
+    for path in Path(output_dir).joinpath("leases").glob(f"shard_{shard:06d}.*.lease"):
+        try:
+            leases.append((int(path.name.split(".")[1]), path))
+        except ValueError:
+            continue
+    return sorted(leases)
+
+
+def _done_path(output_dir, shard):
+    return Path(output_dir).joinpath("done", f"shard_{shard:06d}.done")
+
+
+class Lease:
+    """A claimed shard, held while its lease file is the newest and holds our token.
+
+    Args:
+        output_dir (Path): Output directory holding the manifest
+        shard (int): The leased shard
+        generation (int): Generation of the lease file
+        token (str): Written into the lease file by the claim
+    """
+
+    def __init__(self, output_dir, shard, generation, token):
+        self.path = _lease_path(output_dir, shard, generation)
+        self.token = token
+        self._next_path = _lease_path(output_dir, shard, generation + 1)
+
+    def held(self):
+        """Checks that the lease was not taken over."""
+        if self._next_path.exists():
+            return False
+        try:
+            return json.loads(self.path.read_text()).get("token") == self.token
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def touch(self):
+        """Renews the lease.
+
+        Returns:
+            bool: False if the lease was taken over and is no longer held
+        """
+        if not self.held():
+            return False
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self):
+        """Removes the lease file if it is still ours."""
+        if self.held():
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def claim(output_dir, shard, worker_id, lease_timeout=LEASE_TIMEOUT):
+    """Tries to lease a shard.
+
+    Every claim links a complete lease file in place as the next generation
+    of the shard's leases. os.link fails if the file exists, so of all
+    workers claiming a free shard or taking over a stale lease exactly one
+    succeeds, without renaming or removing leases others may hold.
+
+    Returns:
+        Lease: The lease of worker_id, None if the shard is leased by
+            another worker
+    """
+    leases = _lease_generations(output_dir, shard)
+    generation = 0
+    if leases:
+        newest, newest_path = leases[-1]
+        try:
+            if time.time() - newest_path.stat().st_mtime <= lease_timeout:
+                return None
+        except FileNotFoundError:
+            # Released or taken over while listing, try again later
+            return None
+        generation = newest + 1
+
+    lease_path = _lease_path(output_dir, shard, generation)
+    token = uuid.uuid4().hex
+    tmp_path = lease_path.with_name(f"{lease_path.name}.{token}.tmp")
+    owner = {"worker": worker_id, "token": token, "host": socket.gethostname(), "pid": os.getpid()}
+    tmp_path.write_text(json.dumps(owner))
+    try:
+        os.link(tmp_path, lease_path)
+    except FileExistsError:
+        return None
+    finally:
+        tmp_path.unlink()
+
+    # Superseded generations, their workers find their lease gone
+    for _, path in leases:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    return Lease(output_dir, shard, generation, token)
+
+
+class Heartbeat:
+    """Renews a lease from a background thread while a shard is worked on.
+
+    The thread stalls while a bpy operator holds the GIL, so the worker loop
+    also calls beat between samples. lost is set once the lease was taken
+    over by another worker.
+    """
+
+    def __init__(self, lease, interval=HEARTBEAT_INTERVAL):
+        self.lease = lease
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+
+    def beat(self):
+        """Renews the lease, returns False once it is lost."""
+        if not self.lost and not self.lease.touch():
+            self.lost = True
+        return not self.lost
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.beat():
+                return
+
+
+def status(output_dir):
+    """Counts the finished, leased and open shards of a job.
+
+    Returns:
+        dict: Numbers of "done", "leased" and "open" shards and of finished
+            "samples"
+    """
+    manifest = load_manifest(output_dir)
+    counts = {"done": 0, "leased": 0, "open": 0}
+    for shard in range(manifest["shards"]):
+        if _done_path(output_dir, shard).exists():
+            counts["done"] += 1
+        elif _lease_generations(output_dir, shard):
+            counts["leased"] += 1
+        else:
+            counts["open"] += 1
+    counts["samples"] = manifest["samples"] - len(batch.pending_indices(batch.load_spec(manifest["job"])))
+    return counts
+
+
+def run_worker(output_dir, process_sample, worker_id=None, flush=None):
+    """Claims and generates shards until every shard of the job is done.
+
+    Args:
+        output_dir (Path): Output directory holding the manifest
+        process_sample (callable): Called with the spec and a sample index,
+            must write the completion marker of the sample. Shards with
+            failed samples are left unfinished and skipped by this worker
+        worker_id (str): Name of the worker in its leases
+        flush (callable): Called before a shard is marked done, waits for
+            pending sample writes
+
+    Returns:
+        int: Number of shards completed by this worker
+    """
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    spec = batch.load_spec(manifest["job"])
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    lease_timeout = manifest["lease_timeout"]
+    interval = min(HEARTBEAT_INTERVAL, lease_timeout / 4.0)
+
+    completed = 0
+    failed = set()
+    while True:
+        remaining = [
+            shard for shard in range(manifest["shards"])
+            if shard not in failed and not _done_path(output_dir, shard).exists()
+        ]
+        if not remaining:
+            return completed
+
+        # Start at a worker specific shard so workers rarely race for a lease
+        offset = hash(worker_id) % len(remaining)
+        claimed = None
+        for shard in remaining[offset:] + remaining[:offset]:
+            lease = claim(output_dir, shard, worker_id, lease_timeout)
+            if lease is not None:
+                claimed = shard
+                break
+
+        if claimed is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        try:
+            # Another worker may have finished it between listing and claiming
+            if not _done_path(output_dir, claimed).exists():
+                with Heartbeat(lease, interval) as heartbeat:
+                    for index in shard_indices(manifest, claimed):
+                        if not heartbeat.beat():
+                            break
+                        if not batch.sample_path(spec["output_dir"], index, ".json").exists():
+                            process_sample(spec, index)
+                    if flush is not None:
+                        flush()
+
+                if heartbeat.lost:
+                    # Finished by the worker that took the lease over
+                    print(f"Lease of shard {claimed} was taken over")
+                    continue
+
+                missing = [
+                    index for index in shard_indices(manifest, claimed)
+                    if not batch.sample_path(spec["output_dir"], index, ".json").exists()
+                ]
+                if missing:
+                    # Left to other workers or a later run
+                    print(f"Shard {claimed} has failed samples {missing}")
+                    failed.add(claimed)
+                else:
+                    _done_path(output_dir, claimed).touch()
+                    completed += 1
+        finally:
+            lease.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage a sharded synthetic lawn dataset.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="Write the manifest of a job")
+    init.add_argument("spec", help="JSON or YAML job spec")
+    init.add_argument("--shard-size", type=int, default=100, help="Number of samples per shard")
+    init.add_argument(
+        "--lease-timeout", type=float, default=None,
+        help=f"Seconds until a lease is stale, longer than any sample (default: shard size * {SAMPLE_TIME:g}, "
+             f"at least {LEASE_TIMEOUT:g})",
+    )
+
+    progress = commands.add_parser("status", help="Print the progress of a job")
+    progress.add_argument("output_dir", help="Output directory of the job")
+
+    args = parser.parse_args(argv)
+    if args.command == "init":
+        manifest = create_manifest(args.spec, args.shard_size, args.lease_timeout)
+        print(f"{manifest['samples']} samples in {manifest['shards']} shards")
+    else:
+        counts = status(args.output_dir)
+        print(f"{counts['samples']} samples, shards: {counts['done']} done, "
+              f"{counts['leased']} leased, {counts['open']} open")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
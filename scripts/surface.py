@@ -1,10 +1,156 @@
 import bpy
-import bmesh
 import random
-from math import cos
-from mathutils import Vector
+import tempfile
+from pathlib import Path
 
+import numpy as np
 
+from . import heightfield, heightfield_io
+from ..scatter.default import VIEWPORT_LOD_PROPERTY
+from ..utils import profiler
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()).joinpath("gscatter_heightfields")
+
+
+def build_grid_object(name, co, faces, collection):
+    """Creates a smooth shaded mesh object straight from grid arrays.
+
+    Uses the data API only, so it works without operators, edit mode or an
+    active object and is safe in background (-b) runs.
+
+    Args:
+        name (str): Name of the object and its mesh
+        co (numpy.ndarray): (N, 3) vertex coordinates
+        faces (numpy.ndarray): (F, 4) quad vertex indices
+        collection (bpy.types.Collection): Collection to link the object into
+
+    Returns:
+        bpy.types.Object: The created object
+    """
+    face_count = len(faces)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.loops.add(face_count * 4)
+    mesh.polygons.add(face_count)
+
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(co, dtype=np.float32).ravel())
+    mesh.polygons.foreach_set("loop_start", np.arange(0, face_count * 4, 4, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set("loop_total", np.full(face_count, 4, dtype=np.int32))
+    mesh.polygons.foreach_set("vertices", np.ascontiguousarray(faces, dtype=np.int32).ravel())
+    mesh.polygons.foreach_set("use_smooth", np.ones(face_count, dtype=bool))
+    mesh.update(calc_edges=True)
+
+    obj = bpy.data.objects.new(name, mesh)
+    collection.objects.link(obj)
+    return obj
+
+
+def add_detail_modifiers(obj, seamless=False):
+    """Adds the bevel and subdivision modifiers used on grass surfaces.
+
+    Args:
+        obj (bpy.types.Object): The grass surface
+        seamless (bool): Keep the border of the surface in place, so tiles
+            sharing their border vertices still meet after subdivision. The
+            bevel, which slides border vertices, is left out and corners are
+            preserved, the border then only depends on its own vertices
+    """
+    if not seamless:
+        # Bevel modifier for smoother edges
+        bevel = obj.modifiers.new(name="Bevel", type="BEVEL")
+        bevel.width = 0.03
+        bevel.segments = 3
+        bevel.limit_method = "ANGLE"
+        bevel.angle_limit = 0.785398  # 45 degrees
+
+    # Subdivision surface for smoother overall shape
+    subsurf = obj.modifiers.new(name="Subsurf", type="SUBSURF")
+    subsurf.levels = 1
+    subsurf.render_levels = 2
+    if seamless:
+        subsurf.boundary_smooth = "PRESERVE_CORNERS"
+
+
+def boundary_vertex_mask(mesh):
+    """Finds the boundary vertices of a mesh from its edge face counts.
+
+    Args:
+        mesh (bpy.types.Mesh): A mesh with calculated edges
+
+    Returns:
+        numpy.ndarray: (N,) bool mask, True for vertices on a boundary edge
+    """
+    edge_vertices = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edge_vertices)
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+
+    # Boundary edges are used by a single face
+    face_count = np.bincount(loop_edges, minlength=len(mesh.edges))
+    boundary_edges = edge_vertices.reshape(-1, 2)[face_count == 1]
+
+    mask = np.zeros(len(mesh.vertices), dtype=bool)
+    mask[boundary_edges.ravel()] = True
+    return mask
+
+
+def create_surface_lods(obj, co, count, levels, viewport_lod=1):
+    """Creates a pyramid of coarse copies of a grass surface.
+
+    The levels are downsampled from the heightfield instead of decimating the
+    mesh, every level keeping a quarter of the vertices of the previous one.
+    They are hidden child objects of the surface. If viewport_lod is set,
+    scatter systems created on the surface afterwards distribute on that
+    level in the viewport. The surface itself, with its detail modifiers,
+    is left unchanged and renders distribute on it.
+
+    Args:
+        obj (bpy.types.Object): The full resolution grass surface
+        co (numpy.ndarray): Vertex coordinates of obj, ordered row by row
+        count (int): Number of vertices per side of obj
+        levels (int): Number of coarse levels to create
+        viewport_lod (int): Level distributed on in the viewport, 0 keeps the
+            full resolution
+
+    Returns:
+        list[bpy.types.Object]: The coarse levels, from fine to coarse
+    """
+    lods = []
+    for level, (lod_co, lod_faces) in enumerate(heightfield.lod_pyramid(co, count, levels), start=1):
+        lod = build_grid_object(f"{obj.name}_LOD{level}", lod_co, lod_faces, obj.users_collection[0])
+        lod.parent = obj
+        lod.hide_viewport = True
+        lod.hide_render = True
+        lods.append(lod)
+
+    obj["gscatter_lods"] = [lod.name for lod in lods]
+
+    if 0 < viewport_lod <= len(lods):
+        # Read by scatter.functions.create_scatter_node_trees
+        obj[VIEWPORT_LOD_PROPERTY] = lods[viewport_lod - 1].name
+
+    return lods
+
+
+def get_surface_lod(obj, level):
+    """Gets a level of the LOD pyramid of a grass surface.
+
+    Args:
+        obj (bpy.types.Object): The full resolution grass surface
+        level (int): 0 for the surface itself, 1 for the first coarse level
+
+    Returns:
+        bpy.types.Object: The requested level, or the coarsest one available
+    """
+    names = list(obj.get("gscatter_lods", []))
+    if level <= 0 or not names:
+        return obj
+    return bpy.data.objects.get(names[min(level, len(names)) - 1], obj)
+
+
+@profiler.stage
 def create_grass_surface(
     size=10.0,  # Increased default size for larger lawn
     subdivisions=16,  # Increased for better detail at larger scale
@@ -12,14 +158,37 @@ def create_grass_surface(
     edge_randomness=0.2,
     terrain_complexity=0.9,  # Increased for more pronounced features
     micro_detail=0.3,  # Slightly increased for proportional detail
+    collection=None,
+    seed=None,
+    cache_dir=DEFAULT_CACHE_DIR,
+    noise_basis="COSINE",
+    octaves=4,
+    lacunarity=2.0,
+    gain=0.5,
+    lod_levels=0,
+    viewport_lod=1,
 ):
     """Creates an irregular grass surface with natural-looking borders.
 
     Args:
         size (float): Size of the grass surface (width and length)
-        subdivisions (int): Number of subdivisions for detail (1-10)
+        subdivisions (int): Number of subdivisions for detail (1-512)
         noise_scale (float): Amount of surface irregularity (0.0-1.0)
         edge_randomness (float): Amount of border irregularity (0.0-1.0)
+        collection (bpy.types.Collection): Collection to link the surface
+            into, defaults to the scene collection
+        seed (int): Seed driving all randomness. Seeded surfaces are
+            reproducible and cached, None draws a fresh surface
+        cache_dir (Path): Directory for cached heightfields, None disables
+            the cache
+        noise_basis (str): Terrain noise, one of heightfield.NOISE_BASES
+        octaves (int): Number of fractal noise octaves (1-12)
+        lacunarity (float): Frequency multiplier between fractal octaves
+        gain (float): Amplitude multiplier between fractal octaves
+        lod_levels (int): Number of coarse levels to build, 2 gives a
+            pyramid of full, 1/4 and 1/16 resolution (0-4)
+        viewport_lod (int): Level scatter systems distribute on in the
+            viewport when lod_levels is set, 0 keeps the full resolution
 
     Returns:
         bpy.types.Object: The created grass surface object
@@ -31,8 +200,8 @@ def create_grass_surface(
         # Validate parameters
         if not (0.1 <= size <= 20.0):
             raise ValueError("Size must be between 0.1 and 20.0")
-        if not (1 <= subdivisions <= 20):
-            raise ValueError("Subdivisions must be between 1 and 20")
+        if not (1 <= subdivisions <= 512):
+            raise ValueError("Subdivisions must be between 1 and 512")
         if not (0.0 <= noise_scale <= 1.0):
             raise ValueError("Noise scale must be between 0.0 and 1.0")
         if not (0.0 <= edge_randomness <= 1.0):
@@ -41,161 +210,287 @@ def create_grass_surface(
             raise ValueError("Terrain complexity must be between 0.0 and 1.0")
         if not (0.0 <= micro_detail <= 1.0):
             raise ValueError("Micro detail must be between 0.0 and 1.0")
+        if noise_basis not in heightfield.NOISE_BASES:
+            raise ValueError(f"Noise basis must be one of {heightfield.NOISE_BASES}")
+        if not (1 <= octaves <= 12):
+            raise ValueError("Octaves must be between 1 and 12")
+        if not (0 <= lod_levels <= 4):
+            raise ValueError("LOD levels must be between 0 and 4")
+
+        if collection is None:
+            collection = bpy.context.scene.collection
+
+        # Build the subdivided grid
+        co, faces = heightfield.grid_arrays(size, subdivisions)
 
-        # Create a new plane mesh
-        bpy.ops.mesh.primitive_plane_add(size=size)
-        obj = bpy.context.active_object
-
-        # Enter edit mode and get the bmesh
-        if obj.mode != "EDIT":
-            bpy.ops.object.mode_set(mode="EDIT")
-
-        bm = bmesh.from_edit_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
-
-        try:
-            # Subdivide the plane for more detail
-            for face in bm.faces[:]:  # Create a copy of the list to iterate
-                bmesh.ops.subdivide_edges(
-                    bm,
-                    edges=face.edges[:],  # Create a copy of the edges list
-                    cuts=subdivisions,
-                    use_grid_fill=True,
-                )
-
-            # Generate random phase offsets for terrain variation
-            base_phase_x = random.uniform(0, 6.28)  # 0 to 2π
-            base_phase_y = random.uniform(0, 6.28)
-            med_phase_x1 = random.uniform(0, 6.28)
-            med_phase_y1 = random.uniform(0, 6.28)
-            med_phase_x2 = random.uniform(0, 6.28)
-            med_phase_y2 = random.uniform(0, 6.28)
-            micro_phase_x1 = random.uniform(0, 6.28)
-            micro_phase_y1 = random.uniform(0, 6.28)
-            micro_phase_x2 = random.uniform(0, 6.28)
-            micro_phase_y2 = random.uniform(0, 6.28)
-
-            # Create more natural terrain variation
-            for v in bm.verts[:]:
-                # Scale coordinates for proper detail distribution at larger sizes
-                scaled_x = v.co.x * (
-                    5.0 / size
-                )  # Maintain detail density at larger scales
-                scaled_y = v.co.y * (5.0 / size)
-
-                # Base terrain features (hills and depressions)
-                base_noise = (
-                    cos(scaled_x * 1.2 + base_phase_x)
-                    * cos(scaled_y * 1.2 + base_phase_y)
-                    * 1.2  # Increased from 0.8 for more dramatic hills
-                    * noise_scale
-                    * terrain_complexity
-                )
-
-                # Medium-scale variations (bumps and dips)
-                medium_noise = (
-                    cos(scaled_x * 2.5 + med_phase_x1)
-                    * cos(scaled_y * 2.5 + med_phase_y1)
-                    * 0.6  # Increased from 0.4
-                    * noise_scale
-                    + cos(scaled_x * 3.5 + med_phase_x2)
-                    * cos(scaled_y * 3.5 + med_phase_y2)
-                    * 0.35  # Increased from 0.25
-                    * noise_scale
-                ) * terrain_complexity
-
-                # Micro-detail for soil texture
-                micro_noise = (
-                    (
-                        cos(scaled_x * 8.0 + micro_phase_x1)
-                        * cos(scaled_y * 8.0 + micro_phase_y1)
-                        * 0.15
-                        + cos(scaled_x * 12.0 + micro_phase_x2)
-                        * cos(scaled_y * 12.0 + micro_phase_y2)
-                        * 0.08
-                    )
-                    * micro_detail
-                    * noise_scale
-                )
-
-                # Combine all noise layers
-                total_noise = base_noise + medium_noise + micro_noise
-
-                # Apply height-based scaling for more natural look
-                height_scale = 1.0 - (abs(v.co.x) + abs(v.co.y)) / (size * 1.2)
-                v.co.z += total_noise * max(0.2, height_scale)
-
-                # Enhanced edge handling with organic curves
-                if v.is_boundary:
-                    # Calculate angle for smooth periodic variation
-                    angle = (
-                        random.uniform(0, 6.28)  # Random phase offset per vertex
-                        + cos(v.co.x * 0.8) * 2.0  # Slower frequency for larger curves
-                        + cos(v.co.y * 0.8) * 2.0
-                    )
-
-                    # Create smooth, organic edge curves
-                    edge_curve = (
-                        cos(angle) * cos(v.co.x * 0.4)  # Large, smooth curves
-                        + cos(angle + 1.5) * cos(v.co.y * 0.4) * 0.8
-                        + cos(v.co.x * 0.8) * cos(v.co.y * 0.8) * 0.4  # Medium details
-                    )
-
-                    # Calculate radial distance for edge variation
-                    radial_pos = Vector((v.co.x, v.co.y)).normalized()
-                    edge_dist = Vector((v.co.x, v.co.y)).length / (size * 0.5)
-
-                    # Apply larger, smoother edge deformation
-                    deform_amount = edge_randomness * 2.0  # Increased deformation
-                    v.co.x += radial_pos.x * edge_curve * deform_amount
-                    v.co.y += radial_pos.y * edge_curve * deform_amount
-
-                    # Smooth height transition at edges
-                    falloff = 1.0 - min(1.0, edge_dist)
-                    v.co.z *= falloff
-                    # Add subtle height variation at edges
-                    v.co.z += (
-                        (
-                            cos(angle * 2.0) * 0.05  # Smooth height variation
-                            + random.uniform(-0.02, 0.02)  # Tiny random detail
-                        )
-                        * noise_scale
-                        * falloff
-                    )
-
-            # Ensure normals are consistent
-            bmesh.ops.recalc_face_normals(bm, faces=bm.faces[:])
-
-            # Update the mesh
-            bmesh.update_edit_mesh(obj.data)
-        finally:
-            # Clean up bmesh
-            bm.free()
-
-        # Return to object mode
-        if obj.mode != "OBJECT":
-            bpy.ops.object.mode_set(mode="OBJECT")
-
-        # Add smooth shading
-        bpy.ops.object.shade_smooth()
+        use_cache = seed is not None and cache_dir is not None
+        if use_cache:
+            key = heightfield.cache_key(
+                size=size,
+                subdivisions=subdivisions,
+                noise_scale=noise_scale,
+                edge_randomness=edge_randomness,
+                terrain_complexity=terrain_complexity,
+                micro_detail=micro_detail,
+                seed=seed,
+                noise_basis=noise_basis,
+                octaves=octaves,
+                lacunarity=lacunarity,
+                gain=gain,
+            )
+            cached = heightfield.load_cached(cache_dir, key)
+            if cached is not None and cached.shape == co.shape:
+                obj = build_grid_object("Plane", cached, faces, collection)
+                add_detail_modifiers(obj)
+                if lod_levels:
+                    create_surface_lods(obj, cached, subdivisions + 2, lod_levels, viewport_lod)
+                return obj
+
+        rng = random.Random(seed)
+
+        # Generate random phase offsets for terrain variation
+        phases = [rng.uniform(0, 6.28) for _ in range(heightfield.PHASE_COUNT)]  # 0 to 2π
+        noise_seed = rng.randrange(2**31) if noise_basis != "COSINE" else None
+
+        # Create more natural terrain variation for all vertices at once
+        co[:, 2] = co[:, 2] + heightfield.terrain_displacement(
+            co[:, 0],
+            co[:, 1],
+            size,
+            phases,
+            noise_scale,
+            terrain_complexity,
+            micro_detail,
+            noise_basis=noise_basis,
+            octaves=octaves,
+            lacunarity=lacunarity,
+            gain=gain,
+            noise_seed=noise_seed,
+        )
+
+        obj = build_grid_object("Plane", co, faces, collection)
+        mesh = obj.data
+
+        # Enhanced edge handling with organic curves
+        heightfield.boundary_deformation(
+            co,
+            boundary_vertex_mask(mesh),
+            size,
+            noise_scale,
+            edge_randomness,
+            edge_seed=rng.randrange(2**31),
+        )
+        mesh.vertices.foreach_set("co", co.ravel())
+        mesh.update()
+
+        if use_cache:
+            heightfield.store_cached(cache_dir, key, co)
 
         # Add modifiers for enhanced detail
-        # Bevel modifier for smoother edges
-        bevel = obj.modifiers.new(name="Bevel", type="BEVEL")
-        bevel.width = 0.03
-        bevel.segments = 3
-        bevel.limit_method = "ANGLE"
-        bevel.angle_limit = 0.785398  # 45 degrees
+        add_detail_modifiers(obj)
 
-        # Subdivision surface for smoother overall shape
-        subsurf = obj.modifiers.new(name="Subsurf", type="SUBSURF")
-        subsurf.levels = 1
-        subsurf.render_levels = 2
+        if lod_levels:
+            create_surface_lods(obj, co, subdivisions + 2, lod_levels, viewport_lod)
 
         return obj
 
     except Exception as e:
-        # Ensure we're in object mode even if an error occurs
-        if bpy.context.active_object and bpy.context.active_object.mode != "OBJECT":
-            bpy.ops.object.mode_set(mode="OBJECT")
         raise RuntimeError(f"Failed to create grass surface: {str(e)}")
+
+
+def create_tiled_grass_surface(
+    size=200.0,
+    tiles=8,
+    subdivisions=32,
+    noise_scale=0.7,
+    terrain_complexity=0.9,
+    micro_detail=0.3,
+    feature_size=10.0,
+    collection=None,
+    seed=None,
+    max_workers=None,
+    noise_basis="COSINE",
+    octaves=4,
+    lacunarity=2.0,
+    gain=0.5,
+):
+    """Creates a large grass field as a grid of seamless tile objects.
+
+    Tile heightfields are computed in parallel worker threads. Neighbouring
+    tiles share their edge vertices and subdivide them alike, so they meet
+    without seams, and every tile is its own object with its origin at the
+    tile center, so tiles can be culled or scattered on independently. The
+    organic border and the bevel of create_grass_surface are not applied.
+
+    Args:
+        size (float): Size of the whole field (width and length)
+        tiles (int): Number of tiles per side (1-64)
+        subdivisions (int): Number of subdivisions per tile (1-256)
+        noise_scale (float): Amount of surface irregularity (0.0-1.0)
+        terrain_complexity (float): Intensity of terrain features (0.0-1.0)
+        micro_detail (float): Level of fine surface detail (0.0-1.0)
+        feature_size (float): Size of the lawn the terrain features are
+            scaled to, keeps the detail density independent of size
+        collection (bpy.types.Collection): Collection the tile collection
+            is linked into, defaults to the scene collection
+        seed (int): Seed driving all randomness, None draws a fresh field
+        max_workers (int): Number of worker threads, defaults to the CPU
+            count
+        noise_basis (str): Terrain noise, one of heightfield.NOISE_BASES
+        octaves (int): Number of fractal noise octaves (1-12)
+        lacunarity (float): Frequency multiplier between fractal octaves
+        gain (float): Amplitude multiplier between fractal octaves
+
+    Returns:
+        list[bpy.types.Object]: The tile objects, row by row
+
+    Raises:
+        ValueError: If parameters are out of valid ranges
+    """
+    try:
+        # Validate parameters
+        if not (0.1 <= size <= 2000.0):
+            raise ValueError("Size must be between 0.1 and 2000.0")
+        if not (1 <= tiles <= 64):
+            raise ValueError("Tiles must be between 1 and 64")
+        if not (1 <= subdivisions <= 256):
+            raise ValueError("Subdivisions must be between 1 and 256")
+        if not (0.0 <= noise_scale <= 1.0):
+            raise ValueError("Noise scale must be between 0.0 and 1.0")
+        if not (0.0 <= terrain_complexity <= 1.0):
+            raise ValueError("Terrain complexity must be between 0.0 and 1.0")
+        if not (0.0 <= micro_detail <= 1.0):
+            raise ValueError("Micro detail must be between 0.0 and 1.0")
+        if noise_basis not in heightfield.NOISE_BASES:
+            raise ValueError(f"Noise basis must be one of {heightfield.NOISE_BASES}")
+        if not (1 <= octaves <= 12):
+            raise ValueError("Octaves must be between 1 and 12")
+        if feature_size <= 0.0:
+            raise ValueError("Feature size must be greater than 0.0")
+
+        if collection is None:
+            collection = bpy.context.scene.collection
+
+        rng = random.Random(seed)
+        phases = [rng.uniform(0, 6.28) for _ in range(heightfield.PHASE_COUNT)]  # 0 to 2π
+        noise_seed = rng.randrange(2**31) if noise_basis != "COSINE" else None
+
+        tile_collection = bpy.data.collections.new("Grass Tiles")
+        collection.children.link(tile_collection)
+
+        objects = []
+        for tile_x, tile_y, center, co, faces in heightfield.tile_heightfields(
+            size,
+            tiles,
+            subdivisions,
+            phases,
+            noise_scale,
+            terrain_complexity,
+            micro_detail,
+            feature_size,
+            max_workers,
+            noise_basis=noise_basis,
+            octaves=octaves,
+            lacunarity=lacunarity,
+            gain=gain,
+            noise_seed=noise_seed,
+        ):
+            obj = build_grid_object(f"Plane_{tile_x}_{tile_y}", co, faces, tile_collection)
+            obj.location = (center[0], center[1], 0.0)
+            add_detail_modifiers(obj, seamless=True)
+            objects.append(obj)
+
+        return objects
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to create tiled grass surface: {str(e)}")
+
+
+def export_heightfield(obj, path, height_range=None):
+    """Writes the heights of a grass surface to a heightfield file.
+
+    The format is picked from the suffix: 16-bit grayscale .png/.tif/.tiff
+    or raw float32 .r32/.raw. Image row 0 is the +Y edge of the surface.
+
+    Args:
+        obj (bpy.types.Object): A grid surface from create_grass_surface
+        path (Path): The target file
+        height_range (tuple[float, float]): Heights mapped to black and
+            white in 16-bit images, defaults to the range of the surface
+
+    Returns:
+        tuple[float, float]: The height range used by 16-bit images
+    """
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+
+    count = int(round(len(mesh.vertices)**0.5))
+    if count * count != len(mesh.vertices):
+        raise ValueError(f"{obj.name} is not a square grid surface")
+
+    heights = co[2::3].reshape(count, count)[::-1]
+    return heightfield_io.save(path, heights, height_range)
+
+
+@profiler.stage
+def create_grass_surface_from_heightfield(
+    path,
+    size=10.0,
+    subdivisions=64,
+    height_scale=1.0,
+    collection=None,
+    lod_levels=0,
+    viewport_lod=1,
+    raw_shape=None,
+):
+    """Creates a grass surface driven by an imported heightfield.
+
+    Only the heightfield rows under the surface grid are read from raw and
+    uncompressed TIFF files, so these can be far larger than RAM. PNG and
+    compressed TIFF are decoded whole.
+
+    Args:
+        path (Path): A .png, .tif, .tiff, .r32 or .raw heightfield
+        size (float): Size of the surface (width and length)
+        subdivisions (int): Number of subdivisions (1-4096)
+        height_scale (float): Multiplier applied to the stored heights
+        collection (bpy.types.Collection): Collection the surface is
+            linked into, defaults to the scene collection
+        lod_levels (int): Number of coarser LOD copies to build (0-4)
+        viewport_lod (int): LOD level scatter systems distribute on in the
+            viewport, 0 keeps the full surface
+        raw_shape (tuple[int, int]): (rows, columns) of raw files that have
+            no JSON header
+
+    Returns:
+        bpy.types.Object: The created surface object
+
+    Raises:
+        ValueError: If parameters are out of valid ranges
+    """
+    try:
+        if not Path(path).exists():
+            raise ValueError(f"Heightfield {path} does not exist")
+        if not (0.1 <= size <= 2000.0):
+            raise ValueError("Size must be between 0.1 and 2000.0")
+        if not (1 <= subdivisions <= 4096):
+            raise ValueError("Subdivisions must be between 1 and 4096")
+        if not (0 <= lod_levels <= 4):
+            raise ValueError("LOD levels must be between 0 and 4")
+
+        if collection is None:
+            collection = bpy.context.scene.collection
+
+        count = subdivisions + 2
+        co, faces = heightfield.grid_arrays(size, subdivisions)
+        co[:, 2] = heightfield_io.sample_grid(path, count, raw_shape=raw_shape).ravel() * height_scale
+
+        obj = build_grid_object("Plane", co, faces, collection)
+        add_detail_modifiers(obj)
+        if lod_levels:
+            create_surface_lods(obj, co, count, lod_levels, viewport_lod)
+        return obj
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to create grass surface from heightfield: {str(e)}")
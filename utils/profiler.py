@@ -0,0 +1,221 @@
+'''Per-stage timing and memory instrumentation of the generation pipeline.
+
+Functions are marked as stages with the stage decorator, like annotate in
+logger.py, and blocks of code with the section context manager. Nothing is
+recorded until enable() is called, a disabled stage costs one global lookup
+per call. Enabled stages record wall time, the peak RSS of the process and
+how many bpy.data blocks they added, the results are written as a JSON
+summary and a Chrome trace (chrome://tracing, Perfetto, speedscope).
+'''
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import bpy
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# bpy.data collections counted at the start and end of every stage.
+DATA_COLLECTIONS = (
+    "objects",
+    "meshes",
+    "collections",
+    "materials",
+    "node_groups",
+    "images",
+    "textures",
+    "libraries",
+)
+
+_enabled = False
+_events = []
+_lock = threading.Lock()
+_NULL_SECTION = nullcontext()
+
+
+def enable():
+    '''Start recording stages, clears earlier records.'''
+    global _enabled
+    reset()
+    _enabled = True
+
+
+def disable():
+    '''Stop recording stages, records are kept until the next enable or reset.'''
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _events.clear()
+
+
+def peak_rss() -> int:
+    '''Peak resident set size of this process in bytes, 0 where unknown.'''
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def data_counts() -> dict:
+    '''Number of blocks in the counted bpy.data collections.'''
+    return {name: len(getattr(bpy.data, name)) for name in DATA_COLLECTIONS}
+
+
+class _Section:
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.counts = data_counts()
+        self.rss = peak_rss()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        end = time.perf_counter_ns()
+        counts = data_counts()
+        rss = peak_rss()
+
+        event = {
+            "name": self.name,
+            "start": self.start,
+            "duration": end - self.start,
+            "thread": threading.get_ident(),
+            "peak_rss": rss,
+            "rss_growth": rss - self.rss,
+            "data_added": {name: counts[name] - self.counts[name] for name in counts},
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+def section(name: str):
+    '''Context manager recording a block of code as a stage.'''
+    if not _enabled:
+        return _NULL_SECTION
+    return _Section(name)
+
+
+def stage(f=None, *, name: str = None):
+    '''Decorator recording every call of a function as a stage.
+
+    Usable bare (@stage) or with a name (@stage(name="evaluate")), the name
+    defaults to module.function.
+    '''
+    if f is None:
+        return functools.partial(stage, name=name)
+
+    stage_name = name or f"{f.__module__.rsplit('.', 1)[-1]}.{f.__qualname__}"
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return f(*args, **kwargs)
+        with _Section(stage_name):
+            return f(*args, **kwargs)
+
+    return wrapper
+
+
+def events() -> list:
+    with _lock:
+        return list(_events)
+
+
+def summary() -> dict:
+    '''Aggregates the recorded stages by name.
+
+    Wall times of nested stages are included in their parents, self_ms
+    excludes them.
+    '''
+    recorded = [dict(event, self=event["duration"]) for event in events()]
+    recorded.sort(key=lambda event: (event["thread"], event["start"], -event["duration"]))
+
+    open_stages = []
+    for event in recorded:
+        while open_stages and (open_stages[-1]["thread"] != event["thread"]
+                               or open_stages[-1]["start"] + open_stages[-1]["duration"] <= event["start"]):
+            open_stages.pop()
+        if open_stages:
+            open_stages[-1]["self"] -= event["duration"]
+        open_stages.append(event)
+
+    stages = {}
+    for event in recorded:
+        entry = stages.setdefault(event["name"], {
+            "calls": 0,
+            "total_ms": 0.0,
+            "self_ms": 0.0,
+            "max_ms": 0.0,
+            "peak_rss_mb": 0.0,
+            "rss_growth_mb": 0.0,
+            "data_added": {},
+        })
+        entry["calls"] += 1
+        entry["total_ms"] += event["duration"] / 1e6
+        entry["self_ms"] += event["self"] / 1e6
+        entry["max_ms"] = max(entry["max_ms"], event["duration"] / 1e6)
+        entry["peak_rss_mb"] = max(entry["peak_rss_mb"], event["peak_rss"] / 2**20)
+        entry["rss_growth_mb"] += event["rss_growth"] / 2**20
+        for data_name, added in event["data_added"].items():
+            entry["data_added"][data_name] = entry["data_added"].get(data_name, 0) + added
+    return stages
+
+
+def chrome_trace() -> dict:
+    '''Converts the recorded stages to Chrome trace events.'''
+    pid = os.getpid()
+    trace_events = [{
+        "name": event["name"],
+        "ph": "X",
+        "ts": event["start"] / 1e3,
+        "dur": event["duration"] / 1e3,
+        "pid": pid,
+        "tid": event["thread"],
+        "args": {
+            "peak_rss_mb": round(event["peak_rss"] / 2**20, 2),
+            "rss_growth_mb": round(event["rss_growth"] / 2**20, 2),
+            **{f"added_{name}": added for name, added in event["data_added"].items() if added},
+        },
+    } for event in events()]
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def write(path):
+    '''Writes the summary to path.json and the Chrome trace to path.trace.json.
+
+    Returns:
+        tuple[Path, Path]: The summary and the trace files
+    '''
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path = path.with_name(f"{path.name}.json")
+    trace_path = path.with_name(f"{path.name}.trace.json")
+
+    run = {
+        "pid": os.getpid(),
+        "peak_rss_mb": peak_rss() / 2**20,
+        "blender": bpy.app.version_string,
+        "stages": summary(),
+    }
+    summary_path.write_text(json.dumps(run, indent=2))
+    trace_path.write_text(json.dumps(chrome_trace()))
+    return summary_path, trace_path